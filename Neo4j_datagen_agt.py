@@ -6,10 +6,14 @@ from agno.models.google import Gemini
 import google.generativeai as genai
 import json
 import markdown
+from llm_replay_backend import backend_from_env
+
+# SYNTHDATA_LLM_BACKEND=replay answers from recorded/synthetic responses instead of Gemini
+replay_backend = backend_from_env()
 
 # --------- LOAD API KEY ---------
 google_api_key = os.getenv("GOOGLE_API_KEY")
-if not google_api_key:
+if not google_api_key and not replay_backend:
     st.error("Google API key not found. Please set the GOOGLE_API_KEY environment variable.")
     st.stop()
 
@@ -27,7 +31,7 @@ def get_available_gemini_models():
         return []
 
 # Get the list of available models
-available_models = get_available_gemini_models()
+available_models = get_available_gemini_models() if not replay_backend else []
 
 # Default model
 default_model_id = "gemini-2.5-pro-exp-03-25"
@@ -90,6 +94,10 @@ data_gen_agent = Agent(
     markdown=True,
 )
 
+if replay_backend:
+    analyze_agent = replay_backend.wrap(analyze_agent)
+    data_gen_agent = replay_backend.wrap(data_gen_agent)
+
 # --------------- JSON FILE UPLOAD -------------------
 uploaded_json_file = st.file_uploader("Upload your Neo4j schema JSON file", type=["json"])
 json_file_content = ""
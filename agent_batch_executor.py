@@ -0,0 +1,146 @@
+import copy
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Configuration ---
+DEFAULT_MAX_IN_FLIGHT = 4 # Concurrent LLM calls per step
+DEFAULT_REQUESTS_PER_MINUTE = 0 # 0 disables rate limiting
+PROGRESS_POLL_SECONDS = 0.25 # How often the calling thread drains progress events
+
+logger = logging.getLogger(__name__)
+
+# --- Rate Limiting ---
+
+class RateLimiter:
+    """Thread-safe limiter that spaces call starts to at most `requests_per_minute`."""
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute and requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def acquire(self):
+        """Blocks until the caller may start its request."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self.interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+# --- Batch Execution ---
+
+class BatchResult:
+    """
+    Outcome of one batch call: the streamed text (and its incremental parser, if any), or the exception
+    that stopped it. ttft is the time to the first chunk; parse_seconds the time spent in the parser.
+    """
+
+    def __init__(self, index, content="", error=None, elapsed=0.0, parser=None, ttft=None, parse_seconds=0.0):
+        self.index = index
+        self.content = content
+        self.error = error
+        self.elapsed = elapsed
+        self.parser = parser
+        self.ttft = ttft
+        self.parse_seconds = parse_seconds
+
+    @property
+    def ok(self):
+        return self.error is None
+
+def _agent_for_call(agent):
+    """
+    Returns a per-call copy of the agent. Agent instances keep per-run state (run response,
+    messages), so concurrent calls must not share one.
+    """
+    if hasattr(agent, "deep_copy"):
+        return agent.deep_copy()
+    return copy.copy(agent)
+
+def _feed_parser(parser, index, text, events):
+    """Feeds streamed text to the batch's parser, reports completed entries and parse errors and returns the parse time."""
+    known_errors = len(parser.errors)
+    started = time.perf_counter()
+    entries = parser.feed(text)
+    parse_seconds = time.perf_counter() - started
+    for key, _ in entries:
+        events.put(("entry", index, key))
+    for message in parser.errors[known_errors:]:
+        events.put(("parse_error", index, message))
+    return parse_seconds
+
+def _run_one(agent, index, message, rate_limiter, events, stream, parser_factory):
+    rate_limiter.acquire()
+    events.put(("started", index, None))
+    started = time.monotonic()
+    chunks = []
+    parser = parser_factory() if parser_factory else None
+    ttft = None
+    parse_seconds = 0.0
+    try:
+        call_agent = _agent_for_call(agent)
+        if stream:
+            for chunk in call_agent.run(message=message, stream=True):
+                if chunk and getattr(chunk, "content", None):
+                    if ttft is None:
+                        ttft = time.monotonic() - started
+                    chunks.append(chunk.content)
+                    events.put(("progress", index, len(chunks)))
+                    if parser:
+                        parse_seconds += _feed_parser(parser, index, chunk.content, events)
+        else:
+            response = call_agent.run(message=message, stream=False)
+            ttft = time.monotonic() - started
+            chunks.append(getattr(response, "content", "") or "")
+            if parser:
+                parse_seconds += _feed_parser(parser, index, chunks[-1], events)
+        result = BatchResult(index, "".join(chunks), elapsed=time.monotonic() - started, parser=parser, ttft=ttft, parse_seconds=parse_seconds)
+    except Exception as e:
+        logger.error(f"Batch {index + 1} failed: {e}", exc_info=True)
+        result = BatchResult(index, "".join(chunks), error=e, elapsed=time.monotonic() - started, parser=parser, ttft=ttft, parse_seconds=parse_seconds)
+    events.put(("finished", index, result))
+    return result
+
+def run_agent_batches(agent, messages, max_in_flight=DEFAULT_MAX_IN_FLIGHT, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                      on_event=None, stream=True, parser_factory=None):
+    """
+    Runs agent.run(message) for every message with at most `max_in_flight` calls in flight and
+    call starts spaced by the rate limiter. Blocks until all batches finish and returns their
+    BatchResults in input order, so merges are deterministic regardless of completion order.
+
+    on_event(kind, index, payload) is invoked on the *calling* thread (safe for Streamlit
+    elements) with kind 'started', 'progress' (payload = chunks received) or 'finished'
+    (payload = BatchResult). With a parser_factory (e.g. IncrementalJSONParser) every batch
+    parses its stream as it arrives and also reports 'entry' (payload = key of a completed
+    top-level entry) and 'parse_error' (payload = message) mid-stream.
+    """
+    results = [None] * len(messages)
+    if not messages:
+        return results
+    rate_limiter = RateLimiter(requests_per_minute)
+    events = queue.Queue()
+    max_workers = max(1, min(max_in_flight or 1, len(messages)))
+    logger.info(f"Running {len(messages)} batch(es) with up to {max_workers} in flight"
+                f"{f' at {requests_per_minute} requests/min' if rate_limiter.interval else ''}.")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, message in enumerate(messages):
+            executor.submit(_run_one, agent, index, message, rate_limiter, events, stream, parser_factory)
+        finished = 0
+        while finished < len(messages):
+            try:
+                kind, index, payload = events.get(timeout=PROGRESS_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if kind == "finished":
+                results[index] = payload
+                finished += 1
+            if on_event:
+                on_event(kind, index, payload)
+    return results
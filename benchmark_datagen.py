@@ -0,0 +1,351 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import datetime
+import platform
+import tempfile
+import statistics
+import subprocess
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from datagen_runtime import DatagenConfig, load_config, make_backend, generate_data, write_data, CypherFileSink, RunMetrics, peak_rss_bytes
+from datagen_runtime.backends import BACKENDS
+from datagen_runtime.serialization import PARAM_FORMATS
+from datagen_runtime.sinks import cypher_manifest_path
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(SCRIPT_DIR, "benchmark_results") # Default home of the result files, one per commit
+RETAIL_SCRIPT = os.path.join(SCRIPT_DIR, "data_generation.py") # Hand-written retail generator (needs faker)
+RETAIL_OUTPUT_FILENAME = "retail_data_generation.cypher"
+RETAIL_METRICS_FILENAME = "retail_data_generation_metrics.json"
+
+# Synthetic scales: labels x total nodes. Every label gets the same property mix and two outgoing
+# relationship types (one with a 1..3 cardinality rule, one hybrid default), so relationships grow
+# with the nodes. The runtime keeps a run in memory: 1000x10m needs tens of GB.
+SYNTHETIC_SCALES = {
+    "10x10k": (10, 10_000),
+    "100x100k": (100, 100_000),
+    "1000x1m": (1_000, 1_000_000),
+    "1000x10m": (1_000, 10_000_000),
+}
+REAL_CASE = "real" # The repo's schema_analysis.json / generation_plan.json / value lists / rules
+RETAIL_CASE = "retail" # data_generation.py, run as a script
+CASES = (*SYNTHETIC_SCALES, REAL_CASE, RETAIL_CASE)
+DEFAULT_CASES = ("10x10k", "100x100k", REAL_CASE)
+SYNTHETIC_VALUES_PER_LIST = 50
+SYNTHETIC_PROPERTY_MIX = ("String", "String", "Integer", "Float", "Boolean", "Date", "DateTime")
+DEFAULT_REGRESSION_THRESHOLD = 0.10 # Relative change beyond which a metric counts as a regression
+DEFAULT_RUNS = 3 # Single runs vary by more than the threshold (replay MB/s swings ~15% run to run)
+
+# Metrics compared against a baseline: +1 = higher is better, -1 = lower is better
+COMPARED_METRICS = {
+    "nodes_per_second": 1,
+    "relationships_per_second": 1,
+    "write_mb_per_second": 1,
+    "replay_mb_per_second": 1,
+    "peak_rss_bytes": -1,
+    "output_bytes": -1,
+}
+
+# Logging Setup
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# --- Inputs ---
+
+def synthetic_config(label_count, node_count, seed=0):
+    """A DatagenConfig with label_count labels sharing node_count nodes, value lists and rules for every property."""
+    rng = random.Random(seed)
+    labels = [f"Label{i:04d}" for i in range(label_count)]
+    nodes, plan, value_lists, relationships, cardinality_rules = {}, {}, {}, [], {}
+    for i, label in enumerate(labels):
+        properties = [{"name": f"{label[0].lower()}{label[1:]}ID", "type": "String"}]
+        properties += [{"name": f"p{j}{prop_type}", "type": prop_type} for j, prop_type in enumerate(SYNTHETIC_PROPERTY_MIX)]
+        nodes[label] = {"properties": properties, "id_property": properties[0]["name"]}
+        plan[label] = node_count // label_count + (1 if i < node_count % label_count else 0)
+        value_lists[label] = {p["name"]: [f"{p['name']}_{v}" for v in range(SYNTHETIC_VALUES_PER_LIST)]
+                              for p in properties[1:] if p["type"] == "String"}
+        next_label, random_label = labels[(i + 1) % label_count], labels[rng.randrange(label_count)]
+        relationships.append({"type": f"next{i}", "source": label, "target": next_label,
+                              "properties": [{"name": "since", "type": "Date"}]})
+        relationships.append({"type": f"linked{i}", "source": label, "target": random_label, "properties": []})
+        cardinality_rules[f"{label}->next{i}->{next_label}"] = {"min": 1, "max": 3}
+    generation_rules = {"type_ranges": {
+        "integer": {"default": [0, 1000]},
+        "float": {"default": [0, 100]},
+        "boolean": {"default": {"probability_true": 0.3}},
+        "date": {"default": ["-5Y", "NOW"]},
+        "datetime": {"default": ["-1Y", "NOW_DATETIME"]},
+    }}
+    return DatagenConfig({"nodes": nodes, "relationships": relationships}, plan, value_lists, generation_rules, cardinality_rules)
+
+def real_config(scale=1.0):
+    """The repo's artifacts, with the plan's counts multiplied by scale."""
+    config = load_config(SCRIPT_DIR)
+    if scale != 1.0:
+        config.plan_data = {label: max(1, round(count * scale)) for label, count in config.plan_data.items()}
+    return config
+
+# --- Replay ---
+
+class StubTransaction:
+    """Accepts every query; counts the rows of its parameters like a driver would serialize them."""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, parameters=None):
+        self.driver.statements += 1
+        self.driver.rows += sum(len(value) for value in (parameters or {}).values() if isinstance(value, list))
+
+class StubSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute_write(self, work):
+        return work(StubTransaction(self.driver))
+
+class StubDriver:
+    """Stands in for neo4j.Driver in load_cypher.execute_cypher_file, so replay measures parsing only."""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+
+    def session(self, database=None):
+        return StubSession(self)
+
+def replay(path):
+    """Replays a Cypher script through load_cypher.py against the stub driver."""
+    import load_cypher # Imported here: it configures logging on import
+    driver, metrics = StubDriver(), RunMetrics()
+    started = time.perf_counter()
+    load_cypher.execute_cypher_file(driver, path, "benchmark", metrics)
+    seconds = time.perf_counter() - started
+    size = os.path.getsize(path)
+    return {
+        "replay_seconds": seconds,
+        "replay_parse_seconds": metrics.phases.get(load_cypher.PARSE_PHASE, 0.0),
+        "replay_blocks": len(metrics.blocks),
+        "replay_rows": driver.rows,
+        "replay_rows_per_second": driver.rows / seconds if seconds > 0 else None,
+        "replay_mb_per_second": size / 1e6 / seconds if seconds > 0 else None,
+    }
+
+# --- Cases ---
+
+def _rate(count, seconds):
+    return count / seconds if seconds > 0 else None
+
+def run_runtime_case(case, backend_name, seed, param_format, real_scale, work_dir):
+    """One datagen_runtime run: generation, writing a Cypher script, then replaying it. Runs in a fresh process."""
+    logging.getLogger("datagen_runtime").setLevel(logging.ERROR) # Rule diagnostics are not what is measured
+    if case == REAL_CASE:
+        config = real_config(real_scale)
+    else:
+        config = synthetic_config(*SYNTHETIC_SCALES[case], seed=seed)
+    metrics = RunMetrics()
+    started = time.perf_counter()
+    data = generate_data(config, make_backend(backend_name, seed), metrics=metrics)
+    generate_seconds = time.perf_counter() - started
+    path = os.path.join(work_dir, f"{case}_{backend_name}.cypher")
+    sink = CypherFileSink(path, param_format)
+    started = time.perf_counter()
+    write_data(config, data, sink, metrics=metrics)
+    write_seconds = time.perf_counter() - started
+    output_bytes = sink.output_bytes()
+    values = (sum(len(row) for rows in data.nodes.values() for row in rows) # What the estimator's throughput is calibrated in
+              + sum(1 + len(row["properties"]) for rows in data.relationships.values() for row in rows))
+    result = {
+        "labels": len(config.plan_data),
+        "nodes": data.node_count,
+        "relationships": data.relationship_count,
+        "generate_seconds": generate_seconds,
+        "nodes_per_second": _rate(data.node_count, generate_seconds),
+        "relationships_per_second": _rate(data.relationship_count, generate_seconds),
+        "values": values,
+        "values_per_second": _rate(values, generate_seconds),
+        "phases": metrics.phases,
+        "write_seconds": write_seconds,
+        "write_mb_per_second": _rate(output_bytes / 1e6, write_seconds),
+        "output_bytes": output_bytes,
+    }
+    del data # Free the generated rows before the replay
+    result.update(replay(path))
+    os.remove(path)
+    os.remove(cypher_manifest_path(path))
+    result["peak_rss_bytes"] = peak_rss_bytes()
+    return result
+
+def run_retail_case(work_dir):
+    """data_generation.py as a script (its own run metrics give the phases), then the replay of its output."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SCRIPT_DIR, os.environ.get("PYTHONPATH")])))
+    started = time.perf_counter()
+    subprocess.run([sys.executable, RETAIL_SCRIPT], cwd=work_dir, env=env, check=True, stdout=subprocess.DEVNULL)
+    generate_seconds = time.perf_counter() - started
+    with open(os.path.join(work_dir, RETAIL_METRICS_FILENAME), "r", encoding="utf-8") as f:
+        retail_metrics = json.load(f)
+    path = os.path.join(work_dir, RETAIL_OUTPUT_FILENAME)
+    result = {
+        "nodes": sum(retail_metrics.get("counts", {}).values()),
+        "generate_seconds": generate_seconds,
+        "phases": {name: phase["seconds"] for name, phase in retail_metrics["phases"].items()},
+        "output_bytes": os.path.getsize(path),
+        "peak_rss_bytes": retail_metrics["peak_rss_bytes"], # The script's own peak, not this worker's
+    }
+    result.update(replay(path))
+    os.remove(path)
+    return result
+
+def run_case(case, backend_name, seed, param_format, real_scale, work_dir):
+    if case == RETAIL_CASE:
+        return run_retail_case(work_dir)
+    return run_runtime_case(case, backend_name, seed, param_format, real_scale, work_dir)
+
+def run_isolated(*case_args):
+    """Runs a case in a fresh process, so its peak RSS is its own."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, *case_args).result()
+
+def median_result(results):
+    """
+    Median of every numeric metric over repeated runs (counts are identical across runs), plus the
+    run-to-run spread of the compared metrics: (max - min) / median, 0 for a single run.
+    """
+    merged = dict(results[0])
+    merged["spread"] = {}
+    for key, value in results[0].items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values = [r[key] for r in results if r.get(key) is not None]
+            merged[key] = statistics.median(values) if values else None
+            if key in COMPARED_METRICS and merged[key]:
+                merged["spread"][key] = (max(values) - min(values)) / merged[key]
+    return merged
+
+# --- Comparison ---
+
+def compare(results, baseline, threshold):
+    """
+    Metrics that got worse than the baseline, per (case, backend), by more than threshold (relative) and
+    by more than the run-to-run spread recorded for the metric in either result, so noise is not flagged.
+    """
+    baseline_cases = {(c["case"], c["backend"]): c for c in baseline.get("cases", [])}
+    regressions = []
+    for current in results["cases"]:
+        previous = baseline_cases.get((current["case"], current["backend"]))
+        if previous is None:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            tolerance = max(threshold, previous.get("spread", {}).get(metric, 0.0), current.get("spread", {}).get(metric, 0.0))
+            if change * direction < -tolerance:
+                regressions.append({"case": current["case"], "backend": current["backend"], "metric": metric,
+                                    "baseline": old, "current": new, "change": change, "tolerance": tolerance})
+    return regressions
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+RESULT_HEADER = (f"{'Case':<10} {'Backend':<10} {'Nodes':>10} {'Rels':>10} {'Nodes/s':>10} {'Rels/s':>10} {'Write MB/s':>10} "
+                 f"{'Output MB':>10} {'Peak MB':>8} {'Replay MB/s':>11}")
+
+def format_result(c):
+    def cell(key, scale=1.0, digits=0):
+        return f"{c[key] / scale:.{digits}f}" if c.get(key) is not None else "-"
+    return (f"{c['case']:<10} {c['backend']:<10} {cell('nodes'):>10} {cell('relationships'):>10} {cell('nodes_per_second'):>10} "
+            f"{cell('relationships_per_second'):>10} {cell('write_mb_per_second', digits=1):>10} {cell('output_bytes', 1e6, 1):>10} "
+            f"{cell('peak_rss_bytes', 1e6):>8} {cell('replay_mb_per_second', digits=1):>11}")
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks data generation, Cypher writing and load_cypher.py replay (stub driver, no database).")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(DEFAULT_CASES),
+                        help=f"Synthetic scales (labels x nodes), '{REAL_CASE}' (the repo's artifacts) and/or '{RETAIL_CASE}' (data_generation.py)")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=["python"], help="datagen_runtime backends to measure")
+    parser.add_argument("--param-format", choices=PARAM_FORMATS, default="compat", help="Cypher :param payload format")
+    parser.add_argument("--real-scale", type=float, default=1.0, help=f"Multiplies the plan counts of the '{REAL_CASE}' case")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed (same data for every run of a case)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Repetitions per case (each in a fresh process); medians are reported")
+    parser.add_argument("--json", dest="json_output", help=f"Result file (default: {os.path.relpath(RESULTS_DIR, SCRIPT_DIR)}/datagen_<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative change that counts as a regression (0.10 = 10%% slower, larger or hungrier)")
+    args = parser.parse_args()
+
+    if args.baseline and args.runs < DEFAULT_RUNS:
+        logger.warning(f"Comparing {args.runs} run(s) per case: without a run-to-run spread, noise can exceed the {args.threshold:.0%} threshold.")
+    if RETAIL_CASE in args.cases and importlib.util.find_spec("faker") is None:
+        logger.warning(f"Skipping the '{RETAIL_CASE}' case: data_generation.py requires faker (pip install faker).")
+        args.cases = [case for case in args.cases if case != RETAIL_CASE]
+
+    commit = git_commit()
+    results = {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": vars(args),
+        "cases": [],
+    }
+    failed_cases = [] # A failing case is recorded and the suite goes on, so the other results are still written
+    print(RESULT_HEADER)
+    with tempfile.TemporaryDirectory() as work_dir:
+        for case in args.cases:
+            for backend_name in ([None] if case == RETAIL_CASE else args.backends):
+                runs = []
+                try:
+                    for run_number in range(args.runs):
+                        runs.append(run_isolated(case, backend_name, args.seed, args.param_format, args.real_scale, work_dir))
+                except Exception as e:
+                    logger.error(f"Case '{case}' ({backend_name or 'script'}) failed: {e}")
+                    failed_cases.append(f"{case}/{backend_name or 'script'}")
+                    results["cases"].append({"case": case, "backend": backend_name or "script", "error": str(e)})
+                    print(f"{case:<10} {backend_name or 'script':<10} FAILED: {e}")
+                    continue
+                results["cases"].append({"case": case, "backend": backend_name or "script", **median_result(runs)})
+                print(format_result(results["cases"][-1]))
+
+    output_path = args.json_output or os.path.join(RESULTS_DIR, f"datagen_{commit or datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output_path}")
+    if failed_cases:
+        print(f"{len(failed_cases)} case(s) failed: {', '.join(failed_cases)}")
+
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read baseline {args.baseline}: {e}")
+            sys.exit(1)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"Compared with {args.baseline} (commit {baseline.get('commit')}), threshold {args.threshold:.0%}:")
+        for r in regressions:
+            print(f"  REGRESSION {r['case']}/{r['backend']} {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.1%}, tolerance {r['tolerance']:.1%})")
+        if regressions:
+            sys.exit(1)
+        print("  No regressions.")
+    if failed_cases:
+        sys.exit(1)
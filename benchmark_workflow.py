@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+from agent_batch_executor import DEFAULT_MAX_IN_FLIGHT, DEFAULT_REQUESTS_PER_MINUTE
+from token_budget_batcher import DEFAULT_INPUT_TOKEN_BUDGET, DEFAULT_OUTPUT_TOKEN_BUDGET
+from llm_replay_backend import ReplayBackend, DEFAULT_TOKENS_PER_SECOND, DEFAULT_FIRST_TOKEN_LATENCY, DEFAULT_CHUNK_TOKENS
+from synthdata_workflow import SynthDataWorkflow, WorkflowSettings, WorkflowError, WORKFLOW_STEPS
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_SCHEMA_FILENAME = "schema_analysis.json" # Pre-analyzed sample schema (337 labels)
+
+# Logging Setup
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# --- Benchmark ---
+
+def run_once(settings, backend, output_dir, steps):
+    """Runs the workflow once against the replay backend; returns its StepResults and the wall time."""
+    workflow = SynthDataWorkflow(settings, output_dir=output_dir, backend=backend)
+    started = time.monotonic()
+    workflow.run(steps)
+    return workflow.results, time.monotonic() - started
+
+def summarize(runs):
+    """Per step over all runs: median wall time, mean/max time to first chunk, median parse time, calls."""
+    summary = {}
+    for results, _ in runs:
+        for r in results:
+            s = summary.setdefault(r.name, {"elapsed": [], "ttfts": [], "parse_seconds": [], "calls": r.calls})
+            s["elapsed"].append(r.elapsed)
+            s["ttfts"].extend(r.ttfts)
+            s["parse_seconds"].append(r.parse_seconds)
+    return {name: {
+        "wall_seconds": statistics.median(s["elapsed"]),
+        "ttft_mean_seconds": statistics.mean(s["ttfts"]) if s["ttfts"] else None,
+        "ttft_max_seconds": max(s["ttfts"]) if s["ttfts"] else None,
+        "parse_seconds": statistics.median(s["parse_seconds"]),
+        "calls": s["calls"],
+    } for name, s in summary.items()}
+
+def format_summary(summary, total_wall):
+    lines = [f"{'Step':<18} {'Wall':>8} {'TTFT mean':>10} {'TTFT max':>9} {'Parse':>8} {'Calls':>6}"]
+    for name, s in summary.items():
+        mean = f"{s['ttft_mean_seconds']:.2f}s" if s["ttft_mean_seconds"] is not None else "-"
+        peak = f"{s['ttft_max_seconds']:.2f}s" if s["ttft_max_seconds"] is not None else "-"
+        lines.append(f"{name:<18} {s['wall_seconds']:>7.2f}s {mean:>10} {peak:>9} {s['parse_seconds']:>7.3f}s {s['calls']:>6}")
+    lines.append(f"{'Total (median)':<18} {total_wall:>7.2f}s")
+    return lines
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the synthdata workflow offline against the replay LLM backend.")
+    parser.add_argument("--schema", default=os.path.join(SCRIPT_DIR, SAMPLE_SCHEMA_FILENAME), help="Schema JSON (pre-analyzed unless --raw-schema)")
+    parser.add_argument("--raw-schema", action="store_true", help="The schema is a raw ontology export; run the schema analysis step on it")
+    parser.add_argument("--no-schema-rules", action="store_true", help="With --raw-schema, analyze in LLM batches instead of the rule-based analyzer")
+    parser.add_argument("--recordings", help="Recorded responses: llm_response_cache.sqlite or a JSON recording")
+    parser.add_argument("--strict", action="store_true", help="Fail on calls without a recorded response instead of synthesizing one")
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULT_TOKENS_PER_SECOND, help="Replay streaming rate (0 = instant)")
+    parser.add_argument("--first-token-latency", type=float, default=DEFAULT_FIRST_TOKEN_LATENCY, help="Seconds before the first chunk")
+    parser.add_argument("--chunk-tokens", type=int, default=DEFAULT_CHUNK_TOKENS, help="Tokens per streamed chunk")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Concurrent batch calls")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_REQUESTS_PER_MINUTE, help="Requests per minute (0 = no limit)")
+    parser.add_argument("--input-token-budget", type=int, default=DEFAULT_INPUT_TOKEN_BUDGET, help="Estimated input tokens per batch call")
+    parser.add_argument("--output-token-budget", type=int, default=DEFAULT_OUTPUT_TOKEN_BUDGET, help="Expected output tokens per batch call")
+    parser.add_argument("--steps", nargs="+", choices=WORKFLOW_STEPS, default=list(WORKFLOW_STEPS), help="Steps to run (in workflow order)")
+    parser.add_argument("--runs", type=int, default=1, help="Repetitions; medians are reported")
+    parser.add_argument("--output-dir", help="Where the artifacts go (default: a temporary directory)")
+    parser.add_argument("--json", dest="json_output", help="Also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        with open(args.schema, "r", encoding="utf-8") as f:
+            schema_text = f.read()
+    except OSError as e:
+        logger.error(f"Could not read schema {args.schema}: {e}")
+        sys.exit(1)
+
+    settings = WorkflowSettings(
+        schema_text, run_schema_analysis=args.raw_schema, use_schema_rules=not args.no_schema_rules,
+        max_in_flight=args.max_in_flight, requests_per_minute=args.rpm, input_token_budget=args.input_token_budget,
+        output_token_budget=args.output_token_budget, force_steps=("all",), validate_script=False,
+    )
+    steps = [step for step in WORKFLOW_STEPS if step in args.steps]
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = args.output_dir or tmp_dir
+        for run_number in range(args.runs):
+            backend = ReplayBackend(args.recordings, tokens_per_second=args.tokens_per_second, first_token_latency=args.first_token_latency,
+                                    chunk_tokens=args.chunk_tokens, strict=args.strict)
+            try:
+                runs.append(run_once(settings, backend, output_dir, steps))
+            except WorkflowError as e:
+                logger.error(f"Run {run_number + 1}: step '{e.step}' failed: {e}")
+                sys.exit(1)
+            sources = [call["source"] for call in backend.calls]
+            print(f"Run {run_number + 1}: {runs[-1][1]:.2f}s wall, {len(sources)} call(s) "
+                  f"({sources.count('recorded')} recorded, {sources.count('synthetic')} synthetic)")
+
+    summary = summarize(runs)
+    total_wall = statistics.median(wall for _, wall in runs)
+    print("\n".join(format_summary(summary, total_wall)))
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "total_wall_seconds": total_wall, "steps": summary}, f, indent=2)
+        print(f"Summary written to {args.json_output}")
@@ -0,0 +1,191 @@
+import os
+import re
+import sys
+import csv
+import json
+import math
+import logging
+import argparse
+from collections import Counter, defaultdict
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTS_FILENAME = "Arts_Extract_Cleansed.csv"
+SCHEMA_FILENAME = "schema_analysis.json"
+PLAN_FILENAME = "generation_plan.json" # Used to size 'many' fan-outs from planned node counts
+OUTPUT_FILENAME = "cardinality_rules.json" # Read by datagen_script.py
+MIN_SUFFIX_MATCH_LENGTH = 4 # Shortest label allowed to match as the suffix of an ARTS entity (RetailStore -> Store)
+DEFAULT_MANY_MAX = 5 # Fan-out cap for 'many' when no generation plan counts are available
+MAX_FAN_OUT = 50 # Hard cap so no single node turns into a supernode
+
+# Logging Setup
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# One side of an ARTS cardinality -> (min, max) where max None means 'many'
+MULTIPLICITY_ALIASES = {
+    "one": (1, 1), "1": (1, 1), "1..1": (1, 1), "exactly-one": (1, 1),
+    "zero-or-one": (0, 1), "0..1": (0, 1), "zero": (0, 1), "optional": (0, 1),
+    "many": (0, None), "*": (0, None), "0..*": (0, None), "n": (0, None),
+    "zero-or-many": (0, None), "zero-or-more": (0, None), "zero-to-many": (0, None),
+    "one-or-many": (1, None), "one-or-more": (1, None), "1..*": (1, None),
+}
+
+# --- Helper Functions ---
+
+def normalize_name(name):
+    """Lowercases and strips everything but letters and digits ('Retail Store' -> 'retailstore')."""
+    return re.sub(r"[^a-z0-9]", "", (name or "").lower())
+
+def rule_key(source, rel_type, target):
+    """Key of a per-relationship rule in cardinality_rules.json (same shape as the ARTS RELATIONSHIP_LINK)."""
+    return f"{source}->{rel_type}->{target}"
+
+def parse_cardinality(rule):
+    """
+    Parses an ARTS CARDINALITY_RULE such as 'many-to-one', 'one-to-zero_or_many',
+    'zero-or-many to one' or '0..*-to-1..1' into ((min, max) of ENTITY1, (min, max) of ENTITY2).
+    Returns None for values that are not cardinalities (the extract has some shifted columns).
+    """
+    text = re.sub(r"\(.*?\)", "", (rule or "").lower()).strip().replace("_", "-")
+    parts = re.split(r"\s*-to-\s*|\s+to\s+", text, maxsplit=1)
+    if len(parts) != 2:
+        return None
+    sides = tuple(MULTIPLICITY_ALIASES.get(part.strip().replace(" ", "-")) for part in parts)
+    if None in sides:
+        return None
+    return sides
+
+class LabelIndex:
+    """Resolves ARTS entity names to schema labels through normalized names, plurals and label suffixes."""
+
+    def __init__(self, labels, aliases=None):
+        self.by_normalized = {normalize_name(label): label for label in labels}
+        self.aliases = {normalize_name(k): v for k, v in (aliases or {}).items() if v in labels}
+        # Longest first so 'RetailTransactionLineItem' prefers 'TransactionLineItem' over 'LineItem'
+        self.suffixes = sorted((n for n in self.by_normalized if len(n) >= MIN_SUFFIX_MATCH_LENGTH), key=len, reverse=True)
+        self._cache = {}
+
+    def resolve(self, entity):
+        normalized = normalize_name(entity)
+        if normalized not in self._cache:
+            self._cache[normalized] = self._resolve(normalized)
+        return self._cache[normalized]
+
+    def _resolve(self, normalized):
+        if normalized in self.aliases:
+            return self.aliases[normalized]
+        if normalized in self.by_normalized:
+            return self.by_normalized[normalized]
+        if normalized.endswith("s") and normalized[:-1] in self.by_normalized:
+            return self.by_normalized[normalized[:-1]]
+        for suffix in self.suffixes:
+            if normalized.endswith(suffix):
+                return self.by_normalized[suffix]
+        return None
+
+def fan_out_bounds(multiplicity, source_count, target_count):
+    """Turns a (min, max) multiplicity into integer per-source bounds, sizing 'many' from node counts."""
+    low, high = multiplicity
+    if high is None:
+        if source_count and target_count:
+            # Uniform draws in [low, high] average ~high/2, so 2x the target/source ratio keeps every target reachable
+            high = math.ceil(2 * target_count / source_count)
+        else:
+            high = DEFAULT_MANY_MAX
+        high = max(1, min(high, MAX_FAN_OUT))
+    return low, max(low, high)
+
+# --- Compiler ---
+
+def compile_cardinality_rules(arts_path, schema, plan=None, aliases=None):
+    """
+    Streams the ARTS extract and returns (rules, stats). rules maps rule_key(source, type, target)
+    to {"min", "max", ...} per-source fan-out for every schema relationship whose endpoints an ARTS
+    row resolves to. When several ARTS rows map to one relationship the most frequent rule wins.
+    """
+    plan = plan or {}
+    schema_nodes = schema.get("nodes", {})
+    index = LabelIndex(set(schema_nodes), aliases)
+
+    rels_by_pair = defaultdict(list) # frozenset({source, target}) -> [relationship definitions]
+    for rel in schema.get("relationships", []):
+        if isinstance(rel, dict) and rel.get("source") and rel.get("target") and rel.get("type"):
+            rels_by_pair[frozenset((rel["source"], rel["target"]))].append(rel)
+
+    observed = defaultdict(Counter) # rule key -> Counter of (fan-out multiplicity, ARTS rule, ARTS link)
+    stats = Counter()
+    with open(arts_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        for row in csv.DictReader(f):
+            stats["rows"] += 1
+            sides = parse_cardinality(row.get("CARDINALITY_RULE"))
+            if sides is None:
+                stats["unparsed_rule"] += 1
+                continue
+            entity1 = index.resolve(row.get("ENTITY1"))
+            entity2 = index.resolve(row.get("ENTITY2"))
+            if not (entity1 and entity2):
+                stats["unresolved_entity"] += 1
+                continue
+            rels = rels_by_pair.get(frozenset((entity1, entity2)))
+            if not rels:
+                stats["no_schema_relationship"] += 1
+                continue
+            stats["matched_rows"] += 1
+            link = row.get("RELATIONSHIP_LINK", "")
+            rule_text = row.get("CARDINALITY_RULE", "").strip()
+            for rel in rels:
+                # 'A many-to-one B': each A has one B, each B has many A. Fan-out per schema source
+                # is the multiplicity of the *other* end.
+                multiplicity = sides[1] if rel["source"] == entity1 else sides[0]
+                observed[rule_key(rel["source"], rel["type"], rel["target"])][(multiplicity, rule_text, link)] += 1
+
+    rules = {}
+    for key in sorted(observed):
+        source, rel_type, target = key.split("->", 2)
+        (multiplicity, rule_text, link), count = observed[key].most_common(1)[0]
+        low, high = fan_out_bounds(multiplicity, plan.get(source), plan.get(target))
+        rules[key] = {"min": low, "max": high, "arts_rule": rule_text, "arts_link": link, "arts_rows": sum(observed[key].values())}
+    stats["rules"] = len(rules)
+    return rules, stats
+
+def _load_json(path, description, required=True):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        if required:
+            logger.error(f"{description} not found: {path}")
+        else:
+            logger.warning(f"{description} not found: {path}. Continuing without it.")
+    except json.JSONDecodeError as e:
+        logger.error(f"Error decoding JSON from {description}: {path} - {e}")
+    return None
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile per-relationship cardinality rules from the ARTS extract.")
+    parser.add_argument("--arts", default=os.path.join(SCRIPT_DIR, ARTS_FILENAME))
+    parser.add_argument("--schema", default=os.path.join(SCRIPT_DIR, SCHEMA_FILENAME))
+    parser.add_argument("--plan", default=os.path.join(SCRIPT_DIR, PLAN_FILENAME))
+    parser.add_argument("--aliases", help="Optional JSON file mapping ARTS entity names to schema labels")
+    parser.add_argument("--output", default=os.path.join(SCRIPT_DIR, OUTPUT_FILENAME))
+    args = parser.parse_args()
+
+    schema_data = _load_json(args.schema, "Schema file")
+    if not schema_data:
+        sys.exit(1)
+    plan_data = _load_json(args.plan, "Generation plan", required=False) or {}
+    alias_data = _load_json(args.aliases, "Alias file") if args.aliases else None
+
+    try:
+        cardinality_rules, compile_stats = compile_cardinality_rules(args.arts, schema_data, plan_data, alias_data)
+    except OSError as e:
+        logger.error(f"Could not read ARTS extract {args.arts}: {e}")
+        sys.exit(1)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(cardinality_rules, f, indent=2)
+    logger.info(f"Compiled {compile_stats['rules']} relationship rules from {compile_stats['matched_rows']} of {compile_stats['rows']} ARTS rows "
+                f"(unparsed rule: {compile_stats['unparsed_rule']}, unresolved entity: {compile_stats['unresolved_entity']}, "
+                f"no schema relationship: {compile_stats['no_schema_relationship']}). Wrote {args.output}")
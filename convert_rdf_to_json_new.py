@@ -96,6 +96,9 @@ def extract_for_neo4j(ttl_file_path):
                 prop_name = get_local_name(prop_uri)
                 # Determine data type
                 range_uri = g.value(subject=prop_uri, predicate=RDFS.range)
+                if isinstance(range_uri, BNode):
+                    # Restricted datatype (e.g. a CHECK range from ddl_to_owl.py): map its base XSD type
+                    range_uri = g.value(subject=range_uri, predicate=OWL.onDatatype) or range_uri
                 if range_uri:
                     neo4j_datatype = map_rdf_to_neo4j_datatype(range_uri)
                     neo4j_nodes[cls_name]["properties"][prop_name] = neo4j_datatype
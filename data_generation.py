@@ -1,11 +1,21 @@
+import os
+import re
+import time
 import faker
 import random
 import datetime
 import uuid
 import json  # For formatting properties in Cypher
+import argparse
+import contextlib
+from collections import Counter
+from datagen_runtime.index_planner import AWAIT_INDEXES_STATEMENT
+from datagen_runtime.metrics import RunMetrics # Phase timings, peak RSS and output bytes of the run
 
 # --- Configuration ---
 OUTPUT_CYPHER_FILE = "retail_data_generation.cypher"
+METRICS_FILE = "retail_data_generation_metrics.json"
+PROFILE_FILE = "retail_data_generation_profile.prof" # --profile: cProfile stats of the generation (pstats format)
 
 # Volume Estimates (Adjust as needed for testing/performance)
 NUM_CUSTOMERS = 5000  # Reduced for faster testing, scale up later (original: 50,000)
@@ -69,6 +79,11 @@ SOCIAL_JOURNEY_PERCENTAGE = 0.15
 CART_ABANDONMENT_RATE = 0.40 # % of sessions with AddToCart but no purchase
 FOLLOWUP_AFTER_ABANDONMENT_PERCENTAGE = 0.60
 
+# Statements written per label / relationship type, for the run metrics' per-owner throughput
+NODE_STATEMENT_RE = re.compile(r"(?:CREATE|MERGE) \(\w*:(\w+)")
+RELATIONSHIP_STATEMENT_RE = re.compile(r"-\[:(\w+)")
+statement_counts = Counter() # ("labels" | "relationship_types", name) -> statements written
+
 # --- Initialize Faker ---
 fake = faker.Faker('en_US')
 
@@ -125,8 +140,31 @@ def format_cypher_properties(props):
     return f"{{{', '.join(items)}}}"
 
 def write_cypher(f, query):
-    """Writes a Cypher query to the file."""
+    """Writes a Cypher query to the file and counts it for its label or relationship type."""
     f.write(query + ";\n")
+    relationship = RELATIONSHIP_STATEMENT_RE.search(query)
+    if relationship:
+        statement_counts[("relationship_types", relationship.group(1))] += 1
+    else:
+        node = NODE_STATEMENT_RE.match(query)
+        if node:
+            statement_counts[("labels", node.group(1))] += 1
+
+@contextlib.contextmanager
+def generation_step(metrics, phase_name):
+    """
+    Times a generation step as a phase. Steps generate and write several labels and relationship types
+    interleaved, so the step's time is shared among them by the statements each one wrote.
+    """
+    counts_before = statement_counts.copy()
+    started = time.perf_counter()
+    with metrics.phase(phase_name):
+        yield
+    seconds = time.perf_counter() - started
+    written = statement_counts - counts_before
+    total_written = sum(written.values())
+    for (kind, name), statements in written.items():
+        metrics.record_owner(kind, name, items=statements, generate_seconds=seconds * statements / total_written)
 
 def get_random_date(start=DATA_START_DATE, end=DATA_END_DATE):
     """Generates a random date between start and end."""
@@ -1036,36 +1074,53 @@ def add_constraints(f):
     write_cypher(f, "CREATE CONSTRAINT unique_loyalty_program_id IF NOT EXISTS FOR (lp:LoyaltyProgram) REQUIRE lp.loyaltyProgramID IS UNIQUE;")
     write_cypher(f, "CREATE CONSTRAINT unique_loyalty_tier_id IF NOT EXISTS FOR (lt:LoyaltyTier) REQUIRE lt.loyaltyTierID IS UNIQUE;")
     write_cypher(f, "CREATE CONSTRAINT unique_segment_id IF NOT EXISTS FOR (cs:CustomerSegment) REQUIRE cs.segmentID IS UNIQUE;")
+    write_cypher(f, AWAIT_INDEXES_STATEMENT) # Wait for the constraint indexes to come ONLINE before loading data
     write_cypher(f, "\n") # Add a newline for readability
 
 
 # --- Main Execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates the retail sample data as a Cypher script.")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Run the generation under cProfile; saved to {PROFILE_FILE} and summarized in {METRICS_FILE}")
+    args = parser.parse_args()
+
     start_time = datetime.datetime.now()
     print(f"Starting data generation at {start_time}...")
+    # Generation and writing are interleaved in this script, so the profile covers both
+    metrics = RunMetrics("generate", PROFILE_FILE) if args.profile else RunMetrics()
 
-    with open(OUTPUT_CYPHER_FILE, "w", encoding="utf-8") as f:
+    with open(OUTPUT_CYPHER_FILE, "w", encoding="utf-8") as f, metrics.profiled("generate"):
         # Start transaction (optional, but good for large imports)
         # write_cypher(f, "BEGIN") # Use with caution or specific import tools
 
         # 1. Add Constraints (important for performance)
-        add_constraints(f)
+        with generation_step(metrics, "constraints"):
+            add_constraints(f)
 
         # 2. Generate Foundational Nodes
-        generate_foundational_nodes(f)
+        with generation_step(metrics, "foundational_nodes"):
+            generate_foundational_nodes(f)
 
         # 3. Generate Core Entity Nodes
-        generate_stores(f)
-        generate_suppliers(f)
-        generate_products(f) # Generates brands implicitly if needed, links later
-        generate_customers(f) # Handles loyalty segment linking
+        with generation_step(metrics, "stores"):
+            generate_stores(f)
+        with generation_step(metrics, "suppliers"):
+            generate_suppliers(f)
+        with generation_step(metrics, "products"):
+            generate_products(f) # Generates brands implicitly if needed, links later
+        with generation_step(metrics, "customers"):
+            generate_customers(f) # Handles loyalty segment linking
 
         # 4. Generate Marketing Nodes
-        generate_promotions_campaigns(f) # Depends on loyalty segment
+        with generation_step(metrics, "promotions_campaigns"):
+            generate_promotions_campaigns(f) # Depends on loyalty segment
 
         # 5. Generate Interaction & Transactional Nodes (Hypothesis Biasing Happens Here)
-        generate_interactions_and_sessions(f) # Depends on customers, products, channels. Creates abandoned carts list.
-        generate_sales_transactions_and_orders(f) # Depends on interactions/abandonment, customers, products, stores, promos.
+        with generation_step(metrics, "interactions_sessions"):
+            generate_interactions_and_sessions(f) # Depends on customers, products, channels. Creates abandoned carts list.
+        with generation_step(metrics, "sales_transactions_orders"):
+            generate_sales_transactions_and_orders(f) # Depends on interactions/abandonment, customers, products, stores, promos.
 
         # 6. Generate other nodes if needed (Events, Inventory, POs, etc.)
         # (Skipped for brevity, but follow similar patterns)
@@ -1088,4 +1143,13 @@ if __name__ == "__main__":
     print(f"Orders: {len(generated_data['orders'])}")
     print(f"Transactions: {len(generated_data['transactions'])}")
     print(f"Abandoned Carts Tracked: {len(generated_data['abandoned_carts'])}")
-    print(f"Customers with Social Interaction: {len(generated_data['social_journey_customers'])}")
\ No newline at end of file
+
+    print(f"Customers with Social Interaction: {len(generated_data['social_journey_customers'])}")
+
+    metrics.output_bytes = os.path.getsize(OUTPUT_CYPHER_FILE)
+    metrics.finish_profile()
+    print("\n--- Phases ---")
+    for phase_name, seconds in metrics.phases.items():
+        print(f"{phase_name}: {seconds:.2f}s")
+    metrics.write(METRICS_FILE, counts={key: len(value) for key, value in generated_data.items() if isinstance(value, (list, set))})
+    print(f"Run metrics written to: {METRICS_FILE}")
\ No newline at end of file
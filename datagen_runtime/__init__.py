@@ -0,0 +1,24 @@
+"""
+Reusable data generation runtime driven by the workflow's JSON artifacts (schema_analysis.json,
+generation_plan.json, value_lists.json, generation_rules.json, cardinality_rules.json).
+
+Generated datagen scripts declare their configuration and optional DatagenHooks and call
+run_script(__file__, ...); `python -m datagen_runtime` runs the same pipeline on a config directory.
+Backends (python, vectorized) produce the values; sinks (Cypher file, CSV, Bolt) take the output.
+"""
+
+from .config import DatagenConfig, DatagenConfigError, DEFAULT_INPUT_FILENAMES, load_config, node_id_properties
+from .values import (parse_date_string, generate_random_date, generate_random_datetime, generate_property_value,
+                     generate_sequential_id, pick_value_group, find_rule, resolve_rule, check_property_rule,
+                     evaluate_integer_rule_component)
+from .diagnostics import Diagnostics
+from .metrics import RunMetrics, peak_rss_bytes
+from .backends import PythonBackend, VectorizedBackend, make_backend
+from .serialization import (ParamEncoder, escape_cypher_string, format_cypher_value, format_cypher_properties,
+                            custom_json_serializer, quote_identifier)
+from .sinks import DatagenSink, CypherFileSink, CsvSink, BoltSink, write_cypher
+from .compression import open_text, compression_for
+from .index_planner import plan_schema_indexes, build_index_statements, apply_index_plan
+from .generator import DatagenHooks, GeneratedData, validate_rules, generate_data, write_data, run_summary
+from .estimator import PlanEstimator, PlanEstimate, Throughput, calibrate
+from .cli import run_script
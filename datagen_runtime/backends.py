@@ -0,0 +1,280 @@
+import time
+import random
+import logging
+import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None # Only the vectorized backend needs it
+
+from .config import DatagenConfigError
+from .values import pick_value_group, find_rule, resolve_rule, parse_date_string, VALUE_GROUPS_KEY
+from .diagnostics import Diagnostics, report_issue, MISSING_VALUE_LIST, REVERSED_RANGE, RULE_ERROR
+from .metrics import PHASE_PROPERTY_GENERATION
+
+logger = logging.getLogger(__name__)
+
+# Values generate_property_value returns when applying a rule fails
+ERROR_DEFAULTS = {
+    "Integer": lambda: 0,
+    "Float": lambda: 0.0,
+    "Boolean": lambda: False,
+    "Date": datetime.date.today,
+    "DateTime": datetime.datetime.now,
+}
+
+# Backends generate property values and relationship pairings; the generator (generator.py) owns
+# IDs, hooks and grouping, so both backends produce the same row shapes:
+#   nodes:         [{prop: value, ...}, ...] (without the ID property)
+#   relationships: [{"source_id": ..., "target_id": ..., "properties": {...}}, ...]
+# Rule fallbacks are counted in the backend's diagnostics collector (set by generate_data) per
+# affected value, so both backends report the same counts for the same plan. Relationship property
+# generation is timed into the run metrics (also set by generate_data), which books the rest of
+# relationships() as sampling.
+
+class PythonBackend:
+    """
+    Row-at-a-time generation with the random module; reproduces the original datagen script draw for
+    draw. Each property's value list or rule is resolved once per label / relationship group (as
+    VectorizedBackend does per column), so rows only draw values.
+    """
+
+    name = "python"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed) if seed is not None else random
+        self.diagnostics = None
+        self.metrics = None
+
+    def _draw_function(self, owner_type, prop_name, prop_type, qualified_prop_name, value_lists_data, generation_rules_data, issues):
+        """draw(group) for one property, making the same random calls per value as generate_property_value."""
+        rng = self.rng
+        if prop_type == "String":
+            values = value_lists_data.get(owner_type, {}).get(prop_name, [])
+            def draw_string(group):
+                if group and prop_name in group:
+                    return group[prop_name]
+                if values:
+                    return rng.choice(values)
+                report_issue(self.diagnostics, qualified_prop_name, MISSING_VALUE_LIST) # Depends on the row's value group
+                return ""
+            return draw_string
+        if prop_type == "Boolean" and find_rule(qualified_prop_name, prop_type, generation_rules_data) is None:
+            return lambda group: rng.choice([True, False])
+        spec = resolve_rule(qualified_prop_name, prop_type, generation_rules_data, issues)
+        kind = spec[0]
+        if kind == "integer":
+            low, high = spec[1], spec[2]
+            return lambda group: rng.randint(low, high)
+        if kind == "float":
+            low, high = spec[1], spec[2]
+            return lambda group: round(rng.uniform(low, high), 2)
+        if kind == "boolean":
+            probability = spec[1]
+            return lambda group: rng.random() < probability
+        if kind in ("date", "datetime"):
+            as_datetime = kind == "datetime"
+            start = parse_date_string(spec[1], as_datetime, issues, qualified_prop_name)
+            end = parse_date_string(spec[2], as_datetime, issues, qualified_prop_name)
+            if start > end:
+                report_issue(issues, qualified_prop_name, REVERSED_RANGE, [spec[1], spec[2]])
+                start, end = end, start
+            if not as_datetime:
+                days = max((end - start).days, 0)
+                return lambda group: start + datetime.timedelta(days=rng.randrange(days + 1))
+            seconds = max((end - start).total_seconds(), 0)
+            return lambda group: start + datetime.timedelta(seconds=rng.uniform(0, seconds))
+        if kind == "today":
+            return lambda group: datetime.date.today()
+        if kind == "now":
+            return lambda group: datetime.datetime.now()
+        value = spec[1]
+        return lambda group: value
+
+    def _draw_functions(self, owner_type, prop_specs, value_lists_data, generation_rules_data, issues):
+        draws = []
+        for prop_name, prop_type, qualified_prop_name in prop_specs:
+            try:
+                draw = self._draw_function(owner_type, prop_name, prop_type, qualified_prop_name, value_lists_data,
+                                           generation_rules_data, issues)
+            except Exception as e:
+                report_issue(issues, qualified_prop_name, RULE_ERROR, str(e))
+                fallback = ERROR_DEFAULTS.get(prop_type, lambda: None)
+                draw = lambda group, fallback=fallback: fallback()
+            draws.append((prop_name, draw))
+        return draws
+
+    def _new_issues(self):
+        # Issues found while resolving are counted once per generated row (see _count_issues)
+        return Diagnostics() if self.diagnostics is not None else None
+
+    def _count_issues(self, issues, rows):
+        if issues:
+            self.diagnostics.merge(issues, scale=rows)
+
+    @staticmethod
+    def _properties(draws, group=None):
+        props = {}
+        for prop_name, draw in draws:
+            prop_value = draw(group)
+            if prop_value is not None: # Avoid adding properties with None value
+                props[prop_name] = prop_value
+        return props
+
+    def _relationship_properties(self, draws):
+        if self.metrics is None:
+            return self._properties(draws)
+        started = time.perf_counter()
+        props = self._properties(draws)
+        self.metrics.add_time(PHASE_PROPERTY_GENERATION, time.perf_counter() - started)
+        return props
+
+    def node_properties(self, label, count, prop_specs, value_lists_data, generation_rules_data, use_value_groups=False):
+        issues = self._new_issues()
+        draws = self._draw_functions(label, prop_specs, value_lists_data, generation_rules_data, issues)
+        rows = []
+        for _ in range(count):
+            group = pick_value_group(label, value_lists_data, self.rng) if use_value_groups else None
+            rows.append(self._properties(draws, group))
+        self._count_issues(issues, count)
+        return rows
+
+    def relationships(self, rel_type, prop_specs, source_ids, target_ids, cardinality, value_lists_data, generation_rules_data):
+        """cardinality is (min, max) targets per source, or None for the hybrid default (min(sources, targets) unique pairs)."""
+        issues = self._new_issues()
+        draws = self._draw_functions(rel_type, prop_specs, value_lists_data, generation_rules_data, issues)
+        rows = []
+        if cardinality:
+            min_rels, max_rels = cardinality
+            for source_id in source_ids:
+                # Samples without replacement per source; different sources may pick the same target
+                num_to_select = min(self.rng.randint(min_rels, max_rels), len(target_ids))
+                if num_to_select <= 0:
+                    continue
+                for target_id in self.rng.sample(target_ids, k=num_to_select):
+                    rows.append({"source_id": source_id, "target_id": target_id, "properties": self._relationship_properties(draws)})
+            self._count_issues(issues, len(rows))
+            return rows
+
+        # Pair each element of the shuffled smaller side with a unique element of the shuffled larger side
+        is_source_smaller = len(source_ids) <= len(target_ids)
+        smaller_ids = list(source_ids if is_source_smaller else target_ids)
+        larger_ids = list(target_ids if is_source_smaller else source_ids)
+        self.rng.shuffle(smaller_ids)
+        self.rng.shuffle(larger_ids)
+        for id_from_smaller, id_from_larger in zip(smaller_ids, larger_ids):
+            rows.append({
+                "source_id": id_from_smaller if is_source_smaller else id_from_larger,
+                "target_id": id_from_larger if is_source_smaller else id_from_smaller,
+                "properties": self._relationship_properties(draws),
+            })
+        self._count_issues(issues, len(rows))
+        return rows
+
+class VectorizedBackend:
+    """
+    Column-at-a-time generation with numpy: each property is drawn for every row of a label or
+    relationship group in one call. Same distributions as PythonBackend, different random stream.
+    """
+
+    name = "vectorized"
+
+    def __init__(self, seed=None):
+        if np is None:
+            raise DatagenConfigError("The vectorized backend requires numpy (pip install numpy).")
+        self.rng = np.random.default_rng(seed)
+        self.diagnostics = None
+        self.metrics = None
+
+    def _date_column(self, kind, start_str, end_str, n, qualified_prop_name, column_issues):
+        as_datetime = kind == "datetime"
+        start = parse_date_string(start_str, as_datetime, column_issues, qualified_prop_name)
+        end = parse_date_string(end_str, as_datetime, column_issues, qualified_prop_name)
+        if start > end:
+            report_issue(column_issues, qualified_prop_name, REVERSED_RANGE, [start_str, end_str])
+            start, end = end, start
+        if not as_datetime:
+            offsets = self.rng.integers(0, (end - start).days + 1, n)
+            return (np.datetime64(start.isoformat(), "D") + offsets).tolist()
+        offsets = (self.rng.uniform(0, (end - start).total_seconds(), n) * 1_000_000).astype(np.int64)
+        if start.tzinfo is not None: # datetime64 is naive; keep the offset-aware arithmetic in Python
+            return [start + datetime.timedelta(microseconds=int(us)) for us in offsets]
+        return (np.datetime64(start, "us") + offsets).tolist()
+
+    def _column(self, owner_type, prop_name, prop_type, qualified_prop_name, n, value_lists_data, generation_rules_data, groups,
+                column_issues):
+        if prop_type == "String":
+            values = value_lists_data.get(owner_type, {}).get(prop_name, [])
+            column = [values[i] for i in self.rng.integers(0, len(values), n)] if values else [""] * n
+            if groups:
+                column = [g[prop_name] if prop_name in g else v for g, v in zip(groups, column)]
+            if not values:
+                missing = n - sum(1 for g in groups if prop_name in g) if groups else n
+                if missing:
+                    report_issue(self.diagnostics, qualified_prop_name, MISSING_VALUE_LIST, count=missing)
+            return column
+        spec = resolve_rule(qualified_prop_name, prop_type, generation_rules_data, column_issues)
+        kind = spec[0]
+        if kind == "integer":
+            return self.rng.integers(spec[1], spec[2] + 1, n).tolist()
+        if kind == "float":
+            return np.round(self.rng.uniform(spec[1], spec[2], n), 2).tolist()
+        if kind == "boolean":
+            return (self.rng.random(n) < spec[1]).tolist()
+        if kind in ("date", "datetime"):
+            return self._date_column(kind, spec[1], spec[2], n, qualified_prop_name, column_issues)
+        if kind == "today":
+            return [datetime.date.today()] * n
+        if kind == "now":
+            return [datetime.datetime.now()] * n
+        return [spec[1]] * n
+
+    def _safe_column(self, owner_type, prop_name, prop_type, qualified_prop_name, n, value_lists_data, generation_rules_data, groups):
+        # The rule is resolved once per column; its issues are scaled to the n values they affect
+        column_issues = Diagnostics() if self.diagnostics is not None else None
+        try:
+            return self._column(owner_type, prop_name, prop_type, qualified_prop_name, n, value_lists_data, generation_rules_data, groups,
+                                column_issues)
+        except Exception as e:
+            report_issue(self.diagnostics, qualified_prop_name, RULE_ERROR, str(e), count=n)
+            return [ERROR_DEFAULTS.get(prop_type, lambda: None)()] * n
+        finally:
+            if column_issues:
+                self.diagnostics.merge(column_issues, scale=n)
+
+    def _rows(self, owner_type, prop_specs, n, value_lists_data, generation_rules_data, groups=None):
+        columns = [(prop_name, self._safe_column(owner_type, prop_name, prop_type, qualified_prop_name, n, value_lists_data, generation_rules_data, groups))
+                   for prop_name, prop_type, qualified_prop_name in prop_specs]
+        return [{name: column[i] for name, column in columns if column[i] is not None} for i in range(n)]
+
+    def node_properties(self, label, count, prop_specs, value_lists_data, generation_rules_data, use_value_groups=False):
+        groups = None
+        if use_value_groups:
+            available = value_lists_data.get(label, {}).get(VALUE_GROUPS_KEY, [])
+            groups = [available[i] for i in self.rng.integers(0, len(available), count)] if available else None
+        return self._rows(label, prop_specs, count, value_lists_data, generation_rules_data, groups)
+
+    def relationships(self, rel_type, prop_specs, source_ids, target_ids, cardinality, value_lists_data, generation_rules_data):
+        if cardinality:
+            min_rels, max_rels = cardinality
+            counts = np.minimum(self.rng.integers(min_rels, max_rels + 1, len(source_ids)), len(target_ids))
+            pairs = [(source_ids[s], target_ids[t]) for s in np.flatnonzero(counts)
+                     for t in self.rng.choice(len(target_ids), size=int(counts[s]), replace=False)]
+        else:
+            n = min(len(source_ids), len(target_ids))
+            sources, targets = self.rng.permutation(len(source_ids))[:n], self.rng.permutation(len(target_ids))[:n]
+            pairs = [(source_ids[s], target_ids[t]) for s, t in zip(sources, targets)]
+        started = time.perf_counter()
+        properties = self._rows(rel_type, prop_specs, len(pairs), value_lists_data, generation_rules_data)
+        if self.metrics is not None:
+            self.metrics.add_time(PHASE_PROPERTY_GENERATION, time.perf_counter() - started)
+        return [{"source_id": s, "target_id": t, "properties": p} for (s, t), p in zip(pairs, properties)]
+
+BACKENDS = {PythonBackend.name: PythonBackend, VectorizedBackend.name: VectorizedBackend}
+
+def make_backend(name, seed=None):
+    """Backend instance by name ('python' or 'vectorized')."""
+    if name not in BACKENDS:
+        raise DatagenConfigError(f"Unknown backend '{name}'. Choose one of: {', '.join(BACKENDS)}.")
+    return BACKENDS[name](seed)
@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import logging
+import argparse
+
+from .config import DatagenConfigError, DEFAULT_INPUT_FILENAMES, load_config
+from .backends import BACKENDS, make_backend
+from .sinks import CypherFileSink, CsvSink, BoltSink, DEFAULT_BOLT_BATCH_SIZE, RELATIONSHIP_MODES, RELATIONSHIP_MERGE, RELATIONSHIP_CREATE
+from .serialization import PARAM_FORMATS
+from .generator import generate_data, write_data
+from .metrics import RunMetrics, METRICS_FILENAME, PROFILE_FILENAME, PROFILE_SCOPES, PHASE_LOAD_CONFIG
+from .estimator import PlanEstimator, calibrate
+
+# --- Configuration ---
+DEFAULT_OUTPUT_CYPHER_FILENAME = "generated_data.cypher"
+DEFAULT_OUTPUT_CSV_DIRNAME = "generated_data_csv"
+QUESTIONS_FILENAME = "questions.txt" # Optional query examples used to plan filter indexes
+LOG_FILENAME = "datagen_script.log"
+SINKS = ("cypher", "csv", "bolt")
+BENCHMARK_RESULTS_DIRNAME = "benchmark_results" # benchmark_datagen.py output, calibrates --estimate
+LOAD_METRICS_FILENAME = "load_metrics.json" # load_cypher.py output, calibrates the estimated database time
+
+logger = logging.getLogger(__name__)
+
+def build_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--config-dir", help="Directory with the JSON artifacts (default: the script's directory)")
+    parser.add_argument("--sink", choices=SINKS, default="cypher", help="Where the data goes")
+    parser.add_argument("--output", help=f"Cypher file or CSV directory (default: {DEFAULT_OUTPUT_CYPHER_FILENAME} / {DEFAULT_OUTPUT_CSV_DIRNAME}); "
+                                         "a .cypher.gz / .cypher.zst name writes a compressed script")
+    parser.add_argument("--backend", choices=list(BACKENDS), default="python", help="Value generation backend ('vectorized' needs numpy)")
+    parser.add_argument("--seed", type=int, help="Random seed for a reproducible run")
+    parser.add_argument("--param-format", choices=PARAM_FORMATS, default="compat",
+                        help="Cypher sink: :param payload format ('compact' uses orjson when installed; not byte-identical to 'compat')")
+    parser.add_argument("--relationship-mode", choices=RELATIONSHIP_MODES, default=RELATIONSHIP_MERGE,
+                        help="'create': fresh loads; duplicate (source, target) pairs are dropped while generating and relationships are "
+                             "CREATEd with their properties. 'merge' (default): MERGE + SET, safe to rerun against a loaded database")
+    parser.add_argument("--value-groups", action="store_true", help="Draw consistent property sets from the value lists' _value_groups_")
+    parser.add_argument("--metrics-output", help=f"Where the run metrics JSON goes (default: {METRICS_FILENAME} next to the script)")
+    parser.add_argument("--profile", choices=PROFILE_SCOPES,
+                        help=f"Run generation, writing or both under cProfile; saved to {PROFILE_FILENAME} and summarized in the metrics")
+    parser.add_argument("--estimate", action="store_true", help="Only predict counts, output size, memory and runtime from the plan; generate nothing")
+    parser.add_argument("--calibration", help=f"Benchmark result file or directory for --estimate (default: {BENCHMARK_RESULTS_DIRNAME}/ next to the script)")
+    parser.add_argument("--neo4j-uri", default=os.getenv("NEO4J_URI", "neo4j://localhost:7687"), help="Bolt sink: Neo4j URI")
+    parser.add_argument("--neo4j-user", default=os.getenv("NEO4J_USER", "neo4j"), help="Bolt sink: user")
+    parser.add_argument("--neo4j-password", default=os.getenv("NEO4J_PASSWORD"), help="Bolt sink: password (or NEO4J_PASSWORD)")
+    parser.add_argument("--neo4j-database", default=os.getenv("NEO4J_DATABASE"), help="Bolt sink: database")
+    parser.add_argument("--bolt-batch-size", type=int, default=DEFAULT_BOLT_BATCH_SIZE, help="Bolt sink: rows per write transaction")
+    return parser
+
+def make_sink(args, base_dir, output_filename=DEFAULT_OUTPUT_CYPHER_FILENAME):
+    if args.sink == "bolt":
+        if not args.neo4j_password:
+            raise DatagenConfigError("The bolt sink needs --neo4j-password (or NEO4J_PASSWORD).")
+        return BoltSink(args.neo4j_uri, args.neo4j_user, args.neo4j_password, args.neo4j_database, args.bolt_batch_size, args.relationship_mode)
+    if args.sink == "csv":
+        return CsvSink(args.output or os.path.join(base_dir, DEFAULT_OUTPUT_CSV_DIRNAME))
+    return CypherFileSink(args.output or os.path.join(base_dir, output_filename), args.param_format, args.relationship_mode)
+
+def run(args, base_dir, filenames=None, enforce_date_consistency=True, hooks=None, output_filename=DEFAULT_OUTPUT_CYPHER_FILENAME,
+        use_value_groups=False):
+    """Loads the artifacts, generates and writes; returns the GeneratedData (None with --estimate). Writes the run metrics JSON."""
+    config_dir = args.config_dir or base_dir
+    metrics = RunMetrics(args.profile, os.path.join(base_dir, PROFILE_FILENAME) if args.profile else None)
+    with metrics.phase(PHASE_LOAD_CONFIG):
+        config = load_config(config_dir, filenames, enforce_date_consistency)
+    logger.info(f"Date consistency enforcement: {config.enforce_date_consistency}")
+    if args.estimate:
+        estimate_run(args, base_dir, config)
+        return None
+    backend = make_backend(args.backend, args.seed)
+    sink = make_sink(args, base_dir, output_filename)
+    started = time.monotonic()
+    with metrics.profiled("generate"):
+        data = generate_data(config, backend, hooks, use_value_groups=use_value_groups or args.value_groups, metrics=metrics,
+                             unique_relationships=args.relationship_mode == RELATIONSHIP_CREATE)
+    logger.info(f"Generated {data.node_count} nodes and {data.relationship_count} relationships with the {backend.name} backend "
+                f"in {time.monotonic() - started:.1f}s. Writing to {sink.describe()}...")
+    with metrics.profiled("write"):
+        write_data(config, data, sink, os.path.join(base_dir, QUESTIONS_FILENAME), metrics)
+    logger.info(f"Successfully wrote {sink.describe()}")
+    data.diagnostics.log_summary(logger)
+    metrics.output_bytes = sink.output_bytes()
+    metrics.finish_profile()
+    metrics.log_summary(logger)
+    metrics.write(args.metrics_output or os.path.join(base_dir, METRICS_FILENAME), backend=backend.name, seed=args.seed,
+                  sink=sink.describe(), nodes=data.node_count, relationships=data.relationship_count,
+                  diagnostics={"issues": len(data.diagnostics), "affected_values": data.diagnostics.affected_values})
+    return data
+
+def estimate_run(args, base_dir, config):
+    """--estimate: logs the plan-driven prediction of the run and returns it."""
+    throughput = calibrate(args.calibration or os.path.join(base_dir, BENCHMARK_RESULTS_DIRNAME),
+                           os.path.join(base_dir, LOAD_METRICS_FILENAME), args.backend)
+    estimate = PlanEstimator.from_config(config, throughput).estimate(config.plan_data)
+    logger.info(f"Estimate for the {args.backend} backend:")
+    for line in estimate.format_report():
+        logger.info(f"  {line}")
+    return estimate
+
+def run_script(script_file, filenames=None, enforce_date_consistency=True, hooks=None, output_filename=DEFAULT_OUTPUT_CYPHER_FILENAME,
+               use_value_groups=False):
+    """
+    Entry point of a generated datagen script: the script only declares its artifact filenames, the
+    date consistency flag and optional DatagenHooks; logging goes to the console and to
+    datagen_script.log next to the script, as the standalone scripts did. use_value_groups turns on
+    the value lists' _value_groups_ (also available as --value-groups).
+    """
+    script_dir = os.path.dirname(os.path.abspath(script_file))
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler(os.path.join(script_dir, LOG_FILENAME), mode='w', encoding='utf-8'), # 'w' overwrites
+        ]
+    )
+    args = build_parser("Generates Neo4j data from the workflow's JSON artifacts.").parse_args()
+    logger.info("Starting Neo4j data generation script...")
+    try:
+        run(args, script_dir, filenames, enforce_date_consistency, hooks, output_filename, use_value_groups)
+    except DatagenConfigError as e:
+        logger.error(f"CRITICAL ERROR: {e}")
+        sys.exit(1)
+    except OSError as e:
+        logger.error(f"ERROR: Could not write the output: {e}")
+        sys.exit(1)
+    logger.info("Script finished successfully.")
+
+# --- Main Execution ---
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = build_parser("Generates Neo4j data from the workflow's JSON artifacts (schema, plan, value lists, rules).").parse_args()
+    try:
+        run(args, os.getcwd(), dict(DEFAULT_INPUT_FILENAMES))
+    except (DatagenConfigError, OSError) as e:
+        logger.error(f"Data generation failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,49 @@
+import io
+import gzip
+import logging
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None # Only .zst files need it
+
+from .config import DatagenConfigError
+
+# --- Configuration ---
+GZIP_COMPRESSION_LEVEL = 6 # Most of level 9's ratio on repetitive JSON at a fraction of the CPU
+ZSTD_COMPRESSION_LEVEL = 3 # zstd's default; still several times smaller than the plain script
+STREAM_BUFFER_SIZE = 1 << 20 # Bytes buffered between the text layer and the (de)compressor
+
+logger = logging.getLogger(__name__)
+
+# Compression is chosen by the file extension, so 'generated_data.cypher.gz' or
+# 'generated_data.cypher.zst' anywhere a Cypher path is accepted writes/reads a compressed script
+# and every other name stays plain text. Reading decompresses as a stream, line by line.
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+def compression_for(path):
+    """'gzip', 'zstd' or None, from the file extension."""
+    lower = str(path).lower()
+    return next((kind for suffix, kind in COMPRESSION_SUFFIXES.items() if lower.endswith(suffix)), None)
+
+def open_text(path, mode="r", buffering=STREAM_BUFFER_SIZE, errors=None):
+    """
+    Opens path for reading ('r') or writing ('w') UTF-8 text, through a gzip or zstd stream when
+    the extension asks for one. zstd needs the zstandard package.
+    """
+    if mode not in ("r", "w"):
+        raise ValueError(f"Unsupported mode '{mode}'; use 'r' or 'w'.")
+    kind = compression_for(path)
+    if kind is None:
+        return open(path, mode, encoding='utf-8', buffering=buffering, errors=errors)
+    if kind == "gzip":
+        raw = gzip.open(path, mode + "b", compresslevel=GZIP_COMPRESSION_LEVEL) if mode == "w" else gzip.open(path, "rb")
+    else:
+        if zstandard is None:
+            raise DatagenConfigError(f"Writing or reading {path} requires zstandard (pip install zstandard), or use a .gz name.")
+        if mode == "w":
+            raw = zstandard.open(path, "wb", cctx=zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL))
+        else:
+            raw = zstandard.open(path, "rb")
+    buffered = io.BufferedWriter(raw, buffering) if mode == "w" else io.BufferedReader(raw, buffering)
+    return io.TextIOWrapper(buffered, encoding='utf-8', errors=errors)
@@ -0,0 +1,105 @@
+import os
+import json
+import logging
+
+# --- Configuration ---
+DEFAULT_INPUT_FILENAMES = {
+    "schema_analysis_filename": "schema_analysis.json",
+    "generation_plan_filename": "generation_plan.json",
+    "value_lists_filename": "value_lists.json",
+    "cardinality_rules_filename": "cardinality_rules.json", # Optional, can be None
+    "generation_rules_filename": "generation_rules.json",
+}
+REQUIRED_FILES = {
+    "schema_data": "schema_analysis_filename",
+    "plan_data": "generation_plan_filename",
+    "value_lists_data": "value_lists_filename",
+    "generation_rules_data": "generation_rules_filename",
+}
+OPTIONAL_FILES = {"cardinality_rules_data": "cardinality_rules_filename"}
+
+logger = logging.getLogger(__name__)
+
+class DatagenConfigError(ValueError):
+    """A required configuration file is missing/invalid or the schema cannot drive generation."""
+
+class DatagenConfig:
+    """The JSON artifacts a run is driven by, plus the run-wide flags the generated script sets."""
+
+    def __init__(self, schema_data, plan_data, value_lists_data, generation_rules_data, cardinality_rules_data=None,
+                 filenames=None, enforce_date_consistency=True):
+        self.schema_data = schema_data
+        self.plan_data = plan_data # Direct mapping of label -> count
+        self.value_lists_data = value_lists_data
+        self.generation_rules_data = generation_rules_data
+        self.cardinality_rules_data = cardinality_rules_data or {}
+        self.filenames = dict(DEFAULT_INPUT_FILENAMES, **(filenames or {}))
+        self.enforce_date_consistency = enforce_date_consistency
+
+    @property
+    def schema_nodes(self):
+        return self.schema_data.get("nodes", {})
+
+    @property
+    def relationship_definitions(self):
+        return self.schema_data.get("relationships", [])
+
+def _load_json(filepath):
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_config(config_dir, filenames=None, enforce_date_consistency=True):
+    """
+    Loads the required artifacts (schema, plan, value lists, generation rules) and the optional
+    cardinality rules from config_dir. Missing/invalid required files raise DatagenConfigError;
+    a missing or invalid optional file defaults to empty.
+    """
+    filenames = dict(DEFAULT_INPUT_FILENAMES, **(filenames or {}))
+    loaded = {}
+    for key, filename_key in REQUIRED_FILES.items():
+        filepath = os.path.join(config_dir, filenames[filename_key])
+        logger.info(f"Attempting to load required file: {filepath}")
+        try:
+            loaded[key] = _load_json(filepath)
+        except FileNotFoundError:
+            raise DatagenConfigError(f"Required file not found: {filepath}")
+        except json.JSONDecodeError as e:
+            raise DatagenConfigError(f"Invalid JSON in file {filepath}: {e}")
+        except OSError as e:
+            raise DatagenConfigError(f"Unexpected error loading {filepath}: {e}")
+        logger.info(f"Successfully loaded {filenames[filename_key]}")
+
+    for key, filename_key in OPTIONAL_FILES.items():
+        if not filenames.get(filename_key):
+            continue # Not specified for this run
+        filepath = os.path.join(config_dir, filenames[filename_key])
+        logger.info(f"Attempting to load optional file: {filepath}")
+        try:
+            loaded[key] = _load_json(filepath)
+            logger.info(f"Successfully loaded optional file {filenames[filename_key]}")
+        except FileNotFoundError:
+            logger.warning(f"Optional file not found, defaulting to empty: {filepath}")
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Could not load optional file {filepath}, defaulting to empty: {e}")
+
+    if not loaded["plan_data"]:
+        raise DatagenConfigError("Generation plan is empty: nothing to generate.")
+    return DatagenConfig(filenames=filenames, enforce_date_consistency=enforce_date_consistency, **loaded)
+
+def node_id_properties(schema_nodes):
+    """label -> {"name", "type"} of its id_property; raises DatagenConfigError for labels the generator cannot key."""
+    if not schema_nodes:
+        raise DatagenConfigError("'nodes' definition missing or empty in schema file.")
+    node_id_props = {}
+    for label, details in schema_nodes.items():
+        id_prop_name = details.get("id_property")
+        if not id_prop_name:
+            raise DatagenConfigError(f"No 'id_property' defined for node label '{label}' in schema.")
+        properties_list = details.get("properties", [])
+        if not isinstance(properties_list, list):
+            raise DatagenConfigError(f"'properties' for label '{label}' is not a list in schema.")
+        id_prop_type = next((p.get("type") for p in properties_list if isinstance(p, dict) and p.get("name") == id_prop_name), None)
+        if not id_prop_type:
+            raise DatagenConfigError(f"ID property '{id_prop_name}' not found or has no type for label '{label}' in schema.")
+        node_id_props[label] = {"name": id_prop_name, "type": id_prop_type}
+    return node_id_props
@@ -0,0 +1,107 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Issues the value generators can hit, with the fallback they apply. Recorded per (owner, property,
+# issue) instead of logged per value: a label with thousands of nodes would otherwise write the same
+# warning thousands of times to the console and to datagen_script.log.
+MISSING_VALUE_LIST = "missing_value_list"
+MISSING_RULE = "missing_rule"
+INVALID_INTEGER_RULE = "invalid_integer_rule"
+INVALID_FLOAT_RULE = "invalid_float_rule"
+INVALID_BOOLEAN_RULE = "invalid_boolean_rule"
+INVALID_DATE_RULE = "invalid_date_rule"
+UNPARSABLE_INTEGER_BOUND = "unparsable_integer_bound"
+UNPARSABLE_DATE = "unparsable_date"
+DATE_CALCULATION_ERROR = "date_calculation_error"
+REVERSED_RANGE = "reversed_range"
+UNSUPPORTED_TYPE = "unsupported_type"
+UNSUPPORTED_ID_TYPE = "unsupported_id_type"
+RULE_ERROR = "rule_error"
+
+ISSUE_MESSAGES = {
+    MISSING_VALUE_LIST: "no value list for String property; generated empty strings",
+    MISSING_RULE: "no generation rule (specific or default); used the basic default",
+    INVALID_INTEGER_RULE: "invalid integer rule, expected [min, max]; used [0, 100]",
+    INVALID_FLOAT_RULE: "invalid float rule, expected [min, max] numbers; used [0.0, 1.0]",
+    INVALID_BOOLEAN_RULE: "invalid boolean rule, expected {'probability_true': p} with 0 <= p <= 1; used 0.5",
+    INVALID_DATE_RULE: "invalid date/datetime rule, expected [start, end]; used ['-1Y', 'NOW']",
+    UNPARSABLE_INTEGER_BOUND: "could not parse integer rule bound; used 0",
+    UNPARSABLE_DATE: "could not parse date string; used the current date/time",
+    DATE_CALCULATION_ERROR: "relative date calculation failed; used the current date/time",
+    REVERSED_RANGE: "range start is after its end; swapped them",
+    UNSUPPORTED_TYPE: "unsupported property type; generated null",
+    UNSUPPORTED_ID_TYPE: "unsupported ID property type; used the integer counter",
+    RULE_ERROR: "error applying generation rule; used the type's fallback value",
+}
+ERROR_ISSUES = {RULE_ERROR} # Logged at ERROR level in the summary; everything else is a WARNING
+
+class Diagnostics:
+    """
+    Counts generation issues per (owner, property, issue), where owner is a node label or a
+    relationship type. The rule validation pre-pass (generator.validate_rules) flags problems once
+    before any row is generated; the value generators then only bump a counter per affected value.
+    log_summary() writes one line per distinct issue at the end of the run.
+    """
+
+    def __init__(self):
+        self.counts = {} # (owner, property, issue) -> values affected, in first-seen order
+        self.details = {} # (owner, property, issue) -> example offending input (rule, date string, ...)
+
+    def record(self, qualified_prop_name, issue, detail=None, count=1):
+        """Counts count values of qualified_prop_name ('Owner.prop') hit by issue; detail is kept from the first report."""
+        owner, _, prop_name = qualified_prop_name.rpartition(".")
+        key = (owner, prop_name, issue)
+        if key in self.counts:
+            self.counts[key] += count
+        else:
+            self.counts[key] = count
+            self.details[key] = detail
+
+    def flag(self, qualified_prop_name, issue, detail=None):
+        """Registers an issue found by validation without counting an affected value."""
+        self.record(qualified_prop_name, issue, detail, count=0)
+
+    def __len__(self):
+        return len(self.counts)
+
+    @property
+    def affected_values(self):
+        return sum(self.counts.values())
+
+    def merge(self, other, scale=1):
+        """Adds another collector's issues with their counts multiplied by scale (0 only flags them)."""
+        for key, count in other.counts.items():
+            owner, prop_name, issue = key
+            self.record(f"{owner}.{prop_name}", issue, other.details[key], count * scale)
+
+    def as_list(self):
+        """JSON-friendly list of the recorded issues (for run reports)."""
+        issues = []
+        for key, count in self.counts.items():
+            owner, prop_name, issue = key
+            detail = self.details[key]
+            issues.append({"owner": owner, "property": prop_name, "issue": issue, "message": ISSUE_MESSAGES.get(issue, issue),
+                           "values": count, "input": None if detail is None else repr(detail)})
+        return issues
+
+    def log_summary(self, summary_logger=None):
+        summary_logger = summary_logger or logger
+        if not self.counts:
+            summary_logger.info("Data generation diagnostics: no issues.")
+            return
+        summary_logger.warning(f"Data generation diagnostics: {len(self.counts)} distinct issues affecting {self.affected_values} values.")
+        for (owner, prop_name, issue), count in self.counts.items():
+            detail = self.details[(owner, prop_name, issue)]
+            level = logging.ERROR if issue in ERROR_ISSUES else logging.WARNING
+            affected = f"{count} values" if count else "flagged by validation, no values affected"
+            summary_logger.log(level, f"  {owner}.{prop_name}: {ISSUE_MESSAGES.get(issue, issue)} "
+                                      f"({affected}{'' if detail is None else f'; input: {detail!r}'})")
+
+def report_issue(diagnostics, qualified_prop_name, issue, detail=None, count=1):
+    """Counts the issue when the caller has a Diagnostics collector; otherwise logs it right away."""
+    if diagnostics is not None:
+        diagnostics.record(qualified_prop_name, issue, detail, count)
+        return
+    level = logging.ERROR if issue in ERROR_ISSUES else logging.WARNING
+    logger.log(level, f"'{qualified_prop_name}': {ISSUE_MESSAGES.get(issue, issue)}" + ("" if detail is None else f" (input: {detail!r})"))
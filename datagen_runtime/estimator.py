@@ -0,0 +1,344 @@
+import os
+import glob
+import json
+import logging
+
+from .config import node_id_properties
+from .values import resolve_rule
+from .diagnostics import Diagnostics
+from .generator import _property_specs
+
+# --- Configuration ---
+# Throughput used when no benchmark results / load metrics are given (benchmark_datagen.py, python
+# backend, and a local Neo4j MERGE-ing on indexed IDs); calibrate() replaces them with measured ones.
+DEFAULT_VALUES_PER_SECOND = 200_000 # Generated values (properties, plus one per relationship pairing)
+DEFAULT_WRITE_MB_PER_SECOND = 50.0 # Cypher script serialization
+DEFAULT_PARSE_MB_PER_SECOND = 50.0 # load_cypher.py reading and JSON-decoding the script
+DEFAULT_DB_ROWS_PER_SECOND = 10_000 # Rows merged per second by the database
+# Memory model of a run (all rows are held until written), fitted on synthetic and scaled real plans
+BASE_RSS_BYTES = 40 * 1024 * 1024 # Interpreter, modules and loaded artifacts
+NODE_ROW_BYTES = 120 # Property dict of a node
+RELATIONSHIP_ROW_BYTES = 360 # Row dict plus its properties dict
+VALUE_BYTES = 42 # One stored value (dict slot plus the object; value-list strings are shared)
+JSON_BUFFER_FACTOR = 2 # The largest block's JSON text and its encoder chunks are alive at once
+BLOCK_OVERHEAD_BYTES = 200 # Comment, :param prefix and UNWIND/MERGE/SET lines of one block
+COMPRESSION_RATIOS = {"gzip": 0.10, "zstd": 0.10} # Measured on generated scripts (highly repetitive JSON)
+SUPERNODE_DEGREE = 10_000 # Average relationships per node of one type that make its nodes supernodes
+DOMINANT_SHARE = 0.10 # Share of the estimated runtime that flags a label / relationship type as dominant
+
+logger = logging.getLogger(__name__)
+
+# Fixed JSON/CSV sizes per generated type; see generate_property_value for the values behind them
+DATE_JSON_BYTES, DATE_CSV_BYTES = 12, 10 # "2024-01-31"
+DATETIME_JSON_BYTES, DATETIME_CSV_BYTES = 28, 26 # "2024-01-31T12:34:56.123456"
+FLOAT_DECIMAL_CHARS = 2.9 # ".xx", a trailing zero is dropped ~10% of the time
+RELATIONSHIP_ROW_JSON_BYTES = 46 # {"source_id": , "target_id": , "properties": }
+
+# --- Calibration ---
+
+class Throughput:
+    """Rates the estimator converts counts and bytes into seconds with; source says where they come from."""
+
+    def __init__(self, values_per_second=DEFAULT_VALUES_PER_SECOND, write_mb_per_second=DEFAULT_WRITE_MB_PER_SECOND,
+                 parse_mb_per_second=DEFAULT_PARSE_MB_PER_SECOND, db_rows_per_second=DEFAULT_DB_ROWS_PER_SECOND, source="defaults"):
+        self.values_per_second = values_per_second
+        self.write_mb_per_second = write_mb_per_second
+        self.parse_mb_per_second = parse_mb_per_second
+        self.db_rows_per_second = db_rows_per_second
+        self.source = source
+
+    def as_dict(self):
+        return dict(vars(self))
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def calibrate(benchmark_path=None, load_metrics_path=None, backend="python"):
+    """
+    Throughput from a benchmark_datagen.py result file (or the newest one in a directory), using its
+    largest case for the backend, and the database rate from a load_cypher.py load_metrics.json.
+    Missing or unreadable inputs keep the defaults.
+    """
+    throughput, sources = Throughput(), []
+    if benchmark_path and os.path.isdir(benchmark_path):
+        candidates = glob.glob(os.path.join(benchmark_path, "*.json"))
+        benchmark_path = max(candidates, key=os.path.getmtime) if candidates else None
+    if benchmark_path and os.path.exists(benchmark_path):
+        try:
+            cases = [c for c in _read_json(benchmark_path).get("cases", []) if c.get("backend") == backend and c.get("values_per_second")]
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read benchmark results {benchmark_path}: {e}")
+            cases = []
+        if cases:
+            case = max(cases, key=lambda c: c.get("values", 0))
+            throughput.values_per_second = case["values_per_second"]
+            throughput.write_mb_per_second = case.get("write_mb_per_second") or throughput.write_mb_per_second
+            throughput.parse_mb_per_second = case.get("replay_mb_per_second") or throughput.parse_mb_per_second
+            sources.append(f"{os.path.basename(benchmark_path)} ({case['case']}, {backend})")
+    if load_metrics_path and os.path.exists(load_metrics_path):
+        try:
+            blocks = [b for b in _read_json(load_metrics_path).get("blocks", []) if b.get("rows")]
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read load metrics {load_metrics_path}: {e}")
+            blocks = []
+        execute_seconds = sum(b["execute_seconds"] for b in blocks)
+        if execute_seconds > 0:
+            throughput.db_rows_per_second = sum(b["rows"] for b in blocks) / execute_seconds
+            sources.append(os.path.basename(load_metrics_path))
+    if sources:
+        throughput.source = ", ".join(sources)
+    return throughput
+
+# --- Value Sizes ---
+
+def _mean_int_chars(low, high, width=0):
+    """Mean printed length of an integer drawn uniformly from [low, high], zero-padded to width digits."""
+    total = 0
+    for lo, hi, sign_chars in ((max(low, 0), high, 0), (max(-high, 1), -low, 1)): # Non-negative part, then the negative magnitudes
+        digits = 1
+        while lo <= hi:
+            top = min(hi, 10 ** digits - 1)
+            if lo <= top:
+                total += (top - lo + 1) * (max(digits, width) + sign_chars)
+                lo = top + 1
+            digits += 1
+    return total / (high - low + 1)
+
+def _value_sizes(owner_type, prop_name, prop_type, qualified_prop_name, value_list_sizes, generation_rules_data, issues):
+    """(JSON bytes, CSV bytes) of an average value, or None when the property is never written (null)."""
+    if prop_type == "String":
+        return value_list_sizes.get((owner_type, prop_name), (2, 0))
+    spec = resolve_rule(qualified_prop_name, prop_type, generation_rules_data, issues)
+    kind = spec[0]
+    if kind == "integer":
+        size = _mean_int_chars(spec[1], spec[2])
+        return size, size
+    if kind == "float":
+        low, high = int(spec[1]) - (spec[1] < 0), int(spec[2])
+        size = _mean_int_chars(low, max(low, high)) + FLOAT_DECIMAL_CHARS
+        return size, size
+    if kind == "boolean":
+        size = 4 * spec[1] + 5 * (1 - spec[1])
+        return size, size
+    if kind in ("date", "today"):
+        return DATE_JSON_BYTES, DATE_CSV_BYTES
+    if kind in ("datetime", "now"):
+        return DATETIME_JSON_BYTES, DATETIME_CSV_BYTES
+    if spec[1] is None:
+        return None
+    size = len(json.dumps(spec[1]))
+    return size, size
+
+def value_list_sizes(value_lists_data):
+    """(owner, property) -> mean (JSON bytes, CSV bytes) of its value list's entries."""
+    sizes = {}
+    for owner_type, lists in value_lists_data.items():
+        if not isinstance(lists, dict):
+            continue
+        for prop_name, values in lists.items():
+            if isinstance(values, list) and values:
+                sizes[(owner_type, prop_name)] = (sum(len(json.dumps(v)) for v in values) / len(values),
+                                                  sum(len(str(v).encode('utf-8')) for v in values) / len(values))
+    return sizes
+
+class _RowShape:
+    """Average serialized size of one row's properties (without IDs) and the number of values it holds."""
+
+    def __init__(self, owner_type, prop_specs, value_list_sizes, generation_rules_data, issues):
+        self.json_bytes = self.csv_bytes = 0.0
+        self.entries = 0
+        self.csv_header_bytes = 0
+        for prop_name, prop_type, qualified_prop_name in prop_specs:
+            sizes = _value_sizes(owner_type, prop_name, prop_type, qualified_prop_name, value_list_sizes, generation_rules_data, issues)
+            if sizes is None:
+                continue
+            self.json_bytes += len(prop_name) + 4 + sizes[0] # "name": value
+            self.csv_bytes += sizes[1] + 1 # value and its comma
+            self.csv_header_bytes += len(prop_name) + 1
+            self.entries += 1
+        if self.entries:
+            self.json_bytes += 2 * (self.entries - 1) # ", " between entries
+
+# --- Estimate ---
+
+class PlanEstimator:
+    """
+    Predicts a run from the plan counts without generating anything: node and relationship counts,
+    output bytes per sink format, peak memory, generation / write / load time, supernodes and the
+    labels and relationship types that dominate the runtime. The per-label and per-relationship row
+    sizes are worked out once in the constructor (value list lengths, rule ranges), so estimate(plan)
+    is a pass over the labels and relationship definitions that takes milliseconds even for a
+    337-label schema; the Streamlit planner calls it on every edit of the counts.
+    """
+
+    def __init__(self, schema_data, value_lists_data, generation_rules_data, cardinality_rules_data=None, throughput=None):
+        self.throughput = throughput or Throughput()
+        self.cardinality_rules_data = cardinality_rules_data or {}
+        self.schema_nodes = schema_data.get("nodes", {})
+        self.id_props = node_id_properties(self.schema_nodes)
+        sizes = value_list_sizes(value_lists_data)
+        issues = Diagnostics() # Rule problems are reported by the run itself, not by every estimate
+        self.node_shapes = {}
+        for label, details in self.schema_nodes.items():
+            id_prop_name = self.id_props[label]["name"]
+            specs = _property_specs(label, details.get("properties", []), skip={id_prop_name}, warn=False)
+            self.node_shapes[label] = _RowShape(label, specs, sizes, generation_rules_data, issues)
+        self.relationships = [] # (source, type, target, row shape)
+        for rel_definition in schema_data.get("relationships", []):
+            if not isinstance(rel_definition, dict):
+                continue
+            rel_type = rel_definition.get("type")
+            source_label, target_label = (rel_definition.get(side) for side in ("source", "target"))
+            source_label, target_label = [v[0] if isinstance(v, list) and v else v for v in (source_label, target_label)]
+            if not rel_type or not isinstance(source_label, str) or not isinstance(target_label, str):
+                continue
+            specs = _property_specs(rel_type, rel_definition.get("properties", []), warn=False)
+            self.relationships.append((source_label, rel_type, target_label, _RowShape(rel_type, specs, sizes, generation_rules_data, issues)))
+
+    @classmethod
+    def from_config(cls, config, throughput=None):
+        return cls(config.schema_data, config.value_lists_data, config.generation_rules_data, config.cardinality_rules_data, throughput)
+
+    def _id_chars(self, label, count):
+        """Mean (JSON, CSV) size of the label's sequential IDs: 'Label_0001' strings or plain integers."""
+        if self.id_props[label]["type"] == "String":
+            size = len(label) + 1 + _mean_int_chars(1, count, 4)
+            return size + 2, size
+        size = _mean_int_chars(1, count)
+        return size, size
+
+    def _relationship_count(self, source_label, rel_type, target_label, sources, targets):
+        """Expected rows and per-node degrees, mirroring generator.cardinality_bounds and the backends."""
+        rule = self.cardinality_rules_data.get(f"{source_label}->{rel_type}->{target_label}") or self.cardinality_rules_data.get(rel_type)
+        if rule and isinstance(rule, dict):
+            min_rels, max_rels = rule.get("min", 0), rule.get("max", 1)
+            max_rels = min(max(min_rels, max_rels), targets)
+            rows = sources * (min(min_rels, max_rels) + max_rels) / 2
+        else:
+            rows = min(sources, targets) # Hybrid default: unique pairs
+        return rows, rows / sources, rows / targets
+
+    def estimate(self, plan_data):
+        t = self.throughput
+        labels, rel_types, supernodes = {}, {}, []
+        totals = {"nodes": 0, "relationships": 0, "values": 0, "json": 0.0, "compact": 0.0, "csv": 0.0, "memory": 0.0, "largest_block": 0.0}
+
+        def add_owner(table, name, items, values, json_bytes, compact_bytes, csv_bytes, memory):
+            entry = table.setdefault(name, {"name": name, "items": 0, "values": 0, "cypher_bytes": 0.0, "csv_bytes": 0.0})
+            entry["items"] += items
+            entry["values"] += values
+            entry["cypher_bytes"] += json_bytes
+            entry["csv_bytes"] += csv_bytes
+            totals["values"] += values
+            totals["json"] += json_bytes
+            totals["compact"] += compact_bytes
+            totals["csv"] += csv_bytes
+            totals["memory"] += memory
+            totals["largest_block"] = max(totals["largest_block"], json_bytes)
+
+        counts = {label: count for label, count in plan_data.items() if label in self.node_shapes and isinstance(count, (int, float)) and count > 0}
+        id_chars = {label: self._id_chars(label, count) for label, count in counts.items()}
+        for label, count in counts.items():
+            shape, (id_json, id_csv) = self.node_shapes[label], id_chars[label]
+            id_name = self.id_props[label]["name"]
+            row_json = 2 + len(id_name) + 4 + id_json + (2 + shape.json_bytes if shape.entries else 0) # {"id": ..., ...}
+            entries = shape.entries + 1
+            json_bytes = count * (row_json + 2) + BLOCK_OVERHEAD_BYTES + 4 * len(label)
+            compact_bytes = json_bytes - count * (2 * entries) # No space after ':' and ','
+            csv_bytes = count * (id_csv + shape.csv_bytes + 1) + len(id_name) + shape.csv_header_bytes + 2
+            add_owner(labels, label, count, count * entries, json_bytes, compact_bytes, csv_bytes,
+                      count * (NODE_ROW_BYTES + entries * VALUE_BYTES))
+            totals["nodes"] += count
+
+        for source_label, rel_type, target_label, shape in self.relationships:
+            sources, targets = counts.get(source_label, 0), counts.get(target_label, 0)
+            if not sources or not targets:
+                continue
+            rows, out_degree, in_degree = self._relationship_count(source_label, rel_type, target_label, sources, targets)
+            if not rows:
+                continue
+            id_json = id_chars[source_label][0] + id_chars[target_label][0]
+            id_csv = id_chars[source_label][1] + id_chars[target_label][1]
+            row_json = RELATIONSHIP_ROW_JSON_BYTES + id_json + 2 + shape.json_bytes
+            json_bytes = rows * (row_json + 2) + BLOCK_OVERHEAD_BYTES + 4 * (len(source_label) + len(rel_type) + len(target_label))
+            compact_bytes = json_bytes - rows * (2 * (3 + shape.entries))
+            csv_bytes = rows * (id_csv + 2 + shape.csv_bytes + 1) + 20 + shape.csv_header_bytes
+            add_owner(rel_types, rel_type, rows, rows * (1 + shape.entries), json_bytes, compact_bytes, csv_bytes,
+                      rows * (RELATIONSHIP_ROW_BYTES + (3 + shape.entries) * VALUE_BYTES))
+            totals["relationships"] += rows
+            for direction, label, degree in (("out", source_label, out_degree), ("in", target_label, in_degree)):
+                if degree >= SUPERNODE_DEGREE:
+                    supernodes.append({"label": label, "relationship_type": rel_type, "direction": direction,
+                                       "nodes": counts[label], "average_degree": degree})
+
+        for table in (labels, rel_types):
+            for entry in table.values():
+                entry["seconds"] = (entry["values"] / t.values_per_second + entry["cypher_bytes"] / 1e6 / t.write_mb_per_second
+                                    + entry["cypher_bytes"] / 1e6 / t.parse_mb_per_second + entry["items"] / t.db_rows_per_second)
+        return PlanEstimate(totals, labels, rel_types, supernodes, t)
+
+class PlanEstimate:
+    """Result of PlanEstimator.estimate; as_dict() is JSON-ready, format_report() gives text lines."""
+
+    def __init__(self, totals, labels, rel_types, supernodes, throughput):
+        self.nodes = int(totals["nodes"])
+        self.relationships = int(round(totals["relationships"]))
+        self.values = int(round(totals["values"]))
+        self.output_bytes = {
+            "cypher": int(totals["json"]),
+            "cypher_compact": int(totals["compact"]),
+            **{f"cypher.{'gz' if kind == 'gzip' else 'zst'}": int(totals["json"] * ratio) for kind, ratio in COMPRESSION_RATIOS.items()},
+            "csv": int(totals["csv"]),
+        }
+        self.peak_rss_bytes = int(BASE_RSS_BYTES + totals["memory"] + JSON_BUFFER_FACTOR * totals["largest_block"])
+        self.generation_seconds = totals["values"] / throughput.values_per_second
+        self.write_seconds = totals["json"] / 1e6 / throughput.write_mb_per_second
+        self.load_parse_seconds = totals["json"] / 1e6 / throughput.parse_mb_per_second
+        self.load_db_seconds = (totals["nodes"] + totals["relationships"]) / throughput.db_rows_per_second
+        total_seconds = self.generation_seconds + self.write_seconds + self.load_parse_seconds + self.load_db_seconds
+        self.labels = self._ranked(labels, total_seconds)
+        self.relationship_types = self._ranked(rel_types, total_seconds)
+        self.supernodes = sorted(supernodes, key=lambda s: s["average_degree"], reverse=True)
+        self.dominant = [entry["name"] for entry in self.labels + self.relationship_types if entry["share"] >= DOMINANT_SHARE]
+        self.throughput = throughput
+
+    @staticmethod
+    def _ranked(table, total_seconds):
+        entries = sorted(table.values(), key=lambda entry: entry["seconds"], reverse=True)
+        for entry in entries:
+            entry["share"] = entry["seconds"] / total_seconds if total_seconds > 0 else 0.0
+        return entries
+
+    @property
+    def load_seconds(self):
+        return self.load_parse_seconds + self.load_db_seconds
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes, "relationships": self.relationships, "values": self.values,
+            "output_bytes": self.output_bytes, "peak_rss_bytes": self.peak_rss_bytes,
+            "generation_seconds": self.generation_seconds, "write_seconds": self.write_seconds,
+            "load_parse_seconds": self.load_parse_seconds, "load_db_seconds": self.load_db_seconds, "load_seconds": self.load_seconds,
+            "labels": self.labels, "relationship_types": self.relationship_types,
+            "supernodes": self.supernodes, "dominant": self.dominant, "throughput": self.throughput.as_dict(),
+        }
+
+    def format_report(self, top=5):
+        lines = [
+            f"Nodes: {self.nodes:,}  Relationships: {self.relationships:,}  Values: {self.values:,}",
+            "Output: " + ", ".join(f"{fmt} {size / 1e6:,.1f} MB" for fmt, size in self.output_bytes.items()),
+            f"Peak memory: {self.peak_rss_bytes / 1e6:,.0f} MB",
+            f"Time: generate {self.generation_seconds:,.1f}s, write {self.write_seconds:,.1f}s, "
+            f"load {self.load_seconds:,.1f}s (parse {self.load_parse_seconds:,.1f}s + database {self.load_db_seconds:,.1f}s)",
+            f"Throughput from: {self.throughput.source}",
+        ]
+        for title, entries in (("Heaviest labels", self.labels), ("Heaviest relationship types", self.relationship_types)):
+            if entries:
+                lines.append(f"{title}: " + ", ".join(f"{e['name']} ({e['items']:,.0f}, {e['share']:.0%})" for e in entries[:top]))
+        for s in self.supernodes[:top]:
+            lines.append(f"Supernode: {s['label']} ({s['nodes']:,} nodes) averages {s['average_degree']:,.0f} "
+                         f"{'outgoing' if s['direction'] == 'out' else 'incoming'} :{s['relationship_type']} relationships")
+        if self.dominant:
+            lines.append(f"Dominates the runtime (>= {DOMINANT_SHARE:.0%} each): {', '.join(self.dominant)}")
+        return lines
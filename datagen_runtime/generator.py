@@ -0,0 +1,308 @@
+import time
+import logging
+import datetime
+
+from .config import node_id_properties
+from .backends import PythonBackend
+from .values import generate_sequential_id, check_property_rule
+from .diagnostics import Diagnostics, report_issue, UNSUPPORTED_ID_TYPE
+from .index_planner import plan_schema_indexes, build_index_statements
+from .metrics import (RunMetrics, PHASE_VALIDATION, PHASE_ID_GENERATION, PHASE_PROPERTY_GENERATION, PHASE_RELATIONSHIP_SAMPLING,
+                      PHASE_HOOKS, PHASE_INDEX_PLANNING, PHASE_WRITE)
+
+logger = logging.getLogger(__name__)
+
+class DatagenHooks:
+    """
+    Per-run customization points. A generated datagen script subclasses this instead of re-implementing
+    the generator; every hook defaults to the plain artifact-driven behaviour.
+      property_generators: {"Label.prop" or "REL_TYPE.prop": fn(props, rng) -> value}; replaces the
+                           rule-based value (props holds the values generated so far for the row).
+    """
+
+    property_generators = {}
+    diagnostics = None # The run's Diagnostics collector, set by generate_data
+
+    def node_id(self, label, id_property_name, id_property_type, counter):
+        return generate_sequential_id(label, id_property_name, id_property_type, counter, self.diagnostics)
+
+    def node_properties(self, label, props):
+        """Called once per node with its full property map; return the (possibly modified) map."""
+        return props
+
+    def relationship_properties(self, rel_type, props, source_id, target_id):
+        """Called once per relationship with its property map; return the (possibly modified) map."""
+        return props
+
+class GeneratedData:
+    """Generated rows grouped the way the sinks write them: node rows per label, relationship rows per (source, type, target)."""
+
+    def __init__(self, node_id_props):
+        self.node_id_props = node_id_props
+        self.nodes = {} # label -> [props]
+        self.node_ids = {} # label -> [id]
+        self.relationships = {} # (source_label, rel_type, target_label) -> [{"source_id", "target_id", "properties"}]
+        self.diagnostics = None # Diagnostics of the run (rule fallbacks per property)
+        self.metrics = None # RunMetrics of the run (phase timings, per label / relationship type rates)
+
+    @property
+    def node_count(self):
+        return sum(len(rows) for rows in self.nodes.values())
+
+    @property
+    def relationship_count(self):
+        return sum(len(rows) for rows in self.relationships.values())
+
+def _single_label(value, rel_type, side):
+    """Relationship endpoints are labels; some analyzer outputs give a list, of which the first is used."""
+    if isinstance(value, list):
+        if value:
+            logger.warning(f"Relationship type '{rel_type}' has a list for its {side} label: {value}. Using '{value[0]}'.")
+            return value[0]
+        return None
+    return value
+
+def _property_specs(owner_type, properties, skip=(), hooks=None, warn=True):
+    """
+    (name, type, qualified name) of the properties the backend generates; hook-generated ones are left
+    out. warn=False skips the warnings about malformed entries (already logged by the generation pass).
+    """
+    specs = []
+    overridden = hooks.property_generators if hooks else {}
+    for prop_detail_dict in properties:
+        if not isinstance(prop_detail_dict, dict):
+            if warn:
+                logger.warning(f"Skipping invalid property detail for '{owner_type}' (not a dict): {prop_detail_dict}")
+            continue
+        prop_name, prop_type = prop_detail_dict.get("name"), prop_detail_dict.get("type")
+        if prop_name in skip:
+            continue
+        if not prop_name or not prop_type:
+            if warn:
+                logger.warning(f"Property '{prop_name}' for '{owner_type}' has no name or type defined in schema. Skipping.")
+            continue
+        if f"{owner_type}.{prop_name}" in overridden:
+            continue
+        specs.append((prop_name, prop_type, f"{owner_type}.{prop_name}"))
+    return specs
+
+def _apply_property_generators(owner_type, props, hooks, rng):
+    for qualified_prop_name, generate in hooks.property_generators.items():
+        owner, _, prop_name = qualified_prop_name.rpartition(".")
+        if owner == owner_type:
+            value = generate(props, rng)
+            if value is not None:
+                props[prop_name] = value
+    return props
+
+def cardinality_bounds(cardinality_rules_data, source_label, rel_type, target_label, target_count):
+    """
+    (min, max) targets per source from the cardinality rules, clamped to the available targets, or
+    None when no rule applies (hybrid default). Per-relationship rules (cardinality_compiler.py)
+    take precedence over per-type rules, since the same type can connect different label pairs.
+    """
+    rule = cardinality_rules_data.get(f"{source_label}->{rel_type}->{target_label}") or cardinality_rules_data.get(rel_type)
+    if not rule or not isinstance(rule, dict):
+        return None
+    min_rels, max_rels = rule.get("min", 0), rule.get("max", 1)
+    if min_rels > max_rels:
+        logger.warning(f"Cardinality rule for '{rel_type}' has min ({min_rels}) > max ({max_rels}). Clamping max to min.")
+        max_rels = min_rels
+    max_rels = min(max_rels, target_count)
+    if min_rels > max_rels:
+        logger.warning(f"Cardinality rule for '{rel_type}' requires min ({min_rels}) > available targets ({target_count}). Setting min to {max_rels}.")
+        min_rels = max_rels
+    return min_rels, max_rels
+
+def validate_rules(config, node_id_props, hooks, diagnostics):
+    """
+    Rule validation pre-pass: flags every value list / rule problem of the planned labels and the
+    schema relationships once, before any row is generated. Returns the number of distinct issues.
+    """
+    found = Diagnostics()
+    schema_nodes = config.schema_nodes
+    for label in config.plan_data:
+        if label not in schema_nodes:
+            continue
+        id_prop_name, id_prop_type = node_id_props[label]["name"], node_id_props[label]["type"]
+        if id_prop_type not in ("String", "Integer") and type(hooks).node_id is DatagenHooks.node_id:
+            report_issue(found, f"{label}.{id_prop_name}", UNSUPPORTED_ID_TYPE, id_prop_type)
+        for prop_name, prop_type, qualified_prop_name in _property_specs(label, schema_nodes[label].get("properties", []),
+                                                                         skip={id_prop_name}, hooks=hooks, warn=False):
+            check_property_rule(label, prop_name, prop_type, qualified_prop_name, config.value_lists_data, config.generation_rules_data, found)
+    for rel_definition in config.relationship_definitions:
+        if isinstance(rel_definition, dict) and rel_definition.get("type"):
+            rel_type = rel_definition["type"]
+            for prop_name, prop_type, qualified_prop_name in _property_specs(rel_type, rel_definition.get("properties", []), hooks=hooks, warn=False):
+                check_property_rule(rel_type, prop_name, prop_type, qualified_prop_name, config.value_lists_data, config.generation_rules_data, found)
+    diagnostics.merge(found, scale=0)
+    if found:
+        logger.warning(f"Rule validation found {len(found)} issues; the affected values use fallbacks (summary at the end of the run).")
+    else:
+        logger.info("Rule validation found no issues.")
+    return len(found)
+
+def _drop_duplicate_pairs(existing_rows, rows, seen_pairs):
+    """Rows whose (source_id, target_id) is not in the group yet; seen_pairs is built from existing_rows on first use."""
+    if not seen_pairs:
+        seen_pairs.update((row["source_id"], row["target_id"]) for row in existing_rows)
+    unique_rows = []
+    for row in rows:
+        pair = (row["source_id"], row["target_id"])
+        if pair not in seen_pairs:
+            seen_pairs.add(pair)
+            unique_rows.append(row)
+    return unique_rows
+
+def generate_data(config, backend=None, hooks=None, use_value_groups=False, diagnostics=None, metrics=None, unique_relationships=False):
+    """
+    Generates every planned node and every schema relationship into a GeneratedData. Rule problems
+    are validated up front and counted into diagnostics (a new Diagnostics by default); each label
+    and relationship group is timed into metrics (a new RunMetrics by default). Both are available
+    on the result as data.diagnostics / data.metrics. unique_relationships guarantees at most one
+    row per (source, type, target) pair, which CREATE-mode loading relies on.
+    """
+    backend = backend or PythonBackend()
+    hooks = hooks or DatagenHooks()
+    schema_nodes = config.schema_nodes
+    data = GeneratedData(node_id_properties(schema_nodes))
+    data.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
+    data.metrics = metrics = metrics or RunMetrics()
+    backend.diagnostics = hooks.diagnostics = data.diagnostics
+    backend.metrics = metrics
+    with metrics.phase(PHASE_VALIDATION):
+        validate_rules(config, data.node_id_props, hooks, data.diagnostics)
+
+    logger.info("Starting node generation...")
+    for label, count in config.plan_data.items():
+        if label not in schema_nodes:
+            logger.warning(f"Skipping node generation for label '{label}': Not found in schema.")
+            continue
+        logger.info(f"Generating {count} nodes for label: {label}")
+        id_prop_name, id_prop_type = data.node_id_props[label]["name"], data.node_id_props[label]["type"]
+        specs = _property_specs(label, schema_nodes[label].get("properties", []), skip={id_prop_name}, hooks=hooks)
+        started = time.perf_counter()
+        ids = [hooks.node_id(label, id_prop_name, id_prop_type, counter) for counter in range(1, count + 1)]
+        ids_done = time.perf_counter()
+        rows = backend.node_properties(label, count, specs, config.value_lists_data, config.generation_rules_data, use_value_groups)
+        properties_done = time.perf_counter()
+        nodes = []
+        for node_id, props in zip(ids, rows):
+            props = {id_prop_name: node_id, **props}
+            if hooks.property_generators:
+                props = _apply_property_generators(label, props, hooks, backend.rng)
+            nodes.append(hooks.node_properties(label, props))
+        data.nodes[label] = nodes
+        data.node_ids[label] = ids
+        finished = time.perf_counter()
+        metrics.add_time(PHASE_ID_GENERATION, ids_done - started)
+        metrics.add_time(PHASE_PROPERTY_GENERATION, properties_done - ids_done)
+        metrics.add_time(PHASE_HOOKS, finished - properties_done)
+        metrics.record_owner("labels", label, count, generate_seconds=finished - started)
+    logger.info("Node generation complete.")
+
+    logger.info("Starting relationship generation...")
+    seen_pairs = {} # (source_label, rel_type, target_label) -> {(source_id, target_id)}, only for groups fed by several definitions
+    if not config.relationship_definitions:
+        logger.warning("No relationship definitions found in schema. Skipping relationship generation.")
+    for rel_definition in config.relationship_definitions:
+        if not isinstance(rel_definition, dict):
+            logger.warning(f"Skipping invalid relationship definition (not a dict): {rel_definition}")
+            continue
+        rel_type = rel_definition.get("type")
+        source_label = _single_label(rel_definition.get("source"), rel_type, "source")
+        target_label = _single_label(rel_definition.get("target"), rel_type, "target")
+        if not all([rel_type, source_label, target_label]):
+            logger.warning(f"Skipping relationship definition due to missing 'type', 'source', or 'target': {rel_definition}")
+            continue
+        source_ids, target_ids = data.node_ids.get(source_label, []), data.node_ids.get(target_label, [])
+        if not source_ids or not target_ids:
+            logger.warning(f"Skipping relationship type '{rel_type}': No generated nodes found for source '{source_label}' "
+                           f"({len(source_ids)}) or target '{target_label}' ({len(target_ids)}).")
+            continue
+
+        cardinality = cardinality_bounds(config.cardinality_rules_data, source_label, rel_type, target_label, len(target_ids))
+        if cardinality == (0, 0):
+            logger.info(f"Cardinality rule for '{rel_type}' specifies 0 relationships. Skipping.")
+            continue
+        logger.info(f"Generating relationships of type: ({source_label})-[:{rel_type}]->({target_label}) "
+                    f"({f'min={cardinality[0]}, max={cardinality[1]} per source' if cardinality else 'hybrid default cardinality'})")
+        specs = _property_specs(rel_type, rel_definition.get("properties", []), hooks=hooks)
+        started, property_seconds = time.perf_counter(), metrics.phases.get(PHASE_PROPERTY_GENERATION, 0.0)
+        rows = backend.relationships(rel_type, specs, source_ids, target_ids, cardinality, config.value_lists_data, config.generation_rules_data)
+        sampling_done = time.perf_counter()
+        for row in rows:
+            if hooks.property_generators:
+                _apply_property_generators(rel_type, row["properties"], hooks, backend.rng)
+            row["properties"] = hooks.relationship_properties(rel_type, row["properties"], row["source_id"], row["target_id"])
+        finished = time.perf_counter()
+        # The backend books its property generation itself; the rest of relationships() is pairing
+        property_seconds = metrics.phases.get(PHASE_PROPERTY_GENERATION, 0.0) - property_seconds
+        metrics.add_time(PHASE_RELATIONSHIP_SAMPLING, sampling_done - started - property_seconds)
+        metrics.add_time(PHASE_HOOKS, finished - sampling_done)
+        metrics.record_owner("relationship_types", rel_type, len(rows), generate_seconds=finished - started)
+        # Definitions with the same (source, type, target) share one block. Each backend call samples
+        # targets without replacement per source (hybrid: a one-to-one pairing), so a block fed by a
+        # single definition is unique by construction; only later definitions are checked against a pair set
+        group_key = (source_label, rel_type, target_label)
+        if unique_relationships and data.relationships.get(group_key):
+            generated = len(rows)
+            rows = _drop_duplicate_pairs(data.relationships[group_key], rows, seen_pairs.setdefault(group_key, set()))
+            if len(rows) < generated:
+                logger.info(f"Dropped {generated - len(rows)} '{rel_type}' relationships that repeat a ({source_label}, {target_label}) pair.")
+        data.relationships.setdefault(group_key, []).extend(rows)
+        logger.info(f"Generated {len(rows)} relationships of type '{rel_type}'.")
+    logger.info("Relationship generation complete.")
+    return data
+
+def run_summary(config, data):
+    """What the output header / manifest records about a run."""
+    return {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "schema": config.filenames["schema_analysis_filename"],
+        "plan": config.filenames["generation_plan_filename"],
+        "cardinality_rules": config.filenames.get("cardinality_rules_filename"),
+        "generation_rules": config.filenames["generation_rules_filename"],
+        "date_consistency_enforced": config.enforce_date_consistency,
+        "nodes_planned": sum(config.plan_data.values()),
+        "nodes_generated": data.node_count,
+        "relationships_generated": data.relationship_count,
+    }
+
+def index_statements(config, questions_path=None):
+    """Constraints/indexes planned from the schema (and the query examples, when given)."""
+    return build_index_statements(plan_schema_indexes(config.schema_data, questions_path))
+
+def write_data(config, data, sink, questions_path=None, metrics=None):
+    """
+    Writes the header, the constraints/indexes and every node and relationship block to the sink;
+    the time per block goes into metrics (default: data.metrics, when the data has one).
+    """
+    metrics = metrics or data.metrics or RunMetrics()
+    with metrics.phase(PHASE_WRITE):
+        sink.open(run_summary(config, data))
+    try:
+        with metrics.phase(PHASE_INDEX_PLANNING):
+            statements = index_statements(config, questions_path)
+        with metrics.phase(PHASE_WRITE):
+            sink.write_indexes(statements)
+        logger.info("Writing node blocks...")
+        for label, rows in data.nodes.items():
+            if rows:
+                started = time.perf_counter()
+                sink.write_nodes(label, data.node_id_props[label]["name"], rows)
+                seconds = time.perf_counter() - started
+                metrics.add_time(PHASE_WRITE, seconds)
+                metrics.record_owner("labels", label, write_seconds=seconds)
+        logger.info("Writing relationship blocks...")
+        for (source_label, rel_type, target_label), rows in data.relationships.items():
+            if rows:
+                started = time.perf_counter()
+                sink.write_relationships(source_label, rel_type, target_label, data.node_id_props[source_label]["name"],
+                                         data.node_id_props[target_label]["name"], rows)
+                seconds = time.perf_counter() - started
+                metrics.add_time(PHASE_WRITE, seconds)
+                metrics.record_owner("relationship_types", rel_type, write_seconds=seconds)
+    finally:
+        with metrics.phase(PHASE_WRITE):
+            sink.close()
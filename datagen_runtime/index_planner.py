@@ -0,0 +1,169 @@
+import re
+import json
+import logging
+from collections import Counter
+
+from .serialization import quote_identifier
+
+# --- Configuration ---
+MIN_FILTER_REFERENCES = 1 # A property filtered on in at least this many query examples gets a range index
+AWAIT_INDEXES_TIMEOUT_SECONDS = 600
+AWAIT_INDEXES_STATEMENT = f"CALL db.awaitIndexes({AWAIT_INDEXES_TIMEOUT_SECONDS})"
+
+logger = logging.getLogger(__name__)
+
+# Patterns for query examples: (var:Label {prop: ...}) and var.prop inside WHERE clauses
+NODE_PATTERN_RE = re.compile(r"\(\s*(\w*)\s*:\s*(`[^`]+`|\w+)\s*(\{[^}]*\})?")
+MAP_KEY_RE = re.compile(r"(\w+)\s*:")
+WHERE_CLAUSE_RE = re.compile(r"\bWHERE\b(.*?)(?=\bRETURN\b|\bWITH\b|\bMATCH\b|\bORDER\s+BY\b|$)", re.IGNORECASE | re.DOTALL)
+PROPERTY_ACCESS_RE = re.compile(r"\b(\w+)\.(\w+)\b")
+
+# --- Helper Functions ---
+
+def _schema_object_name(prefix, label, prop):
+    """Builds a deterministic constraint/index name from label and property."""
+    return re.sub(r"\W+", "_", f"{prefix}_{label}_{prop}")
+
+def _property_names(node_details):
+    """Returns the property names of a schema node (list-of-dicts or dict property formats)."""
+    props_structure = node_details.get("properties", [])
+    if isinstance(props_structure, list):
+        return [p.get("name") for p in props_structure if isinstance(p, dict) and p.get("name")]
+    if isinstance(props_structure, dict):
+        return list(props_structure.keys())
+    return []
+
+def load_schema(file_path):
+    """Loads the schema analysis JSON file. Returns None on error."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.error(f"Schema file not found: {file_path}")
+    except json.JSONDecodeError as e:
+        logger.error(f"Error decoding JSON from schema file: {file_path} - {e}")
+    return None
+
+def extract_query_filters(questions_path):
+    """
+    Counts (label, property) pairs used as filters in the query examples of questions.txt:
+    inline property maps on labelled node patterns and var.prop references inside WHERE clauses.
+    Property names are returned as written; callers resolve them against the schema.
+    """
+    filters = Counter()
+    try:
+        with open(questions_path, 'r', encoding='utf-8') as f:
+            next(f, None) # Skip header
+            for line in f:
+                parts = line.rstrip("\n").split("|", 2)
+                if len(parts) < 3:
+                    continue
+                query = parts[2]
+                var_labels = {}
+                for var, label, prop_map in NODE_PATTERN_RE.findall(query):
+                    label = label.strip("`")
+                    if var:
+                        var_labels[var] = label
+                    for prop in MAP_KEY_RE.findall(prop_map or ""):
+                        filters[(label, prop)] += 1
+                for where_clause in WHERE_CLAUSE_RE.findall(query):
+                    for var, prop in PROPERTY_ACCESS_RE.findall(where_clause):
+                        if var in var_labels:
+                            filters[(var_labels[var], prop)] += 1
+    except FileNotFoundError:
+        logger.warning(f"Questions file not found: {questions_path}. Skipping query-derived indexes.")
+    return filters
+
+# --- Planner ---
+
+def plan_schema_indexes(schema, questions_path=None):
+    """
+    Plans uniqueness constraints and range indexes for a schema analysis dict.
+    Returns a list of entries {"kind": "constraint"|"index", "label", "property", "reason"}:
+      - a uniqueness constraint on every label's id_property (backs every MERGE/MATCH on the ID),
+      - range indexes on foreign-key-like properties, i.e. properties named after the ID of a
+        label they are related to through a relationship definition,
+      - range indexes on properties filtered on in the questions.txt query examples.
+    """
+    schema_nodes = schema.get("nodes", {}) if isinstance(schema, dict) else {}
+    schema_relationships = schema.get("relationships", []) if isinstance(schema, dict) else []
+    plan = []
+    planned = set()
+
+    # Case-insensitive property lookup per label (query examples use customerId for customerID)
+    label_props = {label: {name.lower(): name for name in _property_names(details)}
+                   for label, details in schema_nodes.items() if isinstance(details, dict)}
+    id_props = {label: details.get("id_property") for label, details in schema_nodes.items()
+                if isinstance(details, dict) and details.get("id_property")}
+
+    def add(kind, label, prop, reason):
+        key = (label, prop)
+        if key in planned:
+            return
+        planned.add(key)
+        plan.append({"kind": kind, "label": label, "property": prop, "reason": reason})
+
+    for label in sorted(id_props):
+        add("constraint", label, id_props[label], "id_property")
+
+    # Foreign-key-like properties along relationship definitions
+    for rel in schema_relationships if isinstance(schema_relationships, list) else []:
+        if not isinstance(rel, dict):
+            continue
+        source, target = rel.get("source"), rel.get("target")
+        for holder, referenced in ((source, target), (target, source)):
+            referenced_id = id_props.get(referenced)
+            if holder in label_props and referenced_id and holder != referenced:
+                prop = label_props[holder].get(referenced_id.lower())
+                if prop:
+                    add("index", holder, prop, f"foreign key to {referenced} via {rel.get('type')}")
+
+    # Frequent filters from query examples
+    if questions_path:
+        for (label, prop), references in sorted(extract_query_filters(questions_path).items()):
+            resolved = label_props.get(label, {}).get(prop.lower())
+            if resolved and references >= MIN_FILTER_REFERENCES:
+                add("index", label, resolved, f"filtered in {references} query example(s)")
+
+    logger.info(f"Planned {sum(1 for p in plan if p['kind'] == 'constraint')} constraints and "
+                f"{sum(1 for p in plan if p['kind'] == 'index')} range indexes.")
+    return plan
+
+def build_index_statements(plan, include_await=True):
+    """Renders a plan as Cypher statements (without trailing semicolons)."""
+    statements = []
+    for entry in plan:
+        label = quote_identifier(entry["label"])
+        prop = quote_identifier(entry["property"])
+        if entry["kind"] == "constraint":
+            name = _schema_object_name("uniq", entry["label"], entry["property"])
+            statements.append(f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE")
+        else:
+            name = _schema_object_name("idx", entry["label"], entry["property"])
+            statements.append(f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})")
+    if include_await and statements:
+        statements.append(AWAIT_INDEXES_STATEMENT)
+    return statements
+
+def apply_index_plan(driver, database, statements):
+    """
+    Runs the constraint/index statements (each in its own auto-commit transaction, as schema
+    changes require) and blocks until every index is ONLINE. Returns True on success.
+    """
+    try:
+        with driver.session(database=database) as session:
+            for statement in statements:
+                if statement == AWAIT_INDEXES_STATEMENT:
+                    continue
+                session.run(statement).consume()
+            logger.info(f"Applied {len(statements)} schema statements. Waiting for indexes to come online...")
+            session.run(AWAIT_INDEXES_STATEMENT).consume()
+            not_online = session.run("SHOW INDEXES YIELD name, state WHERE state <> 'ONLINE' RETURN name, state").data()
+    except Exception as e:
+        logger.error(f"Failed to apply index plan: {e}")
+        return False
+    if not_online:
+        logger.error(f"Indexes not ONLINE after waiting: {not_online}")
+        return False
+    logger.info("All indexes are ONLINE.")
+    return True
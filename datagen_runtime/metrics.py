@@ -0,0 +1,167 @@
+import io
+import sys
+import json
+import time
+import pstats
+import logging
+import cProfile
+import datetime
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    resource = None # Not available on Windows; peak RSS is then reported as null
+
+# --- Configuration ---
+METRICS_FILENAME = "run_metrics.json"
+PROFILE_FILENAME = "run_profile.prof"
+PROFILE_SCOPES = ("generate", "write", "run") # What --profile wraps in cProfile ('run' = both)
+PROFILE_TOP_FUNCTIONS = 25 # Functions (by cumulative time) logged and kept in the metrics file
+TOP_OWNERS_LOGGED = 5 # Slowest labels / relationship types / loaded blocks named in the end-of-run log
+
+logger = logging.getLogger(__name__)
+
+# Phases of a datagen run. The generator times each label / relationship group and splits the time
+# into these buckets; per-row work is never timed individually except the python backend's
+# relationship properties, which are generated inside the sampling loop.
+PHASE_LOAD_CONFIG = "load_config"
+PHASE_VALIDATION = "rule_validation"
+PHASE_ID_GENERATION = "id_generation"
+PHASE_PROPERTY_GENERATION = "property_generation"
+PHASE_RELATIONSHIP_SAMPLING = "relationship_sampling"
+PHASE_HOOKS = "hooks"
+PHASE_INDEX_PLANNING = "index_planning"
+PHASE_WRITE = "serialization_write"
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None where the resource module is missing."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024 # Kilobytes everywhere but macOS
+
+class RunMetrics:
+    """
+    Timings of one run: seconds per phase, items and seconds per node label and relationship type
+    (generation and writing), peak RSS, output bytes and, for load_cypher.py, one entry per executed
+    block. as_dict() / write() give the machine-readable run_metrics.json. With profile_scope set,
+    the blocks run under profiled(scope) are also recorded by cProfile and saved to profile_path.
+    """
+
+    def __init__(self, profile_scope=None, profile_path=None):
+        if profile_scope is not None and profile_scope not in PROFILE_SCOPES:
+            raise ValueError(f"Unknown profile scope '{profile_scope}'. Choose one of: {', '.join(PROFILE_SCOPES)}.")
+        self.started = time.perf_counter()
+        self.phases = {} # phase -> seconds, in first-seen order
+        self.owners = {"labels": {}, "relationship_types": {}} # kind -> name -> {"items", "generate_seconds", "write_seconds", "peak_rss_bytes"}
+        self.blocks = [] # load_cypher.py: one entry per executed block
+        self.output_bytes = None
+        self.profile_scope = profile_scope
+        self.profile_path = profile_path
+        self.profiler = cProfile.Profile() if profile_scope else None
+        self.profile_top = None
+
+    def add_time(self, phase_name, seconds):
+        self.phases[phase_name] = self.phases.get(phase_name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def phase(self, phase_name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase_name, time.perf_counter() - started)
+
+    def record_owner(self, kind, name, items=0, generate_seconds=0.0, write_seconds=0.0):
+        """Adds items and seconds to a label ('labels') or relationship type ('relationship_types'); samples peak RSS."""
+        stats = self.owners[kind].setdefault(name, {"items": 0, "generate_seconds": 0.0, "write_seconds": 0.0, "peak_rss_bytes": None})
+        stats["items"] += items
+        stats["generate_seconds"] += generate_seconds
+        stats["write_seconds"] += write_seconds
+        stats["peak_rss_bytes"] = peak_rss_bytes()
+
+    def record_block(self, name, rows, parse_seconds, execute_seconds):
+        self.blocks.append({"block": len(self.blocks) + 1, "name": name, "rows": rows,
+                            "parse_seconds": parse_seconds, "execute_seconds": execute_seconds})
+
+    # --- Profiling ---
+
+    @contextlib.contextmanager
+    def profiled(self, scope):
+        """Runs the block under cProfile when --profile asked for this scope (or for the whole run)."""
+        if self.profiler is None or self.profile_scope not in (scope, "run"):
+            yield
+            return
+        self.profiler.enable()
+        try:
+            yield
+        finally:
+            self.profiler.disable()
+
+    def finish_profile(self):
+        """Saves the profile (pstats format, e.g. for snakeviz) and keeps its top functions for the report."""
+        if self.profiler is None:
+            return
+        stats = pstats.Stats(self.profiler)
+        if self.profile_path:
+            stats.dump_stats(self.profile_path)
+        ranked = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+        self.profile_top = [{"function": f"{filename}:{line}({function})", "calls": calls, "own_seconds": own, "cumulative_seconds": cumulative}
+                            for (filename, line, function), (_, calls, own, cumulative, _) in ranked]
+        listing = io.StringIO()
+        pstats.Stats(self.profiler, stream=listing).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        logger.info(f"cProfile ({self.profile_scope}), top {PROFILE_TOP_FUNCTIONS} by cumulative time:\n{listing.getvalue()}")
+
+    # --- Report ---
+
+    def _owner_report(self, kind):
+        report = []
+        for name, stats in self.owners[kind].items():
+            seconds = stats["generate_seconds"] + stats["write_seconds"]
+            report.append({"name": name, **stats, "total_seconds": seconds,
+                           "per_second": stats["items"] / seconds if seconds > 0 else None})
+        return sorted(report, key=lambda entry: entry["total_seconds"], reverse=True) # The labels that dominate the run come first
+
+    def as_dict(self, **extra):
+        """The run_metrics.json document; extra keys (backend, sink, totals, ...) are added at the top level."""
+        total = time.perf_counter() - self.started
+        report = {
+            "generated_at": datetime.datetime.now().isoformat(),
+            **extra,
+            "total_seconds": total,
+            "phases": {name: {"seconds": seconds, "share": seconds / total if total > 0 else None} for name, seconds in self.phases.items()},
+            "peak_rss_bytes": peak_rss_bytes(),
+            "output_bytes": self.output_bytes,
+            "labels": self._owner_report("labels"),
+            "relationship_types": self._owner_report("relationship_types"),
+        }
+        if self.blocks:
+            report["blocks"] = self.blocks
+        if self.profile_top is not None:
+            report["profile"] = {"scope": self.profile_scope, "file": self.profile_path, "top_functions": self.profile_top}
+        return report
+
+    def write(self, path, **extra):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(**extra), f, indent=2)
+        logger.info(f"Run metrics written to {path}")
+
+    def log_summary(self, summary_logger=None):
+        summary_logger = summary_logger or logger
+        total = time.perf_counter() - self.started
+        rss = peak_rss_bytes()
+        summary_logger.info(f"Run metrics: {total:.2f}s total" + (f", peak RSS {rss / 1e6:.1f} MB" if rss else "") +
+                            (f", {self.output_bytes / 1e6:.2f} MB written" if self.output_bytes is not None else ""))
+        for name, seconds in self.phases.items():
+            summary_logger.info(f"  {name:<22} {seconds:>8.3f}s")
+        for kind in ("labels", "relationship_types"):
+            slowest = self._owner_report(kind)[:TOP_OWNERS_LOGGED]
+            if slowest:
+                summary_logger.info(f"  Slowest {kind.replace('_', ' ')}: " + ", ".join(
+                    f"{entry['name']} ({entry['items']} in {entry['total_seconds']:.3f}s)" for entry in slowest))
+        if self.blocks:
+            slowest = sorted(self.blocks, key=lambda block: block["parse_seconds"] + block["execute_seconds"], reverse=True)[:TOP_OWNERS_LOGGED]
+            summary_logger.info("  Slowest blocks: " + ", ".join(
+                f"#{block['block']} {block['name']} ({block['rows']} rows; parse {block['parse_seconds']:.3f}s, "
+                f"execute {block['execute_seconds']:.3f}s)" for block in slowest))
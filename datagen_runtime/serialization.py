@@ -0,0 +1,147 @@
+import re
+import json
+import operator
+import itertools
+import logging
+import datetime
+from decimal import Decimal # For precise number handling if needed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None # Only the compact :param format uses it
+
+logger = logging.getLogger(__name__)
+
+# Serialization of generated values. The generators produce one Python type per (label, property),
+# so formatters are looked up by type (and cached for subclasses) instead of walking an isinstance
+# chain per value.
+#   - :param payloads (ParamEncoder): the C json encoder writes the whole block with a default picked
+#     per label / relationship type. The result is byte-identical to
+#     json.dumps(rows, default=custom_json_serializer).
+#   - compact payloads: orjson (native date/datetime) when installed; valid JSON for cypher-shell
+#     and load_cypher.py, but no spaces after separators and non-ASCII text is not \u-escaped.
+
+JSON_NATIVE_TYPES = (str, int, float, bool, type(None))
+PARAM_FORMATS = ("compat", "compact")
+PLAN_SAMPLE_ROWS = 100 # Rows of an owner's first block inspected to pick its json default
+
+# --- Cypher Literals ---
+
+def quote_identifier(name):
+    """Backtick-quotes a label, relationship type or property name when it is not a plain identifier."""
+    if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name):
+        return name
+    return "`" + name.replace("`", "``") + "`"
+
+def escape_cypher_string(value):
+    """Escapes single quotes and backslashes for Cypher strings."""
+    if value is None:
+        return ""
+    if "'" not in value and "\\" not in value:
+        return value # Most generated values need no escaping
+    # Replace backslashes first, then single quotes
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
+def _cypher_list(value):
+    return "[" + ", ".join(format_cypher_value(item) for item in value) + "]"
+
+CYPHER_FORMATTERS = {
+    type(None): lambda value: "null",
+    bool: lambda value: "true" if value else "false",
+    int: str,
+    float: str,
+    Decimal: lambda value: str(float(value)), # Neo4j doesn't have a native Decimal type; store as float (potential precision loss)
+    str: lambda value: f"'{escape_cypher_string(value)}'",
+    datetime.datetime: lambda value: f"datetime('{value.isoformat()}')",
+    datetime.date: lambda value: f"date('{value.isoformat()}')",
+    list: _cypher_list,
+}
+
+def _cypher_formatter(value_type):
+    """Formatter for a type; subclasses (e.g. numpy.float64, pandas.Timestamp) are resolved once and cached."""
+    formatter = CYPHER_FORMATTERS.get(value_type)
+    if formatter is None:
+        for base_type, base_formatter in CYPHER_FORMATTERS.items():
+            if base_type is not type(None) and issubclass(value_type, base_type):
+                formatter = base_formatter
+                break
+        else:
+            def formatter(value):
+                logger.warning(f"Unsupported type for Cypher formatting: {type(value)}. Returning null.")
+                return "null"
+        CYPHER_FORMATTERS[value_type] = formatter
+    return formatter
+
+def format_cypher_value(value):
+    """Formats a Python value into a Cypher-compatible string representation."""
+    return _cypher_formatter(type(value))(value)
+
+def format_cypher_properties(props_dict):
+    """Formats a dictionary of properties into a Cypher map string."""
+    if not props_dict:
+        return "{}"
+    return "{ " + ", ".join(f"{key}: {_cypher_formatter(type(value))(value)}" for key, value in props_dict.items()) + " }"
+
+# --- JSON Parameters ---
+
+def custom_json_serializer(obj):
+    """Custom JSON serializer for datetime and Decimal objects."""
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    elif isinstance(obj, Decimal):
+        return str(obj) # Store Decimal as string to preserve precision for parameters
+    raise TypeError(f"Type {type(obj)} not serializable for JSON parameters")
+
+_isoformat = operator.methodcaller("isoformat") # C-level call, no Python frame per value
+
+def _json_default(value_types):
+    """json default for a block whose non-native values have these types."""
+    if value_types and value_types <= {datetime.date, datetime.datetime}:
+        return _isoformat
+    return custom_json_serializer
+
+class ParamEncoder:
+    """
+    Encodes node and relationship rows for a :param line. The non-native value types of each label /
+    relationship type are sampled from its first block and pick the json default: most owners only
+    have dates and datetimes, which are then converted by a C-level isoformat call instead of the
+    isinstance chain of custom_json_serializer. A block that turns out to hold another type (e.g. a
+    Decimal) is re-encoded with custom_json_serializer, so the output never depends on the sample.
+    """
+
+    def __init__(self, param_format="compat"):
+        if param_format not in PARAM_FORMATS:
+            raise ValueError(f"Unknown :param format '{param_format}'. Choose one of: {', '.join(PARAM_FORMATS)}.")
+        if param_format == "compact" and orjson is None:
+            logger.info("orjson is not installed; compact :param payloads use the standard json encoder.")
+        self.param_format = param_format
+        self._defaults = {} # owner -> json default
+
+    def _default(self, owner, rows):
+        if owner not in self._defaults:
+            value_types = {type(value) for row in itertools.islice(rows, PLAN_SAMPLE_ROWS) for value in row.values()
+                           if type(value) not in JSON_NATIVE_TYPES and type(value) is not list} # json walks lists itself
+            self._defaults[owner] = _json_default(value_types)
+        return self._defaults[owner]
+
+    def _dumps(self, owner, rows, sample_rows):
+        if self.param_format == "compact":
+            if orjson is not None:
+                return orjson.dumps(rows, default=custom_json_serializer).decode("utf-8") # Dates and datetimes are native
+            return json.dumps(rows, default=custom_json_serializer, separators=(",", ":"), ensure_ascii=False)
+        default = self._default(owner, sample_rows)
+        try:
+            # Rows are freshly generated dicts and lists, so the circular reference check is skipped
+            return json.dumps(rows, default=default, check_circular=False) # No indent for :param
+        except AttributeError:
+            if default is custom_json_serializer:
+                raise
+            self._defaults[owner] = custom_json_serializer
+            return json.dumps(rows, default=custom_json_serializer, check_circular=False)
+
+    def encode_nodes(self, label, rows):
+        return self._dumps(("nodes", label), rows, rows)
+
+    def encode_relationships(self, rel_type, rows):
+        return self._dumps(("relationships", rel_type), rows, (row["properties"] for row in rows))
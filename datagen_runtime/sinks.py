@@ -0,0 +1,299 @@
+import os
+import re
+import csv
+import json
+import logging
+import datetime
+
+from .serialization import ParamEncoder, custom_json_serializer, quote_identifier
+from .compression import open_text, compression_for
+
+# --- Configuration ---
+DEFAULT_BOLT_BATCH_SIZE = 10000 # Rows per write transaction when loading straight into Neo4j
+CSV_LIST_SEPARATOR = ";" # Neo4j admin import's default array delimiter
+CSV_INDEXES_FILENAME = "constraints_indexes.cypher"
+CSV_MANIFEST_FILENAME = "manifest.json"
+CYPHER_MANIFEST_SUFFIX = ".manifest.json" # Next to the script: generated_data.cypher.manifest.json
+CYPHER_WRITE_BUFFER_SIZE = 1 << 20 # Bytes buffered before the Cypher script hits the disk
+RELATIONSHIP_MERGE = "merge" # MERGE + SET: reruns against a loaded database stay idempotent
+RELATIONSHIP_CREATE = "create" # CREATE with the properties inlined: fresh loads of generator-deduplicated rows
+RELATIONSHIP_MODES = (RELATIONSHIP_MERGE, RELATIONSHIP_CREATE)
+
+logger = logging.getLogger(__name__)
+
+# --- Cypher Formatting ---
+
+def write_cypher(file_handle, statement):
+    """Writes a Cypher statement to the file handle, followed by a semicolon and newline."""
+    file_handle.write(statement + ";\n")
+
+def block_param_name(prefix, *names):
+    """:param name of a block; schema names may contain spaces, which load_cypher.py's param parsing rejects."""
+    return re.sub(r"[^A-Za-z0-9_]+", "_", "_".join((prefix, *names)))
+
+def node_block_statements(label, id_prop_name, param_name):
+    """UNWIND/MERGE/SET clauses that upsert a batch of nodes keyed by their ID property."""
+    id_key = quote_identifier(id_prop_name)
+    return [
+        f"UNWIND ${param_name} AS node_props",
+        f"MERGE (n:{quote_identifier(label)} {{ {id_key}: node_props.{id_key} }})", # MERGE on the ID keeps reruns idempotent
+        "SET n += node_props",
+    ]
+
+def relationship_block_statements(source_label, rel_type, target_label, src_id_prop, tgt_id_prop, param_name,
+                                  mode=RELATIONSHIP_MERGE, property_keys=()):
+    """
+    UNWIND/MATCH clauses that link a batch of (source_id, target_id, properties) rows, then MERGE/SET
+    or, in create mode, a CREATE that sets property_keys as part of the new relationship. CREATE skips
+    the check of the existing relationships between each pair, so it needs rows that are unique per
+    pair (generate_data(unique_relationships=True)) and a database without them.
+    """
+    statements = [
+        f"UNWIND ${param_name} AS rel_data",
+        f"MATCH (a:{quote_identifier(source_label)} {{ {quote_identifier(src_id_prop)}: rel_data.source_id }})",
+        f"MATCH (b:{quote_identifier(target_label)} {{ {quote_identifier(tgt_id_prop)}: rel_data.target_id }})",
+    ]
+    if mode == RELATIONSHIP_CREATE:
+        keys = [quote_identifier(key) for key in property_keys]
+        properties = ", ".join(f"{key}: rel_data.properties.{key}" for key in keys) # Null values are not stored
+        return statements + [f"CREATE (a)-[r:{quote_identifier(rel_type)}{f' {{ {properties} }}' if properties else ''}]->(b)"]
+    return statements + [f"MERGE (a)-[r:{quote_identifier(rel_type)}]->(b)", "SET r = rel_data.properties"]
+
+def relationship_property_keys(rows):
+    """Property names used by any row of a relationship block, in first-seen order (create mode inlines them)."""
+    return list(dict.fromkeys(key for row in rows for key in row["properties"]))
+
+def check_relationship_mode(mode):
+    if mode not in RELATIONSHIP_MODES:
+        raise ValueError(f"Unknown relationship mode '{mode}'. Choose one of: {', '.join(RELATIONSHIP_MODES)}.")
+    return mode
+
+def cypher_manifest_path(script_path):
+    """Where CypherFileSink writes the manifest of a script (rows per label / relationship block)."""
+    return f"{script_path}{CYPHER_MANIFEST_SUFFIX}"
+
+# --- Sinks ---
+
+class DatagenSink:
+    """
+    Where a run's output goes. The runtime calls open(summary), write_indexes(statements), then
+    write_nodes/write_relationships once per label / (source, type, target) group, then close().
+    """
+
+    def open(self, summary):
+        pass
+
+    def write_indexes(self, statements):
+        pass
+
+    def write_nodes(self, label, id_prop_name, rows):
+        raise NotImplementedError
+
+    def write_relationships(self, source_label, rel_type, target_label, src_id_prop, tgt_id_prop, rows):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def describe(self):
+        return type(self).__name__
+
+    def output_bytes(self):
+        """Bytes the sink wrote to disk (after close), or None when it does not write files."""
+        return None
+
+class CypherFileSink(DatagenSink):
+    """
+    A cypher-shell script with the data inlined as :param blocks (the format load_cypher.py replays).
+    Each block is written with one writelines call through a large buffer. param_format 'compact'
+    writes the payloads with orjson (when installed) instead of the byte-compatible default. A path
+    ending in .gz or .zst writes a gzip / zstd compressed script (see compression.py). The rows
+    per block go to a manifest next to the script (cypher_manifest_path), which verify_load.py
+    compares the loaded graph against.
+    """
+
+    def __init__(self, path, param_format="compat", relationship_mode=RELATIONSHIP_MERGE):
+        self.path = path
+        self.encoder = ParamEncoder(param_format)
+        self.relationship_mode = check_relationship_mode(relationship_mode)
+        self.f = None
+        self.manifest = None
+
+    def open(self, summary):
+        self.f = open_text(self.path, 'w', buffering=CYPHER_WRITE_BUFFER_SIZE)
+        self.manifest = {"summary": summary, "script": os.path.basename(self.path), "relationship_mode": self.relationship_mode,
+                         "nodes": {}, "relationships": []}
+        header = [
+            f"// Generated by generate_neo4j_data.py on {summary['generated_at']}",
+            f"// Schema: {summary['schema']}",
+            f"// Plan: {summary['plan']}",
+        ]
+        if summary.get("cardinality_rules"):
+            header.append(f"// Cardinality Rules: {summary['cardinality_rules']}")
+        header += [
+            f"// Generation Rules: {summary['generation_rules']}",
+            f"// Date Consistency Enforced: {summary['date_consistency_enforced']}",
+            f"// Total Nodes Planned: {summary['nodes_planned']}",
+            f"// Total Nodes Generated: {summary['nodes_generated']}",
+            f"// Total Relationships Generated: {summary['relationships_generated']}",
+            "",
+        ]
+        self.f.writelines(f"{line};\n" for line in header)
+
+    def write_indexes(self, statements):
+        # Constraints/indexes are applied before any data so every MERGE/MATCH on an ID is an index seek
+        lines = ["// --- Constraints and Indexes (applied before loading data) ---", *statements, ""]
+        self.f.writelines(f"{line};\n" for line in lines)
+
+    def _write_block(self, comment, param_name, json_data_string, statements):
+        self.f.writelines([
+            f"{comment};\n",
+            f":param {param_name} => {json_data_string};\n",
+            *(f"{statement};\n" for statement in statements),
+            ";\n", # Blank line separator
+        ])
+
+    def write_nodes(self, label, id_prop_name, rows):
+        param_name = block_param_name("nodes", label)
+        self._write_block(f"// --- Creating nodes for Label: {label} ---", param_name, self.encoder.encode_nodes(label, rows),
+                          node_block_statements(label, id_prop_name, param_name))
+        self.manifest["nodes"][label] = {"param": param_name, "id_property": id_prop_name, "rows": len(rows)}
+
+    def write_relationships(self, source_label, rel_type, target_label, src_id_prop, tgt_id_prop, rows):
+        param_name = block_param_name("rels", source_label, rel_type, target_label)
+        self._write_block(f"// --- Creating relationships: ({source_label})-[:{rel_type}]->({target_label}) ---", param_name,
+                          self.encoder.encode_relationships(rel_type, rows),
+                          relationship_block_statements(source_label, rel_type, target_label, src_id_prop, tgt_id_prop, param_name,
+                                                        self.relationship_mode, relationship_property_keys(rows)))
+        self.manifest["relationships"].append({
+            "param": param_name, "source": source_label, "type": rel_type, "target": target_label,
+            "source_id_property": src_id_prop, "target_id_property": tgt_id_prop, "rows": len(rows),
+        })
+
+    def close(self):
+        if self.f:
+            self.f.close()
+            self.f = None
+        if self.manifest is not None:
+            with open(cypher_manifest_path(self.path), 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, indent=2, default=custom_json_serializer)
+            self.manifest = None
+
+    def describe(self):
+        compression = compression_for(self.path)
+        return f"Cypher script {self.path}" + (f" ({compression}-compressed)" if compression else "")
+
+    def output_bytes(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else None
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(_csv_value(item) for item in value)
+    return value
+
+def _write_csv(path, fixed_columns, rows, row_values):
+    """Writes rows with the fixed columns first, then every property seen in the batch (first-seen order)."""
+    property_columns = {}
+    for row in rows:
+        for key in row_values(row):
+            property_columns.setdefault(key, None)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(fixed_columns + list(property_columns))
+        for row in rows:
+            props = row_values(row)
+            fixed = [_csv_value(row[c]) for c in fixed_columns] if fixed_columns else []
+            writer.writerow(fixed + [_csv_value(props.get(c)) for c in property_columns])
+
+class CsvSink(DatagenSink):
+    """One CSV per label and per relationship group (for LOAD CSV or neo4j-admin import), plus the index script and a manifest."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = None
+
+    def open(self, summary):
+        os.makedirs(self.directory, exist_ok=True)
+        self.manifest = {"summary": summary, "nodes": {}, "relationships": []}
+
+    def write_indexes(self, statements):
+        with open(os.path.join(self.directory, CSV_INDEXES_FILENAME), 'w', encoding='utf-8') as f:
+            for statement in statements:
+                write_cypher(f, statement)
+
+    def write_nodes(self, label, id_prop_name, rows):
+        filename = f"nodes_{label}.csv"
+        _write_csv(os.path.join(self.directory, filename), [], rows, lambda row: row)
+        self.manifest["nodes"][label] = {"file": filename, "id_property": id_prop_name, "rows": len(rows)}
+
+    def write_relationships(self, source_label, rel_type, target_label, src_id_prop, tgt_id_prop, rows):
+        filename = f"rels_{source_label}_{rel_type}_{target_label}.csv"
+        _write_csv(os.path.join(self.directory, filename), ["source_id", "target_id"], rows, lambda row: row["properties"])
+        self.manifest["relationships"].append({
+            "file": filename, "source": source_label, "type": rel_type, "target": target_label,
+            "source_id_property": src_id_prop, "target_id_property": tgt_id_prop, "rows": len(rows),
+        })
+
+    def close(self):
+        if self.manifest is not None:
+            with open(os.path.join(self.directory, CSV_MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, indent=2, default=custom_json_serializer)
+            self.manifest = None
+
+    def describe(self):
+        return f"CSV files in {self.directory}"
+
+    def output_bytes(self):
+        if not os.path.isdir(self.directory):
+            return None
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+
+class BoltSink(DatagenSink):
+    """Writes straight into Neo4j over Bolt in batched write transactions (no intermediate file)."""
+
+    def __init__(self, uri, user, password, database=None, batch_size=DEFAULT_BOLT_BATCH_SIZE, relationship_mode=RELATIONSHIP_MERGE):
+        from neo4j import GraphDatabase # Only needed for this sink
+        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.uri = uri
+        self.database = database
+        self.batch_size = max(1, batch_size)
+        self.relationship_mode = check_relationship_mode(relationship_mode)
+        self.session = None
+
+    def open(self, summary):
+        self.driver.verify_connectivity()
+        self.session = self.driver.session(database=self.database) if self.database else self.driver.session()
+        logger.info(f"Loading {summary['nodes_generated']} nodes and {summary['relationships_generated']} relationships into {self.uri}")
+
+    def write_indexes(self, statements):
+        for statement in statements:
+            if statement.startswith("//"):
+                continue
+            self.session.run(statement).consume() # Schema changes cannot share a transaction with writes
+
+    def _write_batches(self, query, rows):
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            self.session.execute_write(lambda tx: tx.run(query, rows=batch).consume())
+
+    def write_nodes(self, label, id_prop_name, rows):
+        self._write_batches("\n".join(node_block_statements(label, id_prop_name, "rows")), rows)
+
+    def write_relationships(self, source_label, rel_type, target_label, src_id_prop, tgt_id_prop, rows):
+        self._write_batches("\n".join(relationship_block_statements(source_label, rel_type, target_label, src_id_prop, tgt_id_prop, "rows",
+                                                                   self.relationship_mode, relationship_property_keys(rows))), rows)
+
+    def close(self):
+        if self.session:
+            self.session.close()
+            self.session = None
+        self.driver.close()
+
+    def describe(self):
+        return f"Neo4j at {self.uri}" + (f" (database '{self.database}')" if self.database else "")
@@ -0,0 +1,371 @@
+import re
+import random
+import logging
+import calendar # For more accurate month calculations
+import datetime
+
+from .diagnostics import (report_issue, MISSING_VALUE_LIST, MISSING_RULE, INVALID_INTEGER_RULE, INVALID_FLOAT_RULE,
+                          INVALID_BOOLEAN_RULE, INVALID_DATE_RULE, UNPARSABLE_INTEGER_BOUND, UNPARSABLE_DATE,
+                          DATE_CALCULATION_ERROR, REVERSED_RANGE, UNSUPPORTED_TYPE, UNSUPPORTED_ID_TYPE, RULE_ERROR)
+
+# --- Configuration ---
+VALUE_GROUPS_KEY = "_value_groups_" # value_lists.json: per-label list of {property: value} sets that must stay consistent
+
+logger = logging.getLogger(__name__)
+
+# Every function that can fall back on a bad rule or input takes an optional diagnostics collector
+# (diagnostics.Diagnostics): with one, the fallback is counted per property and summarized at the end
+# of the run; without one (standalone use), it is logged right away.
+
+# --- Dates ---
+
+def parse_date_string(date_str, as_datetime=False, diagnostics=None, qualified_prop_name=""):
+    """
+    Parses special date strings like 'NOW', 'NOW_DATETIME', 'TODAY', 'current_year',
+    absolute ISO dates/datetimes, and relative dates (e.g., 'NOW-2Y', '2023-01-01+3M').
+    Returns a datetime.datetime object if as_datetime is True, otherwise a datetime.date object.
+    qualified_prop_name is the property the string belongs to, for the diagnostics.
+    """
+    # Preprocessing: Remove common suffixes like _DATETIME or _DATE from the end of the string
+    # This allows inputs like "-3Y_DATETIME" to be treated as "-3Y".
+    # It's important to do this before converting to uppercase for keyword matching if suffixes might vary in case.
+    cleaned_date_str = re.sub(r"(_DATETIME|_DATE)$", "", date_str.strip(), flags=re.IGNORECASE)
+
+    date_str_upper = cleaned_date_str.upper() # Use cleaned string for uppercase comparison
+    current_dt_moment = datetime.datetime.now()
+    current_date_moment = current_dt_moment.date()
+
+    # 1. Exact keywords
+    if date_str_upper == "NOW":
+        return current_dt_moment if as_datetime else current_date_moment
+    if date_str_upper == "NOW_DATETIME": # This keyword implies a full datetime moment
+        return current_dt_moment # Return the full datetime; caller uses as_datetime to decide final format
+    if date_str_upper == "TODAY": # Added for consistency
+        return current_dt_moment if as_datetime else current_date_moment
+    if date_str_upper == "CURRENT_YEAR": # Assuming this means start of current year
+        dt = datetime.datetime(current_date_moment.year, 1, 1, 0, 0, 0) # Explicitly set time to midnight
+        return dt if as_datetime else dt.date()
+
+    # 2. Relative dates: BASE<op><val><unit> (e.g., "NOW-2Y", "2023-01-01T10:00:00+3M")
+    #    or just <op><val><unit> (e.g., "-2Y", "+3M")
+    # Regex to capture optional base, and mandatory sign, value, unit.
+    # Allows for ISO dates/datetimes (including 'T' and 'Z') as base.
+    relative_match = re.match(r"^(NOW_DATETIME|NOW|TODAY|[\d\-/:.TZ]+)?\s*([+-])\s*(\d+)\s*([YMDH])$", cleaned_date_str, re.IGNORECASE)
+    if relative_match:
+        base_date_part_str, sign_str, value_str, unit_str = relative_match.groups()
+        value = int(value_str)
+        if sign_str == '-':
+            value = -value
+
+        base_dt = current_dt_moment # Default base is now
+
+        if base_date_part_str: # If a base part was provided
+            # Recursively parse the base part, ensuring it's a datetime for calculations
+            # Always parse base as datetime for arithmetic; an unparsable base is reported and falls back to now
+            base_dt = parse_date_string(base_date_part_str, True, diagnostics, qualified_prop_name)
+        
+        calculated_dt = None # Initialize before try block
+        try:
+            if unit_str.upper() == 'Y':
+                calculated_dt = base_dt.replace(year=base_dt.year + value)
+            elif unit_str.upper() == 'M':
+                month = base_dt.month - 1 + value  # 0-indexed
+                year = base_dt.year + month // 12
+                month = month % 12 + 1  # 1-indexed
+                day = min(base_dt.day, calendar.monthrange(year, month)[1])
+                calculated_dt = base_dt.replace(year=year, month=month, day=day)
+            elif unit_str.upper() == 'D':
+                calculated_dt = base_dt + datetime.timedelta(days=value)
+            elif unit_str.upper() == 'H': # Hours
+                # Ensure base_dt is a datetime object for hour operations
+                if isinstance(base_dt, datetime.date) and not isinstance(base_dt, datetime.datetime):
+                    base_dt = datetime.datetime.combine(base_dt, datetime.time.min) # Convert date to datetime at midnight
+                calculated_dt = base_dt + datetime.timedelta(hours=value)
+            
+            if calculated_dt:
+                return calculated_dt if as_datetime else calculated_dt.date()
+
+        except ValueError: # Handles errors like Feb 29 in non-leap year
+            report_issue(diagnostics, qualified_prop_name, DATE_CALCULATION_ERROR, date_str)
+            # Fallback to current moment if calculation fails
+            return current_dt_moment if as_datetime else current_date_moment
+
+    # 3. Try standard ISO date/datetime format
+    try:
+        if as_datetime:
+            # Handle Z for UTC explicitly if present
+            return datetime.datetime.fromisoformat(cleaned_date_str.replace('Z', '+00:00'))
+        else:
+            # If expecting a date, but a datetime string is given, parse then take date part
+            # Check for 'T' (common datetime separator) or multiple colons (time component)
+            if 'T' in cleaned_date_str or cleaned_date_str.count(':') > 1:
+                return datetime.datetime.fromisoformat(cleaned_date_str.replace('Z', '+00:00')).date()
+            return datetime.date.fromisoformat(cleaned_date_str)
+    except ValueError:
+        pass
+    
+    # Fallback if all parsing fails; the original date_str is reported for better debugging
+    report_issue(diagnostics, qualified_prop_name, UNPARSABLE_DATE, date_str)
+    return current_dt_moment if as_datetime else current_date_moment
+
+
+def generate_random_date(start_date_str, end_date_str, rng=random, diagnostics=None, qualified_prop_name=""):
+    """Generates a random date between start_date and end_date."""
+    start_date = parse_date_string(start_date_str, False, diagnostics, qualified_prop_name)
+    end_date = parse_date_string(end_date_str, False, diagnostics, qualified_prop_name)
+
+    if start_date > end_date:
+        report_issue(diagnostics, qualified_prop_name, REVERSED_RANGE, [start_date_str, end_date_str])
+        start_date, end_date = end_date, start_date
+
+    time_between_dates = end_date - start_date
+    days_between_dates = time_between_dates.days
+    if days_between_dates < 0: days_between_dates = 0 # Ensure non-negative
+
+    random_number_of_days = rng.randrange(days_between_dates + 1)
+    random_date = start_date + datetime.timedelta(days=random_number_of_days)
+    return random_date
+
+
+def generate_random_datetime(start_date_str, end_date_str, rng=random, diagnostics=None, qualified_prop_name=""):
+    """Generates a random datetime between start_date and end_date."""
+    start_datetime = parse_date_string(start_date_str, True, diagnostics, qualified_prop_name)
+    end_datetime = parse_date_string(end_date_str, True, diagnostics, qualified_prop_name)
+    if start_datetime > end_datetime:
+        report_issue(diagnostics, qualified_prop_name, REVERSED_RANGE, [start_date_str, end_date_str])
+        start_datetime, end_datetime = end_datetime, start_datetime
+
+    time_between_datetimes = end_datetime - start_datetime
+    seconds_between_datetimes = time_between_datetimes.total_seconds()
+    if seconds_between_datetimes < 0: seconds_between_datetimes = 0
+
+    random_number_of_seconds = rng.uniform(0, seconds_between_datetimes)
+    random_datetime = start_datetime + datetime.timedelta(seconds=random_number_of_seconds)
+    return random_datetime
+
+# --- Property Values ---
+
+def pick_value_group(owner_type, value_lists_data, rng=random):
+    """One of the owner's consistent value groups (e.g. matching city/state/zip), or None if it has none."""
+    groups = value_lists_data.get(owner_type, {}).get(VALUE_GROUPS_KEY, [])
+    return rng.choice(groups) if groups else None
+
+def generate_property_value(owner_type, qualified_prop_name, prop_type, value_lists_data, generation_rules_data,
+                            rng=random, dependent_values=None, diagnostics=None):
+    """
+    Generates a single property value based on type and rules. dependent_values is the value group
+    picked for the current instance (see pick_value_group); its entries win over the value lists.
+    """
+    simple_prop_name = qualified_prop_name.split('.')[-1]
+
+    # 1. String Type (Non-ID)
+    if prop_type == "String":
+        if dependent_values and simple_prop_name in dependent_values:
+            return dependent_values[simple_prop_name]
+        values = value_lists_data.get(owner_type, {}).get(simple_prop_name, [])
+        if values:
+            return rng.choice(values)
+        else:
+            report_issue(diagnostics, qualified_prop_name, MISSING_VALUE_LIST)
+            return ""
+
+    # 2. Other Types (Integer, Float, Date, DateTime, Boolean)
+    rule = find_rule(qualified_prop_name, prop_type, generation_rules_data)
+
+    if rule is None:
+        # Only report if the property type is NOT Boolean and no rule is found.
+        if prop_type != "Boolean":
+            report_issue(diagnostics, qualified_prop_name, MISSING_RULE, prop_type)
+        if prop_type == "Integer": return 0
+        if prop_type == "Float": return 0.0
+        if prop_type == "Boolean": return rng.choice([True, False])
+        if prop_type == "Date": return datetime.date.today()
+        if prop_type == "DateTime": return datetime.datetime.now()
+        return None # Fallback for unknown types
+
+    try:
+        if prop_type == "Integer":
+            if isinstance(rule, list) and len(rule) == 2:
+                min_val = evaluate_integer_rule_component(rule[0], qualified_prop_name, diagnostics)
+                max_val = evaluate_integer_rule_component(rule[1], qualified_prop_name, diagnostics)
+            else:
+                report_issue(diagnostics, qualified_prop_name, INVALID_INTEGER_RULE, rule)
+                min_val, max_val = 0, 100 # Hardcoded default fallback
+
+            if min_val > max_val: min_val, max_val = max_val, min_val # Ensure min <= max
+            return rng.randint(min_val, max_val)
+
+
+        elif prop_type == "Float":
+            min_val, max_val = 0.0, 1.0 # Default values for fallback
+            decimals = 2 # Default decimals
+
+            if isinstance(rule, list) and len(rule) == 2:
+                try:
+                    min_val = float(rule[0])
+                    max_val = float(rule[1])
+                except (ValueError, TypeError):
+                    report_issue(diagnostics, qualified_prop_name, INVALID_FLOAT_RULE, rule)
+            else:
+                report_issue(diagnostics, qualified_prop_name, INVALID_FLOAT_RULE, rule)
+            # If rule was not a list of 2, min_val/max_val remain the initial defaults.
+
+            if min_val > max_val: min_val, max_val = max_val, min_val # Ensure min <= max
+            val = rng.uniform(min_val, max_val)
+            return round(val, decimals)
+
+
+        elif prop_type == "Boolean":
+            # Check if a rule exists and is a dictionary specifying probability
+            prob_true = 0.5 # Default probability
+            if isinstance(rule, dict) and 'probability_true' in rule:
+                 try:
+                     prob_true = float(rule['probability_true'])
+                     if not 0.0 <= prob_true <= 1.0:
+                         report_issue(diagnostics, qualified_prop_name, INVALID_BOOLEAN_RULE, rule)
+                         prob_true = 0.5
+                 except (ValueError, TypeError):
+                      report_issue(diagnostics, qualified_prop_name, INVALID_BOOLEAN_RULE, rule)
+            elif rule is not None: # Rule exists but isn't a dict with probability_true
+                 report_issue(diagnostics, qualified_prop_name, INVALID_BOOLEAN_RULE, rule)
+            # If rule is None (as per rule generator instructions), prob_true remains 0.5
+            return rng.random() < prob_true
+
+        elif prop_type == "Date" or prop_type == "DateTime":
+            if isinstance(rule, list) and len(rule) == 2:
+                start_date_str, end_date_str = rule[0], rule[1]
+            else:
+                report_issue(diagnostics, qualified_prop_name, INVALID_DATE_RULE, rule)
+                start_date_str, end_date_str = '-1Y', 'NOW' # Hardcoded default fallback
+            if prop_type == "Date":
+                return generate_random_date(start_date_str, end_date_str, rng, diagnostics, qualified_prop_name)
+            return generate_random_datetime(start_date_str, end_date_str, rng, diagnostics, qualified_prop_name)
+
+        else:
+            report_issue(diagnostics, qualified_prop_name, UNSUPPORTED_TYPE, prop_type)
+            return None
+
+    except Exception:
+        report_issue(diagnostics, qualified_prop_name, RULE_ERROR, rule)
+        # Return basic default on error
+        if prop_type == "Integer": return 0
+        if prop_type == "Float": return 0.0
+        if prop_type == "Boolean": return False
+        if prop_type == "Date": return datetime.date.today()
+        if prop_type == "DateTime": return datetime.datetime.now()
+        return None
+
+def evaluate_integer_rule_component(component_val, qualified_prop_name="", diagnostics=None):
+    """
+    One bound of an integer rule: numbers pass through; strings may use 'current_year' and one
+    +/- term (e.g. 'current_year - 10'). Unparsable strings fall back to 0.
+    """
+    if not isinstance(component_val, str):
+        return component_val
+    processed_val_str = component_val.strip().replace("current_year", str(datetime.date.today().year))
+    try:
+        return int(processed_val_str)
+    except ValueError:
+        pass
+    match = re.fullmatch(r"\s*(-?\d+)\s*([+\-])\s*(\d+)\s*", processed_val_str)
+    if match:
+        num1, op, num2 = int(match.group(1)), match.group(2), int(match.group(3))
+        return num1 + num2 if op == '+' else num1 - num2
+    report_issue(diagnostics, qualified_prop_name, UNPARSABLE_INTEGER_BOUND, component_val)
+    return 0
+
+def find_rule(qualified_prop_name, prop_type, generation_rules_data):
+    """The property's rule from generation_rules.json's type_ranges: specific first, then the type's default."""
+    rules_for_type = generation_rules_data.get('type_ranges', {}).get(prop_type.lower(), {})
+    rule = rules_for_type.get(qualified_prop_name)
+    if rule is None:
+        rule = rules_for_type.get('default')
+    return rule
+
+def resolve_rule(qualified_prop_name, prop_type, generation_rules_data, diagnostics=None):
+    """
+    The distribution generate_property_value would sample for a non-String property, normalized once
+    (for column-at-a-time backends): ("integer"|"float", low, high), ("boolean", probability_true),
+    ("date"|"datetime", start_str, end_str), ("constant", value) or ("today"|"now",). Rule problems
+    are reported once, with the issue generate_property_value reports per value.
+    """
+    rule = find_rule(qualified_prop_name, prop_type, generation_rules_data)
+    is_pair = isinstance(rule, list) and len(rule) == 2
+    if rule is None and prop_type != "Boolean":
+        report_issue(diagnostics, qualified_prop_name, MISSING_RULE, prop_type)
+    if prop_type == "Integer":
+        if rule is None:
+            return ("constant", 0)
+        if not is_pair:
+            report_issue(diagnostics, qualified_prop_name, INVALID_INTEGER_RULE, rule)
+        low, high = [evaluate_integer_rule_component(v, qualified_prop_name, diagnostics) for v in rule] if is_pair else (0, 100)
+        if not all(isinstance(v, int) or (isinstance(v, float) and v.is_integer()) for v in (low, high)):
+            report_issue(diagnostics, qualified_prop_name, RULE_ERROR, rule)
+            return ("constant", 0) # random.randint rejects it; generate_property_value falls back to 0
+        return ("integer", int(min(low, high)), int(max(low, high)))
+    if prop_type == "Float":
+        if rule is None:
+            return ("constant", 0.0)
+        try:
+            low, high = (float(rule[0]), float(rule[1])) if is_pair else (0.0, 1.0)
+        except (ValueError, TypeError):
+            low, high = 0.0, 1.0
+            is_pair = False
+        if not is_pair:
+            report_issue(diagnostics, qualified_prop_name, INVALID_FLOAT_RULE, rule)
+        return ("float", min(low, high), max(low, high))
+    if prop_type == "Boolean":
+        probability = 0.5
+        if isinstance(rule, dict) and 'probability_true' in rule:
+            try:
+                probability = float(rule['probability_true'])
+            except (ValueError, TypeError):
+                probability = -1.0 # Reported below
+            if not 0.0 <= probability <= 1.0:
+                report_issue(diagnostics, qualified_prop_name, INVALID_BOOLEAN_RULE, rule)
+                probability = 0.5
+        elif rule is not None:
+            report_issue(diagnostics, qualified_prop_name, INVALID_BOOLEAN_RULE, rule)
+        return ("boolean", probability)
+    if prop_type in ("Date", "DateTime"):
+        if rule is None:
+            return ("today",) if prop_type == "Date" else ("now",)
+        if not is_pair:
+            report_issue(diagnostics, qualified_prop_name, INVALID_DATE_RULE, rule)
+        start_str, end_str = rule if is_pair else ('-1Y', 'NOW')
+        return ("date" if prop_type == "Date" else "datetime", start_str, end_str)
+    if rule is not None:
+        report_issue(diagnostics, qualified_prop_name, UNSUPPORTED_TYPE, prop_type)
+    return ("constant", None)
+
+def check_property_rule(owner_type, prop_name, prop_type, qualified_prop_name, value_lists_data, generation_rules_data, diagnostics):
+    """
+    Validation pre-pass for one property: reports the problems its value list or rule will hit, once,
+    without drawing any value (the generators then only count the affected values).
+    """
+    if prop_type == "String":
+        if not value_lists_data.get(owner_type, {}).get(prop_name):
+            report_issue(diagnostics, qualified_prop_name, MISSING_VALUE_LIST)
+        return
+    spec = resolve_rule(qualified_prop_name, prop_type, generation_rules_data, diagnostics)
+    if spec[0] in ("date", "datetime"):
+        as_datetime = spec[0] == "datetime"
+        start = parse_date_string(spec[1], as_datetime, diagnostics, qualified_prop_name)
+        end = parse_date_string(spec[2], as_datetime, diagnostics, qualified_prop_name)
+        try:
+            if start > end:
+                report_issue(diagnostics, qualified_prop_name, REVERSED_RANGE, [spec[1], spec[2]])
+        except TypeError: # Offset-aware vs naive datetimes
+            report_issue(diagnostics, qualified_prop_name, RULE_ERROR, [spec[1], spec[2]])
+
+def generate_sequential_id(label, id_property_name, id_property_type, counter, diagnostics=None):
+    """Generates a sequential ID based on type."""
+    if id_property_type == "String":
+        # Use label in ID by default, can be customized
+        return f"{label}_{counter:04d}" # e.g., "Customer_0001"
+    elif id_property_type == "Integer":
+        return counter
+    else:
+        # Fallback for other types? Could use counter as string or raise error.
+        report_issue(diagnostics, f"{label}.{id_property_name}", UNSUPPORTED_ID_TYPE, id_property_type)
+        return counter
@@ -0,0 +1,243 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import shutil
+import logging
+import argparse
+import resource
+import tempfile
+import subprocess
+
+from datagen_runtime.compression import open_text
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCALE = 0.01 # Fraction of the generation plan counts used for the validation run
+DEFAULT_TIMEOUT_SECONDS = 300 # Wall-clock limit of the validation run
+DEFAULT_MEMORY_LIMIT_MB = 2048 # Address-space limit of the script process
+DEFAULT_MIN_NODES_PER_SECOND = 200.0 # Throughput budget at the validation scale (0 disables)
+DEFAULT_MAX_PEAK_RSS_MB = 1024.0 # Peak resident memory budget (0 disables)
+PLAN_FILENAME = "generation_plan.json"
+CONFIG_FILENAMES = ("schema_analysis.json", PLAN_FILENAME, "value_lists.json", "generation_rules.json",
+                    "cardinality_rules.json", "questions.txt") # Copied next to the script when present
+REPORT_FILENAME = "datagen_validation.json"
+STDERR_TAIL_CHARS = 3000
+HEADER_SCAN_BYTES = 65536 # Cypher header comments with the generated totals are at the top
+NODES_TOTAL_RE = re.compile(r"Total Nodes Generated:\s*(\d+)")
+RELATIONSHIPS_TOTAL_RE = re.compile(r"Total Relationships Generated:\s*(\d+)")
+POLL_SECONDS = 0.1
+
+# Logging Setup
+logger = logging.getLogger(__name__)
+
+# --- Budgets and Report ---
+
+class ValidationBudget:
+    """Limits a generated script must stay within at the validation scale; 0 disables a throughput/RSS budget."""
+
+    def __init__(self, timeout_seconds=DEFAULT_TIMEOUT_SECONDS, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                 min_nodes_per_second=DEFAULT_MIN_NODES_PER_SECOND, max_peak_rss_mb=DEFAULT_MAX_PEAK_RSS_MB, scale=DEFAULT_SCALE):
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self.min_nodes_per_second = min_nodes_per_second
+        self.max_peak_rss_mb = max_peak_rss_mb
+        self.scale = scale
+
+class ValidationReport:
+    """Outcome of one validation run; `ok` is False when the script failed or broke a budget (see `violations`)."""
+
+    def __init__(self):
+        self.returncode = None
+        self.timed_out = False
+        self.elapsed = 0.0
+        self.peak_rss_mb = None
+        self.planned_nodes = 0
+        self.nodes = None
+        self.relationships = None
+        self.output_bytes = 0
+        self.output_files = {}
+        self.stderr_tail = ""
+        self.violations = []
+
+    @property
+    def ok(self):
+        return not self.violations
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.nodes is not None and self.elapsed > 0 else None
+
+    @property
+    def relationships_per_second(self):
+        return self.relationships / self.elapsed if self.relationships is not None and self.elapsed > 0 else None
+
+    def to_dict(self):
+        return {
+            "ok": self.ok, "violations": self.violations, "returncode": self.returncode, "timed_out": self.timed_out,
+            "elapsed_seconds": round(self.elapsed, 3), "peak_rss_mb": self.peak_rss_mb, "planned_nodes": self.planned_nodes,
+            "nodes": self.nodes, "relationships": self.relationships,
+            "nodes_per_second": round(self.nodes_per_second, 1) if self.nodes_per_second is not None else None,
+            "relationships_per_second": round(self.relationships_per_second, 1) if self.relationships_per_second is not None else None,
+            "output_bytes": self.output_bytes, "output_files": self.output_files, "stderr_tail": self.stderr_tail,
+        }
+
+    def summary(self):
+        rate = lambda value: f"{value:,.0f}/s" if value is not None else "n/a"
+        rss = f"{self.peak_rss_mb:.0f} MB" if self.peak_rss_mb is not None else "n/a"
+        status = "passed" if self.ok else f"rejected ({'; '.join(self.violations)})"
+        return (f"Validation {status}: {self.elapsed:.1f}s, {self.nodes if self.nodes is not None else '?'} nodes ({rate(self.nodes_per_second)}), "
+                f"{self.relationships if self.relationships is not None else '?'} relationships ({rate(self.relationships_per_second)}), "
+                f"peak RSS {rss}, output {self.output_bytes / 1e6:.1f} MB")
+
+# --- Sandbox ---
+
+def scale_plan(plan, scale):
+    """Scales every node count of a generation plan, keeping at least one node for labels that had any."""
+    return {label: (max(1, math.ceil(count * scale)) if count > 0 else 0) if isinstance(count, (int, float)) else count
+            for label, count in plan.items()}
+
+def prepare_sandbox(script_path, config_dir, sandbox_dir, scale):
+    """Copies the script and its configuration files into sandbox_dir with the plan scaled; returns the planned node total."""
+    shutil.copy(script_path, os.path.join(sandbox_dir, os.path.basename(script_path)))
+    for filename in CONFIG_FILENAMES:
+        source = os.path.join(config_dir, filename)
+        if filename == PLAN_FILENAME or not os.path.exists(source):
+            continue
+        shutil.copy(source, os.path.join(sandbox_dir, filename))
+    with open(os.path.join(config_dir, PLAN_FILENAME), "r", encoding="utf-8") as f:
+        plan = scale_plan(json.load(f), scale)
+    with open(os.path.join(sandbox_dir, PLAN_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(plan, f, indent=2)
+    return sum(count for count in plan.values() if isinstance(count, (int, float)))
+
+def _resource_limits(memory_limit_mb, cpu_seconds):
+    """preexec_fn for the script process: caps address space and CPU time so a runaway script is killed."""
+    def apply():
+        if memory_limit_mb:
+            limit = int(memory_limit_mb * 1024 * 1024)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        if cpu_seconds:
+            resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_seconds), int(cpu_seconds) + 5))
+    return apply
+
+def _read_totals(path):
+    with open_text(path, "r", errors="replace") as f: # The script may be .cypher.gz / .cypher.zst
+        header = f.read(HEADER_SCAN_BYTES)
+    nodes = NODES_TOTAL_RE.search(header)
+    relationships = RELATIONSHIPS_TOTAL_RE.search(header)
+    return int(nodes.group(1)) if nodes else None, int(relationships.group(1)) if relationships else None
+
+# --- Validation ---
+
+def validate_script(script_path, config_dir, budget=None, keep_dir=None):
+    """
+    Runs a generated datagen script on a scaled-down copy of its configuration in a separate process
+    (own working directory, address-space/CPU rlimits, wall-clock timeout) and measures wall time,
+    peak RSS, output size and node/relationship throughput. Totals are read from the Cypher header
+    ('Total Nodes/Relationships Generated'); without one, the planned node total is used.
+    Returns a ValidationReport whose violations list every failed check.
+    """
+    budget = budget or ValidationBudget()
+    report = ValidationReport()
+    sandbox_dir = keep_dir or tempfile.mkdtemp(prefix="datagen_validation_")
+    os.makedirs(sandbox_dir, exist_ok=True)
+    try:
+        report.planned_nodes = prepare_sandbox(script_path, config_dir, sandbox_dir, budget.scale)
+        before = set(os.listdir(sandbox_dir))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SCRIPT_DIR, os.environ.get("PYTHONPATH")]))) # Repo helpers (datagen_runtime, ...)
+        stdout_path, stderr_path = os.path.join(sandbox_dir, "validation_stdout.txt"), os.path.join(sandbox_dir, "validation_stderr.txt")
+        logger.info(f"Validating {script_path} at {budget.scale:.0%} of the plan ({report.planned_nodes} nodes) in {sandbox_dir}")
+        with open(stdout_path, "wb") as stdout, open(stderr_path, "wb") as stderr:
+            started = time.monotonic()
+            pid = _spawn([sys.executable, os.path.basename(script_path)], sandbox_dir, env, stdout, stderr,
+                         _resource_limits(budget.memory_limit_mb, budget.timeout_seconds))
+            status, rusage = _wait(pid, started, budget.timeout_seconds, report)
+            report.elapsed = time.monotonic() - started
+        report.returncode = os.waitstatus_to_exitcode(status)
+        report.peak_rss_mb = rusage.ru_maxrss / 1024.0 # Linux reports KiB
+        with open(stderr_path, "r", encoding="utf-8", errors="replace") as f:
+            report.stderr_tail = f.read()[-STDERR_TAIL_CHARS:]
+
+        for filename in sorted(set(os.listdir(sandbox_dir)) - before - {"validation_stdout.txt", "validation_stderr.txt"}):
+            path = os.path.join(sandbox_dir, filename)
+            if os.path.isfile(path) and not filename.endswith(".log"):
+                report.output_files[filename] = os.path.getsize(path)
+                if ".cypher" in filename and report.nodes is None:
+                    report.nodes, report.relationships = _read_totals(path)
+        report.output_bytes = sum(report.output_files.values())
+        if report.nodes is None and report.returncode == 0:
+            report.nodes = report.planned_nodes
+        _check_budget(report, budget)
+    finally:
+        if not keep_dir:
+            shutil.rmtree(sandbox_dir, ignore_errors=True)
+    logger.info(report.summary())
+    return report
+
+def _spawn(args, cwd, env, stdout, stderr, preexec_fn):
+    """Starts the script process; os.wait4 (below) gives its own rusage, unlike subprocess.Popen.wait."""
+    process = subprocess.Popen(args, cwd=cwd, env=env, stdout=stdout, stderr=stderr, preexec_fn=preexec_fn)
+    process.returncode = 0 # Reaped with os.wait4; keeps Popen from waiting on the pid again
+    return process.pid
+
+def _wait(pid, started, timeout_seconds, report):
+    while True:
+        waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+        if waited_pid:
+            return status, rusage
+        if timeout_seconds and time.monotonic() - started > timeout_seconds:
+            report.timed_out = True
+            os.kill(pid, 9)
+            _, status, rusage = os.wait4(pid, 0)
+            return status, rusage
+        time.sleep(POLL_SECONDS)
+
+def _check_budget(report, budget):
+    if report.timed_out:
+        report.violations.append(f"timed out after {budget.timeout_seconds}s")
+    elif report.returncode != 0:
+        report.violations.append(f"exited with code {report.returncode}")
+    if not report.timed_out and report.returncode == 0 and not report.output_bytes:
+        report.violations.append("wrote no output")
+    if budget.max_peak_rss_mb and report.peak_rss_mb is not None and report.peak_rss_mb > budget.max_peak_rss_mb:
+        report.violations.append(f"peak RSS {report.peak_rss_mb:.0f} MB > {budget.max_peak_rss_mb:.0f} MB")
+    if (budget.min_nodes_per_second and report.returncode == 0 and report.nodes_per_second is not None
+            and report.nodes_per_second < budget.min_nodes_per_second):
+        report.violations.append(f"{report.nodes_per_second:.0f} nodes/s < {budget.min_nodes_per_second:.0f} nodes/s")
+
+def feedback_for_agent(report, scale=DEFAULT_SCALE):
+    """Re-prompt text for the code generator describing why its script was rejected."""
+    return (f"The previous script was rejected by a validation run at {scale:.0%} of the planned counts: {'; '.join(report.violations)}.\n"
+            f"Measured: {report.summary()}\n"
+            f"Last stderr output:\n{report.stderr_tail or '(none)'}\n"
+            "Fix the problem and return the complete corrected script.")
+
+def write_report(report, output_dir):
+    path = os.path.join(output_dir, REPORT_FILENAME)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report.to_dict(), f, indent=2)
+    return path
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Runs a generated datagen script on a scaled-down plan under time/memory limits and checks its performance budget.")
+    parser.add_argument("script", help="Generated Python script")
+    parser.add_argument("--config-dir", default=os.getcwd(), help="Directory with schema_analysis.json, generation_plan.json, value_lists.json, ...")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE, help="Fraction of the planned node counts")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS, help="Wall-clock limit in seconds")
+    parser.add_argument("--memory-limit-mb", type=float, default=DEFAULT_MEMORY_LIMIT_MB, help="Address-space limit (0 = none)")
+    parser.add_argument("--min-nodes-per-second", type=float, default=DEFAULT_MIN_NODES_PER_SECOND, help="Throughput budget (0 = none)")
+    parser.add_argument("--max-peak-rss-mb", type=float, default=DEFAULT_MAX_PEAK_RSS_MB, help="Peak RSS budget (0 = none)")
+    parser.add_argument("--keep-dir", help="Run in this directory and keep it (default: a temporary directory)")
+    args = parser.parse_args()
+
+    validation_budget = ValidationBudget(args.timeout, args.memory_limit_mb, args.min_nodes_per_second, args.max_peak_rss_mb, args.scale)
+    validation_report = validate_script(args.script, args.config_dir, validation_budget, keep_dir=args.keep_dir)
+    logger.info(f"Report written to {write_report(validation_report, args.config_dir)}")
+    if not validation_report.ok and validation_report.stderr_tail:
+        print(validation_report.stderr_tail)
+    sys.exit(0 if validation_report.ok else 1)
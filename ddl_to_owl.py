@@ -0,0 +1,532 @@
+import os
+import re
+import sys
+import time
+import logging
+import argparse
+from urllib.parse import quote
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DDL_FILENAME = "generated_DDL.txt"
+OUTPUT_FILENAME = "generated_ontology.ttl" # Readable by convert_rdf_to_json_new.py
+DEFAULT_BASE_URI = "http://example.com/ontology/" # The 'ex:' namespace of the Tbox rules
+
+# Logging Setup
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Compiles SQL DDL into an OWL ontology (Turtle) by applying the transformation rules of
+# 'Tbox rules.txt' directly, instead of sending the DDL through an LLM:
+#   - each table is an owl:Class (rdfs:label = table name)
+#   - each non-FK column is an owl:DatatypeProperty {Table}_{Column} (domain = table, range = XSD type)
+#   - NOT NULL -> owl:minCardinality 1 restriction; UNIQUE -> owl:FunctionalProperty;
+#     PRIMARY KEY -> owl:FunctionalProperty + owl:cardinality 1 restriction
+#   - each FK is an owl:ObjectProperty {Source}_has_{Target}; a self-referencing FK is also owl:SymmetricProperty
+#   - a PK that is also an FK to another table -> rdfs:subClassOf that table
+#   - DEFAULT -> owl:hasValue restriction; CHECK (col >=|<=|>|< value) -> restricted rdfs:Datatype range
+#   - a link table (exactly two FKs that make up its key) -> {A}_relatesVia{Link}_{B} and its owl:inverseOf
+# The output is sorted by DDL order only, so the same DDL always compiles to the same bytes.
+
+PREFIXES = [
+    ("rdf", "http://www.w3.org/1999/02/22-rdf-syntax-ns#"),
+    ("rdfs", "http://www.w3.org/2000/01/rdf-schema#"),
+    ("owl", "http://www.w3.org/2002/07/owl#"),
+    ("xsd", "http://www.w3.org/2001/XMLSchema#"),
+]
+
+# Leading word of a SQL type -> XSD datatype (anything else maps to xsd:string)
+SQL_TO_XSD = {
+    "INT": "integer", "INTEGER": "integer", "SMALLINT": "integer", "BIGINT": "integer", "TINYINT": "integer",
+    "MEDIUMINT": "integer", "SERIAL": "integer", "BIGSERIAL": "integer", "SMALLSERIAL": "integer",
+    "DECIMAL": "decimal", "NUMERIC": "decimal", "NUMBER": "decimal", "MONEY": "decimal", "SMALLMONEY": "decimal",
+    "FLOAT": "double", "REAL": "double", "DOUBLE": "double",
+    "BOOLEAN": "boolean", "BOOL": "boolean", "BIT": "boolean",
+    "DATE": "date", "DATETIME": "dateTime", "DATETIME2": "dateTime", "SMALLDATETIME": "dateTime",
+    "TIMESTAMP": "dateTime", "TIMESTAMPTZ": "dateTime", "TIME": "time",
+}
+
+CHECK_FACETS = {">=": "minInclusive", "<=": "maxInclusive", ">": "minExclusive", "<": "maxExclusive"}
+FLIPPED_OPERATORS = {">=": "<=", "<=": ">=", ">": "<", "<": ">"} # '18 <= age' is 'age >= 18'
+
+IDENT = r'(?:"[^"]+"|`[^`]+`|\[[^\]]+\]|[\w$]+)'
+QUALIFIED_IDENT = rf"{IDENT}(?:\s*\.\s*{IDENT})*"
+VALUE = r"'(?:[^']|'')*'|[-+]?\d+(?:\.\d+)?"
+
+COMMENT_OR_LITERAL_RE = re.compile(r"""('(?:[^']|'')*'|"[^"]*"|`[^`]*`)|--[^\n]*|/\*.*?\*/""", re.S)
+CODE_FENCE_RE = re.compile(r"^\s*```.*$", re.M)
+STRUCTURE_TOKEN_RE = re.compile(r"""'(?:[^']|'')*'|"[^"]*"|`[^`]*`|[(),;]""")
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+CREATE_TABLE_RE = re.compile(rf"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:GLOBAL\s+|LOCAL\s+)?(?:TEMPORARY|TEMP)\s+)?TABLE\s+"
+                             rf"(?:IF\s+NOT\s+EXISTS\s+)?({QUALIFIED_IDENT})\s*\(", re.I)
+DROP_TABLE_RE = re.compile(r"^\s*DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(.+?)(?:\s+(?:CASCADE|RESTRICT))?\s*$", re.I | re.S)
+ALTER_TABLE_RE = re.compile(rf"^\s*ALTER\s+TABLE\s+(?:ONLY\s+)?(?:IF\s+EXISTS\s+)?({QUALIFIED_IDENT})\s+(.*)$", re.I | re.S)
+TABLE_CONSTRAINT_RE = re.compile(rf"^\s*(?:CONSTRAINT\s+{IDENT}\s+)?(PRIMARY\s+KEY|FOREIGN\s+KEY|UNIQUE(?:\s+(?:KEY|INDEX))?|CHECK)\b", re.I)
+INDEX_DEFINITION_RE = re.compile(rf"^\s*(?:(?:FULLTEXT|SPATIAL)\s+)?(?:KEY|INDEX)\s*(?:{IDENT}\s*)?\(", re.I)
+COLUMN_NAME_RE = re.compile(rf"^\s*({IDENT})\s*")
+COLUMN_TYPE_RE = re.compile(r"([A-Za-z_]\w*(?:\s+(?:PRECISION|VARYING|UNSIGNED|SIGNED|ZEROFILL))*)\s*(\([^)]*\))?"
+                            r"(?:\s+(?:WITH|WITHOUT)\s+TIME\s+ZONE)?", re.I)
+REFERENCES_RE = re.compile(rf"\bREFERENCES\s+({QUALIFIED_IDENT})\s*(?:\(([^)]*)\))?", re.I)
+DEFAULT_RE = re.compile(r"\bDEFAULT\s+(\(*\s*(?:'(?:[^']|'')*'|[-+]?\d+(?:\.\d+)?|[A-Za-z_]\w*)\s*\)*)", re.I)
+COMPARISON_RE = re.compile(rf"^\s*(?:({IDENT})\s*(>=|<=|>|<)\s*({VALUE})|({VALUE})\s*(>=|<=|>|<)\s*({IDENT}))\s*$", re.I)
+BETWEEN_RE = re.compile(rf"^\s*({IDENT})\s+BETWEEN\s+({VALUE})\s+AND\s+({VALUE})\s*$", re.I)
+NOT_NULL_RE = re.compile(r"\bNOT\s+NULL\b", re.I)
+UNIQUE_RE = re.compile(r"\bUNIQUE\b", re.I)
+PRIMARY_KEY_RE = re.compile(r"\bPRIMARY\s+KEY\b", re.I)
+CHECK_RE = re.compile(r"\bCHECK\s*\(", re.I)
+PN_LOCAL_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_\-]*$") # Local names safe to write as ex:{name}
+
+class DdlParseError(ValueError):
+    """The DDL has no usable CREATE TABLE statement."""
+
+class Column:
+    def __init__(self, name, sql_type):
+        self.name = name
+        self.sql_type = sql_type
+        self.xsd_type = SQL_TO_XSD.get(sql_type.split()[0].upper(), "string") if sql_type else "string"
+        self.not_null = False
+        self.unique = False
+        self.default = None # Raw SQL default expression
+        self.checks = [] # [(facet, lexical value)] from CHECK constraints
+
+class ForeignKey:
+    def __init__(self, columns, target_table, target_columns):
+        self.columns = columns
+        self.target_table = target_table
+        self.target_columns = target_columns
+
+class Table:
+    def __init__(self, name):
+        self.name = name
+        self.columns = {} # name -> Column, in DDL order
+        self.primary_key = []
+        self.foreign_keys = []
+        self.unique_columns = [] # Single-column table-level UNIQUE constraints
+        self.checks = [] # Raw CHECK expressions, applied once all columns are known
+
+    def column(self, name):
+        """Case-insensitive column lookup (SQL identifiers usually are)."""
+        return self.columns.get(name) or next((c for n, c in self.columns.items() if n.lower() == name.lower()), None)
+
+    @property
+    def foreign_key_columns(self):
+        return {column.lower() for fk in self.foreign_keys for column in fk.columns}
+
+# --- DDL Parsing ---
+
+def unquote_identifier(name):
+    """'"Party"' / '`Party`' / '[Party]' / 'dbo.Party' -> 'Party'."""
+    last = re.findall(IDENT, name.strip())[-1]
+    return last[1:-1] if last[0] in '"`[' else last
+
+def _identifier_list(text):
+    return [unquote_identifier(part) for part in text.split(",") if part.strip()]
+
+def strip_comments(ddl_text):
+    """Drops markdown code fences and SQL comments; string literals and quoted identifiers are kept verbatim."""
+    ddl_text = CODE_FENCE_RE.sub("", ddl_text)
+    return COMMENT_OR_LITERAL_RE.sub(lambda m: m.group(1) if m.group(1) else " ", ddl_text)
+
+def split_top_level(text, separator):
+    """Splits on separator outside parentheses and quotes."""
+    parts, depth, start = [], 0, 0
+    for match in STRUCTURE_TOKEN_RE.finditer(text):
+        token = match.group()
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(0, depth - 1)
+        elif token == separator and depth == 0:
+            parts.append(text[start:match.start()])
+            start = match.end()
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+def _balanced_group(text, open_index):
+    """(inner text, index after the closing parenthesis) of the group opening at text[open_index]."""
+    depth = 0
+    for match in STRUCTURE_TOKEN_RE.finditer(text, open_index):
+        token = match.group()
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+            if depth == 0:
+                return text[open_index + 1:match.start()], match.end()
+    return text[open_index + 1:], len(text)
+
+def _mask_literals(text):
+    """Blanks the inside of string literals so keyword searches cannot match quoted text (offsets are kept)."""
+    return STRING_LITERAL_RE.sub(lambda m: "'" + " " * (len(m.group()) - 2) + "'", text)
+
+def _unquote_literal(value):
+    value = value.strip()
+    while value.startswith("(") and value.endswith(")"):
+        value = value[1:-1].strip()
+    if value.startswith("'") and value.endswith("'"):
+        return value[1:-1].replace("''", "'"), True
+    return value, False
+
+def _check_group(text, masked):
+    """Inner expression of the first CHECK (...) in text, or None."""
+    match = CHECK_RE.search(masked)
+    return _balanced_group(text, match.end() - 1)[0] if match else None
+
+def parse_column(definition, table):
+    match = COLUMN_NAME_RE.match(definition)
+    if not match:
+        return None
+    column_name = unquote_identifier(match.group(1))
+    type_match = COLUMN_TYPE_RE.match(definition, match.end())
+    sql_type = type_match.group(1) if type_match else ""
+    rest = definition[type_match.end():] if type_match else definition[match.end():]
+    masked = _mask_literals(rest)
+    column = Column(column_name, sql_type)
+    column.not_null = bool(NOT_NULL_RE.search(masked))
+    column.unique = bool(UNIQUE_RE.search(masked))
+    if PRIMARY_KEY_RE.search(masked):
+        table.primary_key = [column_name]
+    default_match = DEFAULT_RE.search(masked)
+    if default_match:
+        column.default = rest[default_match.start(1):default_match.end(1)].strip()
+    reference_match = REFERENCES_RE.search(masked)
+    if reference_match:
+        target_columns = _identifier_list(rest[reference_match.start(2):reference_match.end(2)]) if reference_match.group(2) else []
+        table.foreign_keys.append(ForeignKey([column_name], unquote_identifier(reference_match.group(1)), target_columns))
+    check = _check_group(rest, masked)
+    if check:
+        table.checks.append(check)
+    table.columns[column_name] = column
+    return column
+
+def parse_table_constraint(definition, table):
+    """PRIMARY KEY / FOREIGN KEY / UNIQUE / CHECK at table level; returns False if definition is not one."""
+    match = TABLE_CONSTRAINT_RE.match(definition)
+    if not match:
+        return False
+    kind = match.group(1).upper().split()[0]
+    masked = _mask_literals(definition)
+    if kind == "CHECK":
+        check = _check_group(definition, masked)
+        if check:
+            table.checks.append(check)
+        return True
+    open_index = definition.find("(", match.end())
+    if open_index < 0:
+        return True
+    columns_text, end = _balanced_group(definition, open_index)
+    columns = _identifier_list(columns_text)
+    if kind == "PRIMARY":
+        table.primary_key = columns
+    elif kind == "UNIQUE":
+        if len(columns) == 1:
+            table.unique_columns.extend(columns)
+    else:
+        reference_match = REFERENCES_RE.search(masked, end)
+        if reference_match:
+            target_columns = _identifier_list(definition[reference_match.start(2):reference_match.end(2)]) if reference_match.group(2) else []
+            table.foreign_keys.append(ForeignKey(columns, unquote_identifier(reference_match.group(1)), target_columns))
+    return True
+
+def _parse_table_item(item, table):
+    if INDEX_DEFINITION_RE.match(item) or parse_table_constraint(item, table):
+        return
+    parse_column(item, table)
+
+def _alter_table(statement_match, tables):
+    table = tables.get(unquote_identifier(statement_match.group(1)).lower())
+    if table is None:
+        logger.warning(f"ALTER TABLE on unknown table '{statement_match.group(1)}'. Skipping.")
+        return
+    for action in split_top_level(statement_match.group(2), ","):
+        add_match = re.match(r"^\s*ADD\s+(?:COLUMN\s+(?:IF\s+NOT\s+EXISTS\s+)?)?", action, re.I)
+        if add_match:
+            _parse_table_item(action[add_match.end():], table)
+
+def parse_ddl(ddl_text):
+    """
+    Tables defined by the DDL, in definition order. DROP TABLE removes an earlier definition and a
+    later CREATE TABLE of the same name replaces it (the last definition wins); ALTER TABLE ... ADD
+    column/constraint statements are applied to the table they name.
+    """
+    tables = {} # lowercased name -> Table
+    for statement in split_top_level(strip_comments(ddl_text), ";"):
+        create_match = CREATE_TABLE_RE.match(statement)
+        if create_match:
+            table = Table(unquote_identifier(create_match.group(1)))
+            body, _ = _balanced_group(statement, create_match.end() - 1)
+            for item in split_top_level(body, ","):
+                _parse_table_item(item, table)
+            if table.name.lower() in tables:
+                logger.info(f"Table '{table.name}' is defined again; using the last definition.")
+                del tables[table.name.lower()]
+            tables[table.name.lower()] = table
+            continue
+        drop_match = DROP_TABLE_RE.match(statement)
+        if drop_match:
+            for name in split_top_level(drop_match.group(1), ","):
+                tables.pop(unquote_identifier(name).lower(), None)
+            continue
+        alter_match = ALTER_TABLE_RE.match(statement)
+        if alter_match:
+            _alter_table(alter_match, tables)
+            continue
+        logger.debug(f"Ignoring statement: {statement[:60]}")
+
+    for table in tables.values():
+        for name in table.unique_columns:
+            column = table.column(name)
+            if column:
+                column.unique = True
+        table.primary_key = [table.column(name).name if table.column(name) else name for name in table.primary_key]
+    if not tables:
+        raise DdlParseError("No CREATE TABLE statement found in the DDL.")
+    return list(tables.values())
+
+def _check_restrictions(expression, table):
+    """[(column, facet, lexical value)] for a CHECK of simple comparisons joined by AND, or None if it has anything else."""
+    expression = expression.strip()
+    masked = _mask_literals(expression)
+    if re.search(r"\bOR\b|\bNOT\b", masked, re.I):
+        return None
+    conjuncts, start = [], 0
+    for match in re.finditer(r"\s+AND\s+", masked, re.I):
+        piece = masked[start:match.start()]
+        if re.search(r"\bBETWEEN\b", piece, re.I) and not re.search(r"\bAND\b", piece, re.I):
+            continue # The AND of 'x BETWEEN a AND b' belongs to the comparison
+        conjuncts.append(expression[start:match.start()])
+        start = match.end()
+    conjuncts.append(expression[start:])
+
+    restrictions = []
+    for conjunct in conjuncts:
+        conjunct = conjunct.strip()
+        while conjunct.startswith("(") and _balanced_group(conjunct, 0)[1] == len(conjunct):
+            conjunct = conjunct[1:-1].strip()
+        between = BETWEEN_RE.match(conjunct)
+        comparison = COMPARISON_RE.match(conjunct)
+        if between:
+            column = table.column(unquote_identifier(between.group(1)))
+            bounds = [("minInclusive", between.group(2)), ("maxInclusive", between.group(3))]
+        elif comparison and comparison.group(1):
+            column = table.column(unquote_identifier(comparison.group(1)))
+            bounds = [(CHECK_FACETS[comparison.group(2)], comparison.group(3))]
+        elif comparison:
+            column = table.column(unquote_identifier(comparison.group(6)))
+            bounds = [(CHECK_FACETS[FLIPPED_OPERATORS[comparison.group(5)]], comparison.group(4))]
+        else:
+            return None
+        if column is None:
+            return None
+        restrictions.extend((column, facet, _unquote_literal(value)[0]) for facet, value in bounds)
+    return restrictions
+
+# --- OWL Emission ---
+
+def _plain_literal(lexical):
+    escaped = lexical.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    return f'"{escaped}"'
+
+def _literal(lexical, xsd_type):
+    return f"{_plain_literal(lexical)}^^xsd:{xsd_type}"
+
+def _default_literal(default, xsd_type):
+    """Typed literal of a DEFAULT, or None when it is not a constant (NULL, CURRENT_DATE, functions...)."""
+    value, quoted = _unquote_literal(default)
+    if not quoted:
+        upper = value.upper()
+        if xsd_type == "boolean" and upper in ("TRUE", "FALSE", "1", "0"):
+            value = "true" if upper in ("TRUE", "1") else "false"
+        elif not re.fullmatch(r"[-+]?\d+(?:\.\d+)?", value):
+            return None
+    elif xsd_type == "boolean":
+        value = value.lower()
+    return _literal(value, xsd_type)
+
+class OntologyWriter:
+    """Collects subjects with their predicate/object lists and renders them as Turtle in insertion order."""
+
+    def __init__(self, base_uri):
+        self.base_uri = base_uri
+        self.subjects = {} # term -> {predicate: [objects]}
+        self.sections = [] # (title, [terms])
+
+    def term(self, local_name):
+        if PN_LOCAL_RE.match(local_name):
+            return f"ex:{local_name}"
+        return f"<{self.base_uri}{quote(local_name, safe='')}>"
+
+    def section(self, title):
+        self.sections.append((title, []))
+
+    def add(self, subject, predicate, obj):
+        if subject not in self.subjects:
+            self.subjects[subject] = {}
+            self.sections[-1][1].append(subject)
+        objects = self.subjects[subject].setdefault(predicate, [])
+        if obj not in objects:
+            objects.append(obj)
+
+    def has(self, subject):
+        return subject in self.subjects
+
+    def render(self):
+        lines = [f"@prefix {prefix}: <{uri}> ." for prefix, uri in PREFIXES]
+        lines += [f"@prefix ex: <{self.base_uri}> .", "", "ex:ontology rdf:type owl:Ontology .", ""]
+        for title, subjects in self.sections:
+            if not subjects:
+                continue
+            lines += [f"# --- {title} ---", ""]
+            for subject in subjects:
+                predicates = list(self.subjects[subject].items())
+                for i, (predicate, objects) in enumerate(predicates):
+                    head = subject if i == 0 else "   "
+                    end = " ." if i == len(predicates) - 1 else " ;"
+                    separator = " ,\n        " if len(objects) > 1 and any(obj.startswith("[") for obj in objects) else " , "
+                    lines.append(f"{head} {predicate} {separator.join(objects)}{end}")
+                lines.append("")
+        return "\n".join(lines)
+
+def _restriction(on_property, constraint, literal):
+    return f"[ rdf:type owl:Restriction ; owl:onProperty {on_property} ; {constraint} {literal} ]"
+
+def _restricted_datatype(xsd_type, facets):
+    restrictions = " ".join(f"[ xsd:{facet} {_literal(value, xsd_type)} ]" for facet, value in facets)
+    return f"[ rdf:type rdfs:Datatype ; owl:onDatatype xsd:{xsd_type} ; owl:withRestrictions ( {restrictions} ) ]"
+
+def link_table_targets(table):
+    """(A, B) when the table is a link table: exactly two FKs whose columns make up its whole primary key."""
+    if len(table.foreign_keys) != 2 or not table.primary_key:
+        return None
+    if {column.lower() for column in table.primary_key} != table.foreign_key_columns:
+        return None
+    return table.foreign_keys[0].target_table, table.foreign_keys[1].target_table
+
+def compile_ontology(tables, base_uri=DEFAULT_BASE_URI):
+    """Turtle text for the parsed tables, plus counts of what was emitted and skipped."""
+    writer = OntologyWriter(base_uri)
+    known_tables = {table.name.lower(): table.name for table in tables}
+    stats = {"classes": 0, "datatype_properties": 0, "object_properties": 0, "restrictions": 0, "subclass_links": 0,
+             "link_tables": 0, "skipped_checks": 0, "skipped_defaults": 0, "undefined_targets": 0}
+    one = _literal("1", "nonNegativeInteger")
+    cls = lambda name: writer.term(known_tables.get(name.lower(), name))
+
+    for table in tables:
+        writer.section(f"Table: {table.name}")
+        class_term = cls(table.name)
+        writer.add(class_term, "rdf:type", "owl:Class")
+        writer.add(class_term, "rdfs:label", _plain_literal(table.name))
+        stats["classes"] += 1
+
+        # CHECK constraints become facets of the checked column's range
+        for expression in table.checks:
+            restrictions = _check_restrictions(expression, table)
+            if restrictions is None:
+                logger.warning(f"Table '{table.name}': CHECK ({expression.strip()}) is not a simple range comparison. Skipping.")
+                stats["skipped_checks"] += 1
+                continue
+            for column, facet, value in restrictions:
+                column.checks.append((facet, value))
+
+        fk_columns = table.foreign_key_columns
+        primary_key = {name.lower() for name in table.primary_key}
+        for column in table.columns.values():
+            if column.name.lower() in fk_columns:
+                continue # Represented by the FK's object property
+            prop = writer.term(f"{table.name}_{column.name}")
+            writer.add(prop, "rdf:type", "owl:DatatypeProperty")
+            if column.unique or column.name.lower() in primary_key:
+                writer.add(prop, "rdf:type", "owl:FunctionalProperty")
+            writer.add(prop, "rdfs:label", _plain_literal(column.name))
+            writer.add(prop, "rdfs:domain", class_term)
+            writer.add(prop, "rdfs:range", _restricted_datatype(column.xsd_type, column.checks) if column.checks else f"xsd:{column.xsd_type}")
+            stats["datatype_properties"] += 1
+            if column.not_null:
+                writer.add(class_term, "rdfs:subClassOf", _restriction(prop, "owl:minCardinality", one))
+            if column.name.lower() in primary_key:
+                writer.add(class_term, "rdfs:subClassOf", _restriction(prop, "owl:cardinality", one))
+            if column.default is not None:
+                literal = _default_literal(column.default, column.xsd_type)
+                if literal is None:
+                    logger.info(f"Table '{table.name}': DEFAULT {column.default} of '{column.name}' is not a constant. Skipping.")
+                    stats["skipped_defaults"] += 1
+                else:
+                    writer.add(class_term, "rdfs:subClassOf", _restriction(prop, "owl:hasValue", literal))
+
+        for fk in table.foreign_keys:
+            if fk.target_table.lower() not in known_tables:
+                logger.warning(f"Table '{table.name}': FOREIGN KEY ({', '.join(fk.columns)}) references '{fk.target_table}', which the DDL does not define.")
+                stats["undefined_targets"] += 1
+            target_name = known_tables.get(fk.target_table.lower(), fk.target_table)
+            prop = writer.term(f"{table.name}_has_{target_name}")
+            if not writer.has(prop):
+                stats["object_properties"] += 1
+            writer.add(prop, "rdf:type", "owl:ObjectProperty")
+            if target_name.lower() == table.name.lower():
+                writer.add(prop, "rdf:type", "owl:SymmetricProperty")
+            writer.add(prop, "rdfs:domain", class_term)
+            writer.add(prop, "rdfs:range", cls(target_name))
+            columns = [table.column(name) for name in fk.columns]
+            if columns and all(column is not None and column.not_null for column in columns):
+                writer.add(class_term, "rdfs:subClassOf", _restriction(prop, "owl:minCardinality", one))
+            target = next((t for t in tables if t.name.lower() == target_name.lower()), None)
+            target_key = [name.lower() for name in (fk.target_columns or (target.primary_key if target else []))]
+            if (target is not None and target is not table and sorted(name.lower() for name in fk.columns) == sorted(primary_key)
+                    and target_key and sorted(target_key) == sorted(name.lower() for name in target.primary_key)):
+                writer.add(class_term, "rdfs:subClassOf", cls(target_name))
+                stats["subclass_links"] += 1
+
+        link = link_table_targets(table)
+        if link:
+            source, target = (known_tables.get(name.lower(), name) for name in link)
+            forward, backward = writer.term(f"{source}_relatesVia{table.name}_{target}"), writer.term(f"{target}_relatesVia{table.name}_{source}")
+            for prop, domain, range_ in ((forward, source, target), (backward, target, source)):
+                if not writer.has(prop):
+                    stats["object_properties"] += 1
+                writer.add(prop, "rdf:type", "owl:ObjectProperty")
+                writer.add(prop, "rdfs:domain", cls(domain))
+                writer.add(prop, "rdfs:range", cls(range_))
+            if forward == backward:
+                writer.add(forward, "rdf:type", "owl:SymmetricProperty") # A link from a table to itself is its own inverse
+            else:
+                writer.add(forward, "owl:inverseOf", backward)
+            stats["link_tables"] += 1
+
+    stats["restrictions"] = sum(obj.startswith("[ rdf:type owl:Restriction") for predicates in writer.subjects.values()
+                                for obj in predicates.get("rdfs:subClassOf", []))
+    return writer.render(), stats
+
+def compile_ddl(ddl_text, base_uri=DEFAULT_BASE_URI):
+    """DDL text -> (Turtle text, stats)."""
+    return compile_ontology(parse_ddl(ddl_text), base_uri)
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile SQL DDL into an OWL ontology (Turtle) using the Tbox transformation rules.")
+    parser.add_argument("--ddl", default=os.path.join(SCRIPT_DIR, DDL_FILENAME))
+    parser.add_argument("--output", default=os.path.join(SCRIPT_DIR, OUTPUT_FILENAME))
+    parser.add_argument("--base-uri", default=DEFAULT_BASE_URI, help="Namespace of the generated classes and properties ('ex:')")
+    args = parser.parse_args()
+
+    try:
+        with open(args.ddl, 'r', encoding='utf-8') as f:
+            ddl_text = f.read()
+    except OSError as e:
+        logger.error(f"Could not read DDL file {args.ddl}: {e}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    try:
+        ttl_text, compile_stats = compile_ddl(ddl_text, args.base_uri)
+    except DdlParseError as e:
+        logger.error(f"{e} ({args.ddl})")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(ttl_text)
+    logger.info(f"Compiled {compile_stats['classes']} classes, {compile_stats['datatype_properties']} datatype properties, "
+                f"{compile_stats['object_properties']} object properties, {compile_stats['restrictions']} restrictions, "
+                f"{compile_stats['subclass_links']} subclass links and {compile_stats['link_tables']} link tables in {elapsed * 1000:.1f} ms "
+                f"(skipped checks: {compile_stats['skipped_checks']}, skipped defaults: {compile_stats['skipped_defaults']}, "
+                f"undefined FK targets: {compile_stats['undefined_targets']}). Wrote {args.output}")
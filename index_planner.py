@@ -0,0 +1,44 @@
+import os
+import sys
+import logging
+import argparse
+
+from datagen_runtime.index_planner import load_schema, plan_schema_indexes, build_index_statements, apply_index_plan
+
+# --- Configuration ---
+SCHEMA_FILENAME = "schema_analysis.json"
+QUESTIONS_FILENAME = "questions.txt" # Pipe-delimited eg_id|question|query_example
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE_PATH = os.path.join(SCRIPT_DIR, SCHEMA_FILENAME)
+QUESTIONS_FILE_PATH = os.path.join(SCRIPT_DIR, QUESTIONS_FILENAME)
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Plan (and optionally apply) constraints and indexes from the schema analysis.")
+    parser.add_argument("--schema", default=SCHEMA_FILE_PATH, help="Path to schema_analysis.json")
+    parser.add_argument("--questions", default=QUESTIONS_FILE_PATH, help="Path to questions.txt with query examples")
+    parser.add_argument("--apply", action="store_true", help="Apply the plan to Neo4j (connection settings from load_cypher.py)")
+    args = parser.parse_args()
+
+    schema = load_schema(args.schema)
+    if not schema:
+        print(f"Error: Could not load schema file {args.schema}. Exiting.")
+        sys.exit(1)
+
+    index_plan = plan_schema_indexes(schema, args.questions)
+    index_statements = build_index_statements(index_plan)
+    if not args.apply:
+        for statement in index_statements:
+            print(f"{statement};")
+        sys.exit(0)
+
+    from neo4j import GraphDatabase
+    from load_cypher import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    try:
+        applied = apply_index_plan(driver, NEO4J_DATABASE, index_statements)
+    finally:
+        driver.close()
+    sys.exit(0 if applied else 1)
@@ -0,0 +1,115 @@
+import re
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Characters that matter outside / inside JSON strings; everything else is skipped with one regex search
+_STRUCTURAL_RE = re.compile(r'["{}\[\],]')
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a streamed JSON object or array (e.g. an agent response streamed chunk by
+    chunk). feed() returns every top-level entry that closed within the new text, as (key, value)
+    pairs for an object or (position, value) for an array, so callers can validate and merge entries
+    while the stream is still running. Text before the first '{' or '[' (```json fences, prose) is
+    ignored. Only the text of the entry currently being streamed is kept in memory.
+
+    An entry that does not parse is recorded in `errors` and skipped; parsing continues with the next
+    entry. `complete` turns True once the top-level value closes.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.errors = []
+        self.complete = False
+        self._container = None # '{' or '[' once the top-level value opened
+        self._buffer = "" # Text from the start of the current entry
+        self._scan = 0 # Position in _buffer where scanning resumes
+        self._entry_start = 0
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, text):
+        """Consumes the next chunk of streamed text and returns the entries completed by it."""
+        if self.complete or not text:
+            return []
+        emitted = []
+        buf = self._buffer + text
+        i = self._scan
+        while i < len(buf):
+            if self._container is None:
+                starts = [pos for pos in (buf.find("{", i), buf.find("[", i)) if pos != -1]
+                if not starts:
+                    i = len(buf)
+                    break
+                i = min(starts)
+                self._container = buf[i]
+                self._depth = 1
+                i += 1
+                self._entry_start = i
+                continue
+            if self._in_string:
+                match = _STRING_SPECIAL_RE.search(buf, i)
+                if not match:
+                    i = len(buf)
+                    break
+                if match.group() == "\\":
+                    i = match.end() + 1 # Skip the escaped character (may lie in the next chunk)
+                else:
+                    self._in_string = False
+                    i = match.end()
+                continue
+            match = _STRUCTURAL_RE.search(buf, i)
+            if not match:
+                i = len(buf)
+                break
+            char, i = match.group(), match.end()
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buf[self._entry_start:i - 1], emitted)
+                    self.complete = True
+                    break
+            elif self._depth == 1: # Top-level ','
+                self._emit(buf[self._entry_start:i - 1], emitted)
+                self._entry_start = i
+        # Keep only the entry still in progress
+        self._buffer = buf[self._entry_start:] if self._container and not self.complete else ""
+        self._scan = i - self._entry_start if self._container and not self.complete else 0
+        self._entry_start = 0
+        return emitted
+
+    def _emit(self, entry_text, emitted):
+        if not entry_text.strip(): # Trailing comma or empty container
+            return
+        try:
+            if self._container == "{":
+                parsed = list(json.loads("{" + entry_text + "}").items())
+            else:
+                parsed = [(len(self.entries), json.loads("[" + entry_text + "]")[0])]
+        except (json.JSONDecodeError, IndexError) as e:
+            message = f"Invalid entry {entry_text.strip()[:60]!r}...: {e}"
+            logger.warning(f"Streamed JSON: {message}")
+            self.errors.append(message)
+            return
+        self.entries.extend(parsed)
+        emitted.extend(parsed)
+
+    def result(self):
+        """The entries parsed so far as a dict (object) or list (array); None before the value opened."""
+        if self._container == "{":
+            return dict(self.entries)
+        if self._container == "[":
+            return [value for _, value in self.entries]
+        return None
+
+    @property
+    def ok(self):
+        """True when the whole value streamed in and every entry parsed."""
+        return self.complete and not self.errors
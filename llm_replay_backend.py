@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from llm_response_cache import cache_key, describe_agent
+from schema_rule_analyzer import analyze_schema as analyze_schema_with_rules
+from token_budget_batcher import estimate_tokens, CHARS_PER_TOKEN
+
+# --- Configuration ---
+DEFAULT_TOKENS_PER_SECOND = 80.0 # Streaming rate of replayed responses (0 = no delay)
+DEFAULT_FIRST_TOKEN_LATENCY = 0.5 # Seconds before the first chunk of a response
+DEFAULT_CHUNK_TOKENS = 20 # Tokens per streamed chunk
+SYNTHETIC_VALUES_PER_PROPERTY = 5 # Values per String property in synthesized value lists
+BACKEND_ENV_VAR = "SYNTHDATA_LLM_BACKEND" # 'replay' switches the Streamlit apps to this backend
+REPLAY_SOURCE_ENV_VAR = "SYNTHDATA_REPLAY_SOURCE" # llm_response_cache.sqlite or a JSON recording
+TOKENS_PER_SECOND_ENV_VAR = "SYNTHDATA_REPLAY_TOKENS_PER_SECOND"
+FIRST_TOKEN_LATENCY_ENV_VAR = "SYNTHDATA_REPLAY_FIRST_TOKEN_LATENCY"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SYNTHETIC_SCRIPT_FILENAME = "datagen_script.py" # Stands in for the PythonCodeGenerator output
+
+logger = logging.getLogger(__name__)
+
+class ReplayMissError(LookupError):
+    """No recorded response for a call and synthesizing is disabled (strict mode)."""
+
+class ReplayResponse:
+    """Run response / stream chunk with agno's `.content` and `.metrics` (token counts as lists, one entry per call)."""
+
+    def __init__(self, content, input_tokens=None, output_tokens=None):
+        self.content = content
+        self.metrics = {"input_tokens": [input_tokens], "output_tokens": [output_tokens]} if input_tokens is not None else {}
+
+# --- Recordings ---
+
+def load_recordings(path):
+    """
+    Loads recorded responses from an LLM response cache (.sqlite, keyed by cache_key; rows without a
+    model id did not come from a live model and are skipped) or a JSON file with
+    {"responses": [{"agent": name, "message": input, "content": output}, ...]}.
+    Returns (by_key, model_ids_by_agent, by_agent_message).
+    """
+    by_key, model_ids, by_message = {}, {}, {}
+    if path.endswith(".sqlite"):
+        conn = sqlite3.connect(path)
+        try:
+            for key, agent_name, model_id, content in conn.execute("SELECT key, agent_name, model_id, content FROM responses WHERE model_id IS NOT NULL"):
+                by_key[key] = content
+                model_ids.setdefault(agent_name, set()).add(model_id)
+        finally:
+            conn.close()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            recording = json.load(f)
+        for entry in recording.get("responses", []):
+            by_message[(entry.get("agent"), entry.get("message"))] = entry.get("content", "")
+    logger.info(f"Loaded {len(by_key) + len(by_message)} recorded response(s) from {path}")
+    return by_key, model_ids, by_message
+
+# --- Synthetic Responses ---
+
+def _message_json(message):
+    try:
+        return json.loads(message)
+    except (TypeError, json.JSONDecodeError):
+        return {}
+
+def _synthetic_schema_analysis(message):
+    analysis, _, _ = analyze_schema_with_rules(_message_json(message))
+    return json.dumps(analysis)
+
+def _synthetic_generation_plan(message):
+    request = _message_json(message)
+    stores, customers = request.get("num_stores", 50), request.get("num_customers", 1000)
+    counts = {}
+    for label in request.get("schema_analysis", {}).get("nodes", {}):
+        counts[label] = customers if label == "Customer" else stores if label == "Store" else max(1, stores)
+    return json.dumps(counts)
+
+def _synthetic_value_lists(message):
+    nodes = _message_json(message).get("schema_analysis", {}).get("nodes", {})
+    value_lists = {}
+    for label, details in nodes.items():
+        props = {p.get("name"): [f"{label} {p.get('name')} {i + 1}" for i in range(SYNTHETIC_VALUES_PER_PROPERTY)]
+                 for p in details.get("properties", []) if p.get("type") == "String" and p.get("name") != details.get("id_property")}
+        if props:
+            value_lists[label] = props
+    return json.dumps(value_lists, indent=2)
+
+def _synthetic_generation_rules(message):
+    return json.dumps({
+        "type_ranges": {
+            "integer": {"default": [0, 1000]},
+            "float": {"default": [0.0, 1000.0]},
+            "date": {"default": ["2020-01-01", "NOW"]},
+            "datetime": {"default": ["2020-01-01T00:00:00", "NOW_DATETIME"]},
+        },
+        "property_dependencies": [],
+        "derived_properties": [],
+    }, indent=2)
+
+def _synthetic_code(message):
+    try:
+        with open(os.path.join(SCRIPT_DIR, SYNTHETIC_SCRIPT_FILENAME), "r", encoding="utf-8") as f:
+            script = f.read()
+    except OSError:
+        script = "print('Replayed data generation script')"
+    return f"```python\n{script}\n```"
+
+SYNTHETIC_RESPONDERS = {
+    "SchemaAnalyzer": _synthetic_schema_analysis,
+    "DataPlanner": _synthetic_generation_plan,
+    "ValueListGenerator": _synthetic_value_lists,
+    "GenerationRuleGenerator": _synthetic_generation_rules,
+    "PythonCodePlanner": lambda message: "# Code Plan\n\n1. Load the configuration files.\n2. Generate nodes.\n3. Generate relationships.\n4. Write Cypher.\n",
+    "PythonCodeGenerator": _synthetic_code,
+}
+
+def synthetic_response(agent_name, message):
+    """Deterministic stand-in output of the named agent for `message` (a short echo for unknown agents)."""
+    responder = SYNTHETIC_RESPONDERS.get(agent_name)
+    if responder:
+        return responder(message)
+    return f"Replayed response for {agent_name or 'agent'} ({estimate_tokens(message)} input tokens)."
+
+# --- Backend ---
+
+class ReplayBackend:
+    """
+    Stand-in LLM backend: returns recorded responses (or synthesized ones when none is recorded and
+    strict is off) and streams them at `tokens_per_second` after `first_token_latency`, so batching
+    and concurrency changes can be measured offline and repeatably. wrap(agent) returns a drop-in
+    agent; every call is logged in `calls` as {agent, source, started, ttft, elapsed, input_tokens, output_tokens}.
+    """
+
+    def __init__(self, recordings_path=None, tokens_per_second=DEFAULT_TOKENS_PER_SECOND,
+                 first_token_latency=DEFAULT_FIRST_TOKEN_LATENCY, chunk_tokens=DEFAULT_CHUNK_TOKENS, strict=False):
+        self.tokens_per_second = tokens_per_second
+        self.first_token_latency = first_token_latency
+        self.chunk_tokens = chunk_tokens
+        self.strict = strict
+        self.by_key, self.model_ids, self.by_message = load_recordings(recordings_path) if recordings_path else ({}, {}, {})
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def wrap(self, agent):
+        return ReplayAgent(agent, self)
+
+    def lookup(self, agent, message):
+        """Returns (content, source) where source is 'recorded' or 'synthetic'."""
+        agent_name, _, instructions = describe_agent(agent)
+        if (agent_name, message) in self.by_message:
+            return self.by_message[(agent_name, message)], "recorded"
+        # Recordings carry the live model id; the replayed agent may have none, so try every recorded one
+        for recorded_model_id in self.model_ids.get(agent_name, set()):
+            content = self.by_key.get(cache_key(agent_name, recorded_model_id, instructions, message))
+            if content is not None:
+                return content, "recorded"
+        if self.strict:
+            raise ReplayMissError(f"No recorded response for {agent_name} ({estimate_tokens(message)} input tokens).")
+        return synthetic_response(agent_name, message), "synthetic"
+
+    def delay(self, tokens):
+        return tokens / self.tokens_per_second if self.tokens_per_second and self.tokens_per_second > 0 else 0.0
+
+    def record_call(self, call):
+        with self._lock:
+            self.calls.append(call)
+
+class ReplayAgent:
+    """Drop-in for an agno Agent's run(message, stream) that answers from a ReplayBackend."""
+
+    def __init__(self, agent, backend):
+        self.agent = agent
+        self.backend = backend
+        self.name = getattr(agent, "name", None)
+        self.model = getattr(agent, "model", None)
+        self.instructions = getattr(agent, "instructions", None)
+
+    def deep_copy(self):
+        return self # Stateless; safe to share between concurrent batch calls
+
+    def run(self, message, stream=False, **kwargs):
+        content, source = self.backend.lookup(self.agent, message)
+        call = {"agent": self.name, "source": source, "started": time.monotonic(), "ttft": None, "elapsed": None,
+                "input_tokens": estimate_tokens(message), "output_tokens": estimate_tokens(content)}
+        if stream:
+            return self._stream(content, call)
+        time.sleep(self.backend.first_token_latency + self.backend.delay(call["output_tokens"]))
+        call["ttft"] = call["elapsed"] = time.monotonic() - call["started"]
+        self.backend.record_call(call)
+        return ReplayResponse(content, call["input_tokens"], call["output_tokens"])
+
+    def _stream(self, content, call):
+        chunk_chars = max(1, self.backend.chunk_tokens * CHARS_PER_TOKEN)
+        time.sleep(self.backend.first_token_latency)
+        for start in range(0, len(content), chunk_chars):
+            if start:
+                time.sleep(self.backend.delay(self.backend.chunk_tokens))
+            if call["ttft"] is None:
+                call["ttft"] = time.monotonic() - call["started"]
+            yield ReplayResponse(content[start:start + chunk_chars])
+        call["elapsed"] = time.monotonic() - call["started"]
+        self.backend.record_call(call)
+
+def backend_from_env():
+    """A ReplayBackend when SYNTHDATA_LLM_BACKEND=replay (configured by the SYNTHDATA_REPLAY_* variables), else None."""
+    if os.getenv(BACKEND_ENV_VAR, "").lower() != "replay":
+        return None
+    backend = ReplayBackend(
+        recordings_path=os.getenv(REPLAY_SOURCE_ENV_VAR) or None,
+        tokens_per_second=float(os.getenv(TOKENS_PER_SECOND_ENV_VAR, DEFAULT_TOKENS_PER_SECOND)),
+        first_token_latency=float(os.getenv(FIRST_TOKEN_LATENCY_ENV_VAR, DEFAULT_FIRST_TOKEN_LATENCY)),
+    )
+    logger.info(f"Using the replay LLM backend ({backend.tokens_per_second} tokens/s, {backend.first_token_latency}s first-token latency).")
+    return backend
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+
+# --- Configuration ---
+CACHE_FILENAME = "llm_response_cache.sqlite" # Created in the agent output directory
+
+logger = logging.getLogger(__name__)
+
+# --- Helper Functions ---
+
+def cache_key(agent_name, model_id, instructions, message):
+    """Content address of one agent call: SHA-256 over (agent name, model id, instructions, input message)."""
+    payload = json.dumps([agent_name, model_id, instructions, message], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def describe_agent(agent):
+    """Returns (agent name, model id, instructions) for an agno-style agent; everything that shapes its output."""
+    model = getattr(agent, "model", None)
+    model_id = getattr(model, "id", None) or (str(model) if model is not None else None)
+    instructions = {
+        "instructions": getattr(agent, "instructions", None),
+        "description": getattr(agent, "description", None),
+        "expected_output": getattr(agent, "expected_output", None),
+    }
+    return getattr(agent, "name", None) or type(agent).__name__, model_id, instructions
+
+class _CachedChunk:
+    """Minimal stand-in for a run response / stream chunk: only `.content` is used by the workflow."""
+
+    def __init__(self, content):
+        self.content = content
+
+# --- Cache ---
+
+class LLMResponseCache:
+    """
+    Persistent SQLite cache of agent outputs keyed by cache_key(). With `bypass` set, lookups
+    always miss (fresh outputs still overwrite the stored entries). Hit/miss counts are kept
+    per workflow step for display.
+    """
+
+    def __init__(self, db_path, bypass=False):
+        self.db_path = db_path
+        self.bypass = bypass
+        self.stats = defaultdict(lambda: {"hits": 0, "misses": 0, "saved_seconds": 0.0})
+        self._lock = threading.Lock() # One connection shared by the batch worker threads
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, agent_name TEXT, model_id TEXT, content TEXT NOT NULL,"
+                " elapsed_seconds REAL, created_at REAL)"
+            )
+
+    def get(self, key, step):
+        """Returns (content, original elapsed seconds) on a hit, or None on a miss/bypass."""
+        row = None
+        if not self.bypass:
+            with self._lock:
+                row = self._conn.execute("SELECT content, elapsed_seconds FROM responses WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row is None:
+                self.stats[step]["misses"] += 1
+            else:
+                self.stats[step]["hits"] += 1
+                self.stats[step]["saved_seconds"] += row[1] or 0.0
+        return row
+
+    def put(self, key, agent_name, model_id, content, elapsed_seconds):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, agent_name, model_id, content, elapsed_seconds, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, agent_name, model_id, content, elapsed_seconds, time.time()),
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM responses").rowcount
+        logger.info(f"Cleared {deleted} cached LLM responses from {self.db_path}")
+        return deleted
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+
+    def format_stats(self):
+        """One line per step, e.g. 'ValueListGenerator: 12 hits / 2 misses (~310s saved)'."""
+        with self._lock:
+            return [f"{step}: {s['hits']} hit(s) / {s['misses']} miss(es) (~{s['saved_seconds']:.0f}s saved)"
+                    for step, s in sorted(self.stats.items())]
+
+    def wrap(self, agent, step=None, validate=None):
+        """Returns a CachedAgent around `agent`; `validate(text)` decides whether an output is worth storing."""
+        return CachedAgent(agent, self, step or getattr(agent, "name", None) or type(agent).__name__, validate)
+
+class CachedAgent:
+    """
+    Drop-in wrapper exposing the agent's run(message, stream) API. Hits are returned instantly
+    (as a single chunk when streaming); misses call the wrapped agent and store its complete
+    output, unless it fails `validate` (so a malformed answer is retried next run).
+    """
+
+    def __init__(self, agent, cache, step, validate=None):
+        self.agent = agent
+        self.cache = cache
+        self.step = step
+        self.validate = validate
+        self.name = getattr(agent, "name", None)
+
+    def deep_copy(self):
+        """Per-call copy for concurrent batch execution; the cache itself is shared."""
+        inner = self.agent.deep_copy() if hasattr(self.agent, "deep_copy") else self.agent
+        return CachedAgent(inner, self.cache, self.step, self.validate)
+
+    def _key(self, message):
+        agent_name, model_id, instructions = describe_agent(self.agent)
+        return cache_key(agent_name, model_id, instructions, message), agent_name, model_id
+
+    def _store(self, key, agent_name, model_id, content, started):
+        if content and (self.validate is None or self.validate(content)):
+            self.cache.put(key, agent_name, model_id, content, time.monotonic() - started)
+        else:
+            logger.info(f"{self.step}: output not cached (empty or failed validation).")
+
+    def run(self, message, stream=False, **kwargs):
+        key, agent_name, model_id = self._key(message)
+        cached = self.cache.get(key, self.step)
+        if cached is not None:
+            logger.info(f"{self.step}: LLM cache hit ({key[:12]}).")
+            return iter([_CachedChunk(cached[0])]) if stream else _CachedChunk(cached[0])
+        if stream:
+            return self._run_stream(key, agent_name, model_id, message, **kwargs)
+        started = time.monotonic()
+        response = self.agent.run(message=message, stream=False, **kwargs)
+        self._store(key, agent_name, model_id, getattr(response, "content", None), started)
+        return response
+
+    def _run_stream(self, key, agent_name, model_id, message, **kwargs):
+        started = time.monotonic()
+        chunks = []
+        for chunk in self.agent.run(message=message, stream=True, **kwargs):
+            if chunk is not None and getattr(chunk, "content", None):
+                chunks.append(chunk.content)
+            yield chunk
+        # Only reached when the stream completed without raising
+        self._store(key, agent_name, model_id, "".join(chunks), started)
+
+def open_response_cache(output_dir, bypass=False):
+    """Opens (creating if needed) the response cache in output_dir."""
+    return LLMResponseCache(os.path.join(output_dir, CACHE_FILENAME), bypass=bypass)
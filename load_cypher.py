@@ -1,9 +1,19 @@
 import os
-from neo4j import GraphDatabase
+import math
+import time
 import logging
+import argparse
 import re # Import the 're' module for regular expressions
 import json # Import the json module
 
+try:
+    from neo4j import GraphDatabase
+except ImportError:
+    GraphDatabase = None # Only needed to connect; execute_cypher_file accepts any driver (e.g. the benchmark's stub)
+
+from datagen_runtime.compression import open_text # Reads .cypher.gz / .cypher.zst as a stream
+from datagen_runtime.metrics import RunMetrics
+
 # --- Configuration ---
 NEO4J_URI = "neo4j://localhost:7687"  # Replace with your Neo4j URI
 NEO4J_USER = "neo4j"         # Replace with your Neo4j username
@@ -17,57 +27,157 @@ except NameError:
     # Fallback for environments where __file__ is not defined (e.g., interactive interpreters)
     SCRIPT_DIR = os.getcwd()
 
-CYPHER_FILE_PATH = os.path.join(SCRIPT_DIR, "generated_data.cypher") # Explicitly set absolute path
+CYPHER_FILE_PATH = os.path.join(SCRIPT_DIR, "generated_data.cypher") # Explicitly set absolute path; .cypher.gz / .cypher.zst also work
+LOAD_METRICS_PATH = os.path.join(SCRIPT_DIR, "load_metrics.json") # Per-block parse/execute timings of the last load
+LOAD_PROFILE_PATH = os.path.join(SCRIPT_DIR, "load_profile.prof") # Written with --profile
+PARSE_PHASE = "parse" # Reading, decompressing and JSON-decoding a block's lines
+EXECUTE_PHASE = "execute" # Running the block in its write transaction
+# Server-side batching (--batching): a block with more rows than the current batch size runs as
+# CALL { ... } IN TRANSACTIONS OF N ROWS (or apoc.periodic.iterate) in an auto-commit transaction,
+# so the database commits it in chunks instead of holding the whole :param block in one transaction
+BATCHING_MODES = ("none", "in-transactions", "apoc")
+DEFAULT_BATCH_ROWS = 10000 # Starting N (rows per server-side transaction)
+MIN_BATCH_ROWS = 500 # N is not shrunk below this; a block failing at this size stops the load
+MAX_BATCH_ROWS = 200000
+GROW_BELOW_SECONDS = 1.0 # Double N while a chunk commits faster than this
+SHRINK_ABOVE_SECONDS = 10.0 # Halve N when a chunk takes longer than this
+RETRY_SHRINK_FACTOR = 4 # N is divided by this after a memory error or timeout, then the block is rerun
+RETRYABLE_ERROR_MARKERS = ("MemoryPoolOutOfMemoryError", "OutOfMemory", "TransactionTimedOut", "Timeout", "timed out")
 
 # Logging Setup
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def execute_cypher_file(driver, filepath, database):
-    """Reads a Cypher file, cleans comments, and executes its statements transactionally."""
+def iter_cypher_lines(f):
+    """Yields the stripped, non-empty, non-comment lines of an open Cypher script as they are read."""
+    for line in f:
+        stripped_line = line.strip()
+        if stripped_line and not stripped_line.startswith('//'):
+            yield stripped_line
+
+UNWIND_PATTERN = re.compile(r"UNWIND\s+\$([a-zA-Z0-9_]+)\s+AS\s+([a-zA-Z0-9_]+)", re.IGNORECASE) # $param and row variable of a block
+
+class ServerSideBatching:
+    """
+    Runs large UNWIND blocks in server-side chunks with an adaptive chunk size N: after each block N
+    doubles while the average chunk commits within GROW_BELOW_SECONDS and halves above
+    SHRINK_ABOVE_SECONDS. A memory error or timeout divides N by RETRY_SHRINK_FACTOR, caps later
+    growth below the failed size and reruns the block; the chunks committed before the failure are
+    written again, which MERGE blocks absorb.
+    CREATE blocks (--relationship-mode create) are not rerun, since that would duplicate them.
+    """
+
+    def __init__(self, mode="in-transactions", batch_rows=DEFAULT_BATCH_ROWS, min_rows=MIN_BATCH_ROWS, max_rows=MAX_BATCH_ROWS):
+        if mode not in BATCHING_MODES[1:]:
+            raise ValueError(f"Unknown batching mode '{mode}'. Choose one of: {', '.join(BATCHING_MODES[1:])}.")
+        self.mode = mode
+        self.min_rows, self.max_rows = min_rows, max(min_rows, max_rows)
+        self.batch_rows = min(max(batch_rows, self.min_rows), self.max_rows)
+
+    def applies(self, statements, params):
+        """Only UNWIND blocks whose rows exceed one chunk are batched; smaller ones keep their single transaction."""
+        rows = sum(len(value) for value in params.values() if isinstance(value, list))
+        return bool(statements) and UNWIND_PATTERN.match(statements[0]) is not None and rows > self.batch_rows
+
+    def _query(self, statements, params):
+        """The block rewritten for the current chunk size, with its parameters."""
+        param_name, variable = UNWIND_PATTERN.match(statements[0]).groups()
+        body = statements[1:]
+        if self.mode == "in-transactions":
+            query = "\n".join([statements[0], f"CALL {{ WITH {variable}", *body, f"}} IN TRANSACTIONS OF {self.batch_rows} ROWS"])
+            return query, params
+        query = ("CALL apoc.periodic.iterate($outer_query, $inner_query, {batchSize: $batch_rows, parallel: false, params: $block_params}) "
+                 "YIELD batches, failedBatches, errorMessages RETURN batches, failedBatches, errorMessages")
+        return query, {"outer_query": f"UNWIND ${param_name} AS {variable} RETURN {variable}", "inner_query": "\n".join(body),
+                       "batch_rows": self.batch_rows, "block_params": params}
+
+    def _adapt(self, rows, seconds):
+        chunk_seconds = seconds / max(1, math.ceil(rows / self.batch_rows))
+        if chunk_seconds < GROW_BELOW_SECONDS:
+            self.batch_rows = min(self.max_rows, self.batch_rows * 2)
+        elif chunk_seconds > SHRINK_ABOVE_SECONDS:
+            self.batch_rows = max(self.min_rows, self.batch_rows // 2)
+
+    def run(self, session, statements, params):
+        rows = sum(len(value) for value in params.values() if isinstance(value, list))
+        rerunnable = not any(statement.upper().startswith("CREATE (") for statement in statements)
+        while True:
+            query, query_params = self._query(statements, params)
+            started = time.perf_counter()
+            try:
+                records = list(session.run(query, parameters=query_params)) # Auto-commit: IN TRANSACTIONS cannot run inside execute_write
+                failed = [r for r in records if r.get("failedBatches")] if self.mode == "apoc" else []
+                if failed:
+                    raise RuntimeError(f"apoc.periodic.iterate failed {failed[0]['failedBatches']} batch(es): {failed[0]['errorMessages']}")
+            except Exception as e:
+                retryable = any(marker in f"{getattr(e, 'code', '')} {e}" for marker in RETRYABLE_ERROR_MARKERS)
+                if not retryable or not rerunnable or self.batch_rows <= self.min_rows:
+                    raise
+                self.max_rows = max(self.min_rows, self.batch_rows // 2) # Never grow back to a size that failed
+                self.batch_rows = max(self.min_rows, self.batch_rows // RETRY_SHRINK_FACTOR)
+                logging.warning(f"  Block of {rows} rows failed ({e}); rerunning it with {self.batch_rows} rows per transaction.")
+                continue
+            seconds = time.perf_counter() - started
+            logging.info(f"  Committed {rows} rows in transactions of {self.batch_rows} rows ({seconds:.3f}s).")
+            self._adapt(rows, seconds)
+            return
+
+def execute_cypher_file(driver, filepath, database, metrics=None, batching=None):
+    """
+    Streams a Cypher file (plain, .gz or .zst), skips comments, and executes its statements
+    transactionally. Lines are parsed as they are decompressed, so neither the script nor its
+    expanded text is held in memory or written to disk; each :param is released once the UNWIND
+    block that uses it has run. With a RunMetrics, every block's parse time (everything since the
+    previous block ran) and execute time are recorded. With a ServerSideBatching, blocks larger than
+    its chunk size are committed server-side in chunks.
+    """
     if not os.path.exists(filepath):
         logging.error(f"Cypher file not found: {filepath}")
         return
 
     logging.info(f"Reading Cypher file: {filepath}")
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            # Read the whole file
-            full_cypher_script = f.read()
-
+        cypher_file = open_text(filepath, 'r')
     except Exception as e:
         logging.error(f"Error reading Cypher file {filepath}: {e}")
         return
 
-    # Clean the entire script: remove comment lines
-    cleaned_lines = []
-    for line in full_cypher_script.splitlines():
-        stripped_line = line.strip()
-        if stripped_line and not stripped_line.startswith('//'):
-            cleaned_lines.append(stripped_line)
-
     logging.info(f"Processing Cypher statements from {filepath} against database '{database}'...")
 
     # Use try-with-resources for session management
     try:
-        with driver.session(database=database) as session:
+        with cypher_file, driver.session(database=database) as session:
             current_parameters = {} # To store parsed :param values
             statement_buffer = []   # To accumulate multi-line statements (UNWIND blocks)
             active_param_name_for_block = None # Tracks the $param for the current UNWIND block
             count = 0
+            block_started = time.perf_counter()
 
             def execute_buffer(s_buffer, params_for_run):
-                nonlocal count
+                nonlocal count, block_started
                 if not s_buffer:
                     return
                 full_query = "\n".join(s_buffer).strip()
                 if full_query:
                     logging.debug(f"Executing block: {full_query[:200]}... with params: {list(params_for_run.keys()) if params_for_run else 'None'}")
-                    session.execute_write(lambda tx: tx.run(full_query, parameters=params_for_run))
+                    execute_started = time.perf_counter()
+                    if batching is not None and params_for_run and batching.applies(s_buffer, params_for_run):
+                        batching.run(session, s_buffer, params_for_run)
+                    else:
+                        session.execute_write(lambda tx: tx.run(full_query, parameters=params_for_run))
+                    executed = time.perf_counter()
                     count +=1
-                    logging.info(f"  Executed statement block. Total blocks/statements executed: {count}")
+                    parse_seconds, execute_seconds = execute_started - block_started, executed - execute_started
+                    logging.info(f"  Executed statement block (parse {parse_seconds:.3f}s, execute {execute_seconds:.3f}s). "
+                                 f"Total blocks/statements executed: {count}")
+                    if metrics is not None:
+                        metrics.add_time(PARSE_PHASE, parse_seconds)
+                        metrics.add_time(EXECUTE_PHASE, execute_seconds)
+                        rows = sum(len(value) for value in params_for_run.values() if isinstance(value, list))
+                        metrics.record_block(next(iter(params_for_run), full_query.splitlines()[0][:80]), rows, parse_seconds, execute_seconds)
+                    block_started = time.perf_counter()
                 s_buffer.clear()
 
-            for line_num, raw_line in enumerate(cleaned_lines):
+            for line_num, raw_line in enumerate(iter_cypher_lines(cypher_file)):
                 line = raw_line.strip().rstrip(';') # Remove trailing semicolons for consistency
 
                 if not line: continue
@@ -77,7 +187,8 @@ def execute_cypher_file(driver, filepath, database):
                 is_constraint_or_index = "CONSTRAINT IF NOT EXISTS" in line.upper() or \
                                          "INDEX IF NOT EXISTS" in line.upper() or \
                                          line.upper().startswith("CREATE CONSTRAINT") or \
-                                         line.upper().startswith("CREATE INDEX")
+                                         line.upper().startswith("CREATE INDEX") or \
+                                         line.upper().startswith("CALL DB.AWAITINDEXES") # Blocks until indexes are ONLINE
 
                 # If we hit a new :PARAM or a new UNWIND $ or a constraint/index,
                 # and the buffer has content, execute the buffered content.
@@ -85,6 +196,8 @@ def execute_cypher_file(driver, filepath, database):
                     params_to_use = {active_param_name_for_block: current_parameters[active_param_name_for_block]} \
                                     if active_param_name_for_block and active_param_name_for_block in current_parameters else {}
                     execute_buffer(statement_buffer, params_to_use)
+                    if active_param_name_for_block:
+                        current_parameters.pop(active_param_name_for_block, None) # Each :param feeds one block; keeps memory at one block
                     active_param_name_for_block = None # Reset for the new block
 
                 if is_param_def:
@@ -110,7 +223,8 @@ def execute_cypher_file(driver, filepath, database):
                             active_param_name_for_block = None # Invalidate
                     statement_buffer.append(line) # Add the UNWIND line
                 elif is_constraint_or_index:
-                    # Execute constraints/indexes immediately as they are standalone
+                    # Execute constraints/indexes (and the index wait) immediately as they are standalone,
+                    # so they are in place before the first data block runs
                     execute_buffer([line], {}) # Pass empty params
                 elif line: # Any other line, could be MERGE, SET, etc.
                     statement_buffer.append(line)
@@ -134,6 +248,21 @@ def execute_cypher_file(driver, filepath, database):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load a generated Cypher script (plain, .cypher.gz or .cypher.zst) into Neo4j.")
+    parser.add_argument("cypher_file", nargs="?", default=CYPHER_FILE_PATH)
+    parser.add_argument("--metrics-output", default=LOAD_METRICS_PATH, help="Where the per-block parse/execute timings (JSON) go")
+    parser.add_argument("--profile", action="store_true", help=f"Run the load under cProfile (saved to {LOAD_PROFILE_PATH})")
+    parser.add_argument("--batching", choices=BATCHING_MODES, default="none",
+                        help="Commit large blocks server-side in chunks: CALL { ... } IN TRANSACTIONS (Neo4j 4.4+) or apoc.periodic.iterate")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS, help="Starting rows per server-side transaction (adapted per block)")
+    args = parser.parse_args()
+    batching = ServerSideBatching(args.batching, args.batch_rows) if args.batching != "none" else None
+    metrics = RunMetrics("run" if args.profile else None, LOAD_PROFILE_PATH if args.profile else None)
+
+    if GraphDatabase is None:
+        logging.error("Loading into Neo4j requires the neo4j driver (pip install neo4j).")
+        raise SystemExit(1)
+
     logging.info("Connecting to Neo4j...")
     try:
         # Establish the driver connection
@@ -142,7 +271,11 @@ if __name__ == "__main__":
         logging.info("Connection successful.")
 
         # Execute the script
-        execute_cypher_file(driver, CYPHER_FILE_PATH, NEO4J_DATABASE)
+        with metrics.profiled("run"):
+            execute_cypher_file(driver, args.cypher_file, NEO4J_DATABASE, metrics, batching)
+        metrics.finish_profile()
+        metrics.log_summary()
+        metrics.write(args.metrics_output, cypher_file=args.cypher_file, database=NEO4J_DATABASE)
 
         # Close the driver connection
         driver.close()
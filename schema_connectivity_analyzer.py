@@ -1,8 +1,8 @@
 import json
 import os
-from collections import defaultdict
 import logging
 import html  # For escaping HTML characters
+from schema_graph_index import load_or_build_index
 
 # --- Configuration ---
 # Use schema_analysis.json as it contains the structured node/relationship data
@@ -10,6 +10,7 @@ SCHEMA_FILENAME = "schema_analysis.json"
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_HTML_FILENAME = "neighborhood_analysis_report.html" # Output filename
 SCHEMA_FILE_PATH = os.path.join(SCRIPT_DIR, SCHEMA_FILENAME)
+REACH_HOPS = 2 # Hop radius reported per node (answered from the precomputed index)
 
 # Logging Setup
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -34,36 +35,21 @@ def load_schema(file_path):
         logger.error(f"An unexpected error occurred loading {file_path}: {e}")
         return None
 
-def analyze_connectivity(schema_nodes, schema_relationships):
-    """Analyzes schema connectivity for immediate neighbors."""
-    nodes = list(schema_nodes.keys())
-    outgoing_neighbors = defaultdict(list) # node -> [(rel_type, target_node)]
-    incoming_neighbors = defaultdict(list) # node -> [(rel_type, source_node)]
-
-    if not isinstance(schema_relationships, list):
-        logger.warning("Relationships data is not a list in the schema. Cannot analyze connectivity.")
-        return nodes, {}, {} # Return empty structures for neighbors
-
-    for rel in schema_relationships:
-        if not isinstance(rel, dict):
-            logger.warning(f"Skipping invalid relationship entry (not a dictionary): {rel}")
-            continue
-
-        source = rel.get('source')
-        target = rel.get('target')
-        rel_type = rel.get('type')
-
-        if source and target and rel_type and isinstance(source, str) and isinstance(target, str):
-            # Store neighbors
-            outgoing_neighbors[source].append((rel_type, target))
-            incoming_neighbors[target].append((rel_type, source))
-        else:
-            logger.warning(f"Skipping invalid relationship definition (missing/invalid source, target, or type): {rel}")
-
-    # Return only necessary data for neighbor analysis
+def analyze_connectivity(graph_index):
+    """Reads immediate neighbors for every label from the precomputed schema graph index."""
+    nodes = list(graph_index.labels)
+    outgoing_neighbors = {} # node -> [(rel_type, target_node)]
+    incoming_neighbors = {} # node -> [(rel_type, source_node)]
+    for node in nodes:
+        outgoing = graph_index.outgoing(node)
+        incoming = graph_index.incoming(node)
+        if outgoing:
+            outgoing_neighbors[node] = outgoing
+        if incoming:
+            incoming_neighbors[node] = incoming
     return nodes, outgoing_neighbors, incoming_neighbors
 
-def generate_html_report(nodes, outgoing_neighbors, incoming_neighbors, schema_nodes_data):
+def generate_html_report(nodes, outgoing_neighbors, incoming_neighbors, schema_nodes_data, graph_index=None):
     """Generates an HTML string report focusing on immediate neighbors and properties."""
     html_content = """
     <!DOCTYPE html>
@@ -86,6 +72,7 @@ def generate_html_report(nodes, outgoing_neighbors, incoming_neighbors, schema_n
             .neighbor-section { margin-left: 15px; }
             .node-analysis { margin-bottom: 30px; padding: 15px; border: 1px solid #ced4da; border-radius: 5px; background-color: #fdfdff;}
             p.no-results { color: #6c757d; font-style: italic; }
+            p.reach { font-size: 0.9em; color: #495057; margin: 0 0 10px 15px; }
         </style>
     </head>
     <body>
@@ -110,6 +97,10 @@ def generate_html_report(nodes, outgoing_neighbors, incoming_neighbors, schema_n
         node_props_display = f"({node_props_str})" if node_props_str else ""
 
         html_content += f"<div class='node-analysis'><h3>Node: <code>{html.escape(node)}</code> <span class='node-properties'>{node_props_display}</span></h3>\n"
+        if graph_index is not None:
+            reach_out = len(graph_index.k_hop(node, REACH_HOPS, directed=True))
+            reach_any = len(graph_index.k_hop(node, REACH_HOPS, directed=False))
+            html_content += f"<p class='reach'>Labels within {REACH_HOPS} hops: {reach_out} following relationship direction, {reach_any} ignoring direction.</p>\n"
 
         # Outgoing
         html_content += "<div class='neighbor-section'><h4>Outgoing Neighbors:</h4>\n"
@@ -155,6 +146,27 @@ def generate_html_report(nodes, outgoing_neighbors, incoming_neighbors, schema_n
 
         html_content += "</div>\n" # Close node-analysis div
 
+    if graph_index is not None:
+        # Strongly connected components (only cycles, i.e. components with more than one label)
+        html_content += "<h2>Strongly Connected Components</h2>\n"
+        components = graph_index.strongly_connected_components(min_size=2)
+        if components:
+            html_content += "<ul>\n"
+            for component in components:
+                members = ", ".join(f"<code>{html.escape(label)}</code>" for label in component)
+                html_content += f"    <li><strong>{len(component)} labels:</strong> {members}</li>\n"
+            html_content += "</ul>\n"
+        else:
+            html_content += "<p class='no-results'>None</p>\n"
+
+        # Isolated labels
+        html_content += "<h2>Isolated Labels</h2>\n"
+        isolated = graph_index.isolated_labels()
+        if isolated:
+            html_content += "<ul>\n" + "".join(f"    <li><code>{html.escape(label)}</code></li>\n" for label in isolated) + "</ul>\n"
+        else:
+            html_content += "<p class='no-results'>None</p>\n"
+
     html_content += """
         </div>
     </body>
@@ -184,12 +196,13 @@ if __name__ == "__main__":
          exit(1)
 
     logger.info("Analyzing schema connectivity...")
-    nodes, out_neighbors, in_neighbors = analyze_connectivity(nodes_data, relationships_data) # Updated return values
+    graph_index = load_or_build_index(SCHEMA_FILE_PATH, schema=schema) # Reused from disk while the schema is unchanged
+    nodes, out_neighbors, in_neighbors = analyze_connectivity(graph_index)
     logger.info("Connectivity analysis complete.")
 
     # Generate HTML report
     logger.info("Generating HTML report...")
-    html_report = generate_html_report(nodes, out_neighbors, in_neighbors, nodes_data) # Pass nodes_data for property lookup
+    html_report = generate_html_report(nodes, out_neighbors, in_neighbors, nodes_data, graph_index) # Pass nodes_data for property lookup
 
     # Write HTML report to file
     output_filepath = os.path.join(SCRIPT_DIR, OUTPUT_HTML_FILENAME)
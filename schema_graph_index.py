@@ -0,0 +1,386 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+import logging
+import argparse
+from array import array
+from collections import deque
+
+# --- Configuration ---
+# The index is built from the same structured node/relationship data the analyzers use
+SCHEMA_FILENAME = "schema_analysis.json"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE_PATH = os.path.join(SCRIPT_DIR, SCHEMA_FILENAME)
+INDEX_CACHE_SUFFIX = ".graphindex.pkl" # Cache is written next to the schema file
+INDEX_FORMAT_VERSION = 1 # Bump when the pickled layout changes so stale caches are rebuilt
+UNREACHABLE = -1
+
+# Logging Setup
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# --- Helper Functions ---
+
+def quote_cypher_identifier(name):
+    """Backtick-quotes a label or relationship type when it is not a plain identifier."""
+    if name.isidentifier():
+        return name
+    return "`" + name.replace("`", "``") + "`"
+
+def schema_fingerprint(file_path):
+    """Returns a SHA-256 hex digest of the schema file contents (used to validate the cache)."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _build_csr(num_labels, edge_endpoints):
+    """Builds CSR (offsets, edge ids) arrays grouping edge ids by the given endpoint."""
+    offsets = array('l', [0] * (num_labels + 1))
+    for node_id in edge_endpoints:
+        offsets[node_id + 1] += 1
+    for i in range(num_labels):
+        offsets[i + 1] += offsets[i]
+    edge_ids = array('l', [0] * len(edge_endpoints))
+    fill = array('l', offsets[:-1])
+    for edge_id, node_id in enumerate(edge_endpoints):
+        edge_ids[fill[node_id]] = edge_id
+        fill[node_id] += 1
+    return offsets, edge_ids
+
+# --- Index ---
+
+class SchemaGraphIndex:
+    """
+    Compact, precomputed index over the schema graph (labels as nodes, relationship
+    definitions as directed edges). Labels and relationship types are interned to integer
+    IDs and adjacency is stored as CSR arrays. All-pairs BFS distances and parent edges are
+    precomputed for both directed and undirected traversal, so path and k-hop queries are
+    table lookups rather than graph walks.
+    """
+
+    def __init__(self, labels, rel_types, edge_src, edge_dst, edge_type, fingerprint=None):
+        self.labels = labels # label id -> label name
+        self.label_ids = {label: i for i, label in enumerate(labels)}
+        self.rel_types = rel_types # rel type id -> rel type name
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.edge_type = edge_type
+        self.fingerprint = fingerprint
+
+        n = len(labels)
+        self.out_offsets, self.out_edges = _build_csr(n, edge_src)
+        self.in_offsets, self.in_edges = _build_csr(n, edge_dst)
+
+        # Flat n*n matrices: dist[s*n+t] and the edge used to enter t on the BFS tree rooted at s
+        self.dist_directed, self.parent_directed = self._all_pairs_bfs(directed=True)
+        self.dist_undirected, self.parent_undirected = self._all_pairs_bfs(directed=False)
+        self.scc_ids, self.num_sccs = self._tarjan_scc()
+
+    # --- Construction ---
+
+    @classmethod
+    def from_schema(cls, schema_nodes, schema_relationships, fingerprint=None):
+        """Builds the index from the 'nodes' dict and 'relationships' list of a schema analysis."""
+        labels = sorted(schema_nodes.keys()) if isinstance(schema_nodes, dict) else []
+        label_ids = {label: i for i, label in enumerate(labels)}
+        rel_types = []
+        rel_type_ids = {}
+        edge_src, edge_dst, edge_type = array('l'), array('l'), array('l')
+
+        if not isinstance(schema_relationships, list):
+            logger.warning("Relationships data is not a list in the schema. Index will have no edges.")
+            schema_relationships = []
+
+        for rel in schema_relationships:
+            if not isinstance(rel, dict):
+                logger.warning(f"Skipping invalid relationship entry (not a dictionary): {rel}")
+                continue
+            source = rel.get('source')
+            target = rel.get('target')
+            rel_type = rel.get('type')
+            if not (source and target and rel_type and isinstance(source, str) and isinstance(target, str)):
+                logger.warning(f"Skipping invalid relationship definition (missing/invalid source, target, or type): {rel}")
+                continue
+            for label in (source, target):
+                if label not in label_ids: # Relationship endpoints missing from 'nodes' still become labels
+                    label_ids[label] = len(labels)
+                    labels.append(label)
+            if rel_type not in rel_type_ids:
+                rel_type_ids[rel_type] = len(rel_types)
+                rel_types.append(rel_type)
+            edge_src.append(label_ids[source])
+            edge_dst.append(label_ids[target])
+            edge_type.append(rel_type_ids[rel_type])
+
+        return cls(labels, rel_types, edge_src, edge_dst, edge_type, fingerprint=fingerprint)
+
+    def _all_pairs_bfs(self, directed):
+        """Runs one BFS per label and returns flat distance and parent-edge arrays."""
+        n = len(self.labels)
+        dist = array('h', [UNREACHABLE]) * (n * n)
+        parent = array('l', [UNREACHABLE]) * (n * n)
+        for source in range(n):
+            row = source * n
+            dist[row + source] = 0
+            queue = deque([source])
+            while queue:
+                node = queue.popleft()
+                next_dist = dist[row + node] + 1
+                for neighbor, edge_id in self._iter_adjacent(node, directed):
+                    if dist[row + neighbor] == UNREACHABLE:
+                        dist[row + neighbor] = next_dist
+                        parent[row + neighbor] = edge_id
+                        queue.append(neighbor)
+        return dist, parent
+
+    def _iter_adjacent(self, node, directed):
+        """Yields (neighbor_id, edge_id) over outgoing edges, plus incoming ones when undirected."""
+        for i in range(self.out_offsets[node], self.out_offsets[node + 1]):
+            edge_id = self.out_edges[i]
+            yield self.edge_dst[edge_id], edge_id
+        if not directed:
+            for i in range(self.in_offsets[node], self.in_offsets[node + 1]):
+                edge_id = self.in_edges[i]
+                yield self.edge_src[edge_id], edge_id
+
+    def _tarjan_scc(self):
+        """Iterative Tarjan's algorithm. Returns (component id per label, component count)."""
+        n = len(self.labels)
+        index_of = [UNREACHABLE] * n
+        lowlink = [0] * n
+        on_stack = [False] * n
+        scc_ids = array('l', [UNREACHABLE]) * n
+        stack = []
+        next_index = 0
+        num_sccs = 0
+
+        for root in range(n):
+            if index_of[root] != UNREACHABLE:
+                continue
+            work = [(root, self.out_offsets[root])]
+            index_of[root] = lowlink[root] = next_index
+            next_index += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                node, pos = work[-1]
+                if pos < self.out_offsets[node + 1]:
+                    work[-1] = (node, pos + 1)
+                    neighbor = self.edge_dst[self.out_edges[pos]]
+                    if index_of[neighbor] == UNREACHABLE:
+                        index_of[neighbor] = lowlink[neighbor] = next_index
+                        next_index += 1
+                        stack.append(neighbor)
+                        on_stack[neighbor] = True
+                        work.append((neighbor, self.out_offsets[neighbor]))
+                    elif on_stack[neighbor]:
+                        lowlink[node] = min(lowlink[node], index_of[neighbor])
+                    continue
+                work.pop()
+                if work:
+                    caller = work[-1][0]
+                    lowlink[caller] = min(lowlink[caller], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        scc_ids[member] = num_sccs
+                        if member == node:
+                            break
+                    num_sccs += 1
+        return scc_ids, num_sccs
+
+    # --- Query API ---
+
+    def _label_id(self, label):
+        label_id = self.label_ids.get(label)
+        if label_id is None:
+            raise KeyError(f"Unknown label: {label}")
+        return label_id
+
+    def outgoing(self, label):
+        """Returns [(rel_type, target_label)] for relationships leaving the label."""
+        node = self._label_id(label)
+        return [(self.rel_types[self.edge_type[e]], self.labels[self.edge_dst[e]])
+                for e in self.out_edges[self.out_offsets[node]:self.out_offsets[node + 1]]]
+
+    def incoming(self, label):
+        """Returns [(rel_type, source_label)] for relationships entering the label."""
+        node = self._label_id(label)
+        return [(self.rel_types[self.edge_type[e]], self.labels[self.edge_src[e]])
+                for e in self.in_edges[self.in_offsets[node]:self.in_offsets[node + 1]]]
+
+    def distance(self, source, target, directed=True):
+        """Returns the hop count of the shortest schema path, or None if unreachable."""
+        n = len(self.labels)
+        dist = self.dist_directed if directed else self.dist_undirected
+        value = dist[self._label_id(source) * n + self._label_id(target)]
+        return None if value == UNREACHABLE else value
+
+    def is_reachable(self, source, target, directed=True):
+        """Returns True if target can be reached from source."""
+        return self.distance(source, target, directed) is not None
+
+    def k_hop(self, label, k, directed=True):
+        """Returns {label: distance} for every label within k hops (excluding the start label)."""
+        n = len(self.labels)
+        row = self._label_id(label) * n
+        dist = self.dist_directed if directed else self.dist_undirected
+        return {self.labels[t]: dist[row + t] for t in range(n)
+                if 0 < dist[row + t] <= k}
+
+    def shortest_path(self, source, target, directed=False):
+        """
+        Returns the shortest schema path as a list of steps
+        (from_label, rel_type, to_label, direction) where direction is '->' when the
+        relationship is traversed in its defined direction and '<-' otherwise.
+        Returns None if unreachable and [] if source == target.
+        """
+        n = len(self.labels)
+        source_id, target_id = self._label_id(source), self._label_id(target)
+        dist = self.dist_directed if directed else self.dist_undirected
+        parent = self.parent_directed if directed else self.parent_undirected
+        row = source_id * n
+        if dist[row + target_id] == UNREACHABLE:
+            return None
+        steps = []
+        node = target_id
+        while node != source_id:
+            edge_id = parent[row + node]
+            if self.edge_dst[edge_id] == node: # Traversed forward: prev -[edge]-> node
+                prev, direction = self.edge_src[edge_id], '->'
+            else: # Traversed backwards: prev <-[edge]- node
+                prev, direction = self.edge_dst[edge_id], '<-'
+            steps.append((self.labels[prev], self.rel_types[self.edge_type[edge_id]], self.labels[node], direction))
+            node = prev
+        steps.reverse()
+        return steps
+
+    def cypher_pattern(self, source, target, directed=False):
+        """Returns a Cypher MATCH pattern for the shortest schema path, or None if unreachable."""
+        steps = self.shortest_path(source, target, directed)
+        if steps is None:
+            return None
+        pattern = f"(n0:{quote_cypher_identifier(source)})"
+        for i, (_, rel_type, to_label, direction) in enumerate(steps, start=1):
+            rel = f"[:{quote_cypher_identifier(rel_type)}]"
+            pattern += f"-{rel}->" if direction == '->' else f"<-{rel}-"
+            pattern += f"(n{i}:{quote_cypher_identifier(to_label)})"
+        return pattern
+
+    def strongly_connected_components(self, min_size=1):
+        """Returns SCCs as sorted label lists (largest first), keeping those with >= min_size labels."""
+        groups = [[] for _ in range(self.num_sccs)]
+        for label_id, scc_id in enumerate(self.scc_ids):
+            groups[scc_id].append(self.labels[label_id])
+        components = [sorted(group) for group in groups if len(group) >= min_size]
+        components.sort(key=lambda group: (-len(group), group[0]))
+        return components
+
+    def isolated_labels(self):
+        """Returns labels that participate in no relationship definition."""
+        return sorted(self.labels[i] for i in range(len(self.labels))
+                      if self.out_offsets[i] == self.out_offsets[i + 1]
+                      and self.in_offsets[i] == self.in_offsets[i + 1])
+
+    # --- Persistence ---
+
+    def save(self, cache_path):
+        """Pickles the index state (plain lists/arrays only, so the cache is readable from any importer)."""
+        state = {key: value for key, value in self.__dict__.items() if key != 'label_ids'}
+        with open(cache_path, 'wb') as f:
+            pickle.dump((INDEX_FORMAT_VERSION, state), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, cache_path, expected_fingerprint=None):
+        """Loads a pickled index. Returns None if missing, stale, or unreadable."""
+        try:
+            with open(cache_path, 'rb') as f:
+                version, state = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read index cache {cache_path}: {e}. Rebuilding.")
+            return None
+        if version != INDEX_FORMAT_VERSION or not isinstance(state, dict) or \
+                (expected_fingerprint and state.get('fingerprint') != expected_fingerprint):
+            logger.info(f"Index cache {cache_path} is stale. Rebuilding.")
+            return None
+        index = cls.__new__(cls) # Skip __init__: the precomputed tables are restored as-is
+        index.__dict__.update(state)
+        index.label_ids = {label: i for i, label in enumerate(index.labels)}
+        return index
+
+def load_or_build_index(schema_file_path, schema=None, cache_path=None):
+    """
+    Returns a SchemaGraphIndex for the schema file, reusing the on-disk cache when the
+    schema contents are unchanged. `schema` may be passed if it is already loaded.
+    """
+    cache_path = cache_path or schema_file_path + INDEX_CACHE_SUFFIX
+    fingerprint = schema_fingerprint(schema_file_path)
+    index = SchemaGraphIndex.load(cache_path, expected_fingerprint=fingerprint)
+    if index is not None:
+        logger.info(f"Loaded schema graph index from cache: {cache_path}")
+        return index
+
+    if schema is None:
+        with open(schema_file_path, 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+    index = SchemaGraphIndex.from_schema(schema.get('nodes', {}), schema.get('relationships', []), fingerprint=fingerprint)
+    logger.info(f"Built schema graph index: {len(index.labels)} labels, {len(index.edge_src)} relationships, {index.num_sccs} SCCs.")
+    try:
+        index.save(cache_path)
+        logger.info(f"Saved schema graph index cache: {cache_path}")
+    except OSError as e:
+        logger.warning(f"Could not write index cache {cache_path}: {e}")
+    return index
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the precomputed schema graph index.")
+    parser.add_argument("--schema", default=SCHEMA_FILE_PATH, help="Path to schema_analysis.json")
+    parser.add_argument("--undirected", action="store_true", help="Ignore relationship direction for khop queries")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    khop_parser = subparsers.add_parser("khop", help="Labels within K hops of LABEL")
+    khop_parser.add_argument("label")
+    khop_parser.add_argument("k", type=int)
+    path_parser = subparsers.add_parser("path", help="Shortest schema path (and Cypher pattern) between two labels")
+    path_parser.add_argument("source")
+    path_parser.add_argument("target")
+    path_parser.add_argument("--directed", action="store_true", help="Only follow relationships in their defined direction")
+    subparsers.add_parser("scc", help="Strongly connected components with more than one label")
+    subparsers.add_parser("isolated", help="Labels without any relationship")
+    args = parser.parse_args()
+
+    try:
+        schema_index = load_or_build_index(args.schema)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: Could not load schema file {args.schema}: {e}")
+        sys.exit(1)
+
+    try:
+        if args.command == "khop":
+            for label, hops in sorted(schema_index.k_hop(args.label, args.k, directed=not args.undirected).items(), key=lambda kv: (kv[1], kv[0])):
+                print(f"{hops}\t{label}")
+        elif args.command == "path":
+            # Paths default to undirected since Cypher can traverse relationships either way
+            path_steps = schema_index.shortest_path(args.source, args.target, directed=args.directed)
+            if path_steps is None:
+                print(f"No path between {args.source} and {args.target}.")
+            else:
+                for from_label, rel_type, to_label, direction in path_steps:
+                    print(f"{from_label} -[{rel_type}]- {to_label} ({direction})")
+                print(schema_index.cypher_pattern(args.source, args.target, directed=args.directed))
+        elif args.command == "scc":
+            for component in schema_index.strongly_connected_components(min_size=2):
+                print(f"{len(component)}\t{', '.join(component)}")
+        elif args.command == "isolated":
+            for label in schema_index.isolated_labels():
+                print(label)
+    except KeyError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
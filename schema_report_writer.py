@@ -0,0 +1,218 @@
+import os
+import re
+import json
+import html  # For escaping HTML characters
+import logging
+
+# --- Configuration ---
+INDEX_PAGE_SIZE = 200 # Labels listed per index page
+LABEL_PAGES_DIRNAME = "labels"
+SEARCH_INDEX_JSON = "search_index.json"
+SEARCH_INDEX_JS = "search_index.js" # Same data as a script, so search works when pages are opened via file://
+MAX_SEARCH_RESULTS = 50
+
+logger = logging.getLogger(__name__)
+
+REPORT_CSS = """
+body { font-family: sans-serif; line-height: 1.6; padding: 20px; background-color: #f8f9fa; color: #212529; }
+.container { max-width: 1200px; margin: auto; background: #fff; padding: 25px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+h1 { color: #0056b3; text-align: center; border-bottom: 2px solid #0056b3; padding-bottom: 10px; margin-bottom: 30px; }
+h2 { color: #0056b3; margin-top: 40px; border-bottom: 1px solid #dee2e6; padding-bottom: 8px; }
+h3 { color: #495057; margin-top: 25px; font-weight: bold; }
+.node-properties { font-weight: normal; font-size: 0.9em; color: #6c757d; margin-left: 10px; }
+code { background-color: #e2e6ea; padding: 2px 5px; border-radius: 3px; font-family: monospace; }
+ul { list-style-type: none; padding-left: 0; }
+li { background-color: #e9ecef; margin-bottom: 6px; padding: 8px; border-radius: 4px; border-left: 4px solid #007bff; }
+li.incoming { border-left-color: #28a745; }
+.neighbor-section { margin-left: 15px; }
+p.no-results { color: #6c757d; font-style: italic; }
+p.reach { font-size: 0.9em; color: #495057; }
+nav { margin-bottom: 20px; }
+nav a { margin-right: 12px; }
+#search { width: 100%; padding: 8px; font-size: 1em; margin-bottom: 10px; box-sizing: border-box; }
+#search-results li { padding: 4px 8px; }
+""".strip()
+
+SEARCH_SCRIPT = """
+(function () {
+  var box = document.getElementById('search');
+  var out = document.getElementById('search-results');
+  if (!box || !out) { return; }
+  var prefix = box.getAttribute('data-prefix') || '';
+  box.addEventListener('input', function () {
+    var q = box.value.trim().toLowerCase();
+    out.innerHTML = '';
+    if (!q || !window.SCHEMA_SEARCH_INDEX) { return; }
+    var shown = 0;
+    for (var i = 0; i < SCHEMA_SEARCH_INDEX.length && shown < %d; i++) {
+      var entry = SCHEMA_SEARCH_INDEX[i]; // [label, page, searchable text]
+      if (entry[2].indexOf(q) === -1) { continue; }
+      var li = document.createElement('li');
+      var a = document.createElement('a');
+      a.href = prefix + entry[1];
+      a.textContent = entry[0];
+      li.appendChild(a);
+      out.appendChild(li);
+      shown++;
+    }
+  });
+})();
+""".strip() % MAX_SEARCH_RESULTS
+
+# --- Helper Functions ---
+
+def _label_property_names(schema_nodes_data, label):
+    """Returns the sorted property names of a label (list-of-dicts or dict property formats)."""
+    props_structure = schema_nodes_data.get(label, {}).get("properties", [])
+    if isinstance(props_structure, list): # Expected format from schema_analyzer
+        return sorted(p.get("name", "?") for p in props_structure if isinstance(p, dict))
+    if isinstance(props_structure, dict): # Handle older format if necessary
+        return sorted(props_structure.keys())
+    return []
+
+def _assign_page_names(labels):
+    """Maps each label to a unique, filesystem-safe page filename."""
+    page_names = {}
+    used = set()
+    for label in sorted(labels):
+        slug = re.sub(r'[^A-Za-z0-9_-]+', '_', label).strip('_') or "label"
+        candidate = slug
+        suffix = 2
+        while candidate.lower() in used: # Case-insensitive filesystems
+            candidate = f"{slug}_{suffix}"
+            suffix += 1
+        used.add(candidate.lower())
+        page_names[label] = f"{candidate}.html"
+    return page_names
+
+def _index_page_name(page_number):
+    return "index.html" if page_number == 1 else f"index_{page_number}.html"
+
+def _write_page_start(f, title, asset_prefix="", with_search=False):
+    """Writes the common page header (styles are inlined so each page stands alone)."""
+    f.write("<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"UTF-8\">\n")
+    f.write("<meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">\n")
+    f.write(f"<title>{html.escape(title)}</title>\n<style>\n{REPORT_CSS}\n</style>\n</head>\n<body>\n<div class=\"container\">\n")
+    f.write(f"<nav><a href=\"{asset_prefix}index.html\">Index</a><a href=\"{asset_prefix}components.html\">Components</a></nav>\n")
+    if with_search:
+        f.write(f"<input id=\"search\" type=\"search\" placeholder=\"Search labels, properties, relationships...\" data-prefix=\"{asset_prefix}\">\n")
+        f.write("<ul id=\"search-results\"></ul>\n")
+    f.write(f"<h1>{html.escape(title)}</h1>\n")
+
+def _write_page_end(f, asset_prefix="", with_search=False):
+    if with_search:
+        f.write(f"<script src=\"{asset_prefix}{SEARCH_INDEX_JS}\"></script>\n<script>\n{SEARCH_SCRIPT}\n</script>\n")
+    f.write("</div>\n</body>\n</html>\n")
+
+def _write_neighbor_list(f, neighbors, page_names, schema_nodes_data, incoming):
+    """Streams one outgoing/incoming neighbor list with links to the neighbor pages."""
+    if not neighbors:
+        f.write("<p class='no-results'>None</p>\n")
+        return
+    f.write("<ul>\n")
+    arrow = "&lt;-" if incoming else "-&gt;"
+    li_class = " class=\"incoming\"" if incoming else ""
+    for rel_type, other in sorted(neighbors):
+        other_props = ", ".join(f"<code>{html.escape(p)}</code>" for p in _label_property_names(schema_nodes_data, other))
+        other_props_display = f"({other_props})" if other_props else ""
+        link = f"<a href=\"{page_names[other]}\"><code>{html.escape(other)}</code></a>" if other in page_names else f"<code>{html.escape(other)}</code>"
+        f.write(f"    <li{li_class}>{arrow} [<strong>{html.escape(rel_type)}</strong>] {arrow} {link} <span class='node-properties'>{other_props_display}</span></li>\n")
+    f.write("</ul>\n")
+
+# --- Report Writer ---
+
+def write_paginated_report(output_dir, nodes, outgoing_neighbors, incoming_neighbors, schema_nodes_data,
+                           graph_index=None, title="Neighborhood Analysis Report", reach_hops=2):
+    """
+    Streams the schema analysis report to output_dir as an index (paginated by INDEX_PAGE_SIZE),
+    one page per label, a components page, and a prebuilt search index. Each page is written
+    directly to its file, so memory use and per-page size stay flat as the ontology grows.
+    Returns the path of the first index page.
+    """
+    labels_dir = os.path.join(output_dir, LABEL_PAGES_DIRNAME)
+    os.makedirs(labels_dir, exist_ok=True)
+    sorted_nodes = sorted(nodes)
+    page_names = _assign_page_names(sorted_nodes)
+
+    # Per-label pages, with the search index streamed alongside
+    search_json_path = os.path.join(output_dir, SEARCH_INDEX_JSON)
+    search_js_path = os.path.join(output_dir, SEARCH_INDEX_JS)
+    with open(search_json_path, 'w', encoding='utf-8') as search_json, open(search_js_path, 'w', encoding='utf-8') as search_js:
+        search_json.write("[")
+        search_js.write("window.SCHEMA_SEARCH_INDEX = [")
+        for i, node in enumerate(sorted_nodes):
+            outgoing = outgoing_neighbors.get(node, [])
+            incoming = incoming_neighbors.get(node, [])
+            props = _label_property_names(schema_nodes_data, node)
+
+            with open(os.path.join(labels_dir, page_names[node]), 'w', encoding='utf-8') as f:
+                _write_page_start(f, f"Node: {node}", asset_prefix="../")
+                props_str = ", ".join(f"<code>{html.escape(p)}</code>" for p in props)
+                f.write(f"<h3>Properties</h3>\n<p class='node-properties'>{props_str or 'None'}</p>\n")
+                if graph_index is not None:
+                    reach_out = len(graph_index.k_hop(node, reach_hops, directed=True))
+                    reach_any = len(graph_index.k_hop(node, reach_hops, directed=False))
+                    f.write(f"<p class='reach'>Labels within {reach_hops} hops: {reach_out} following relationship direction, {reach_any} ignoring direction.</p>\n")
+                f.write("<div class='neighbor-section'><h4>Outgoing Neighbors:</h4>\n")
+                _write_neighbor_list(f, outgoing, page_names, schema_nodes_data, incoming=False)
+                f.write("</div>\n<div class='neighbor-section'><h4>Incoming Neighbors:</h4>\n")
+                _write_neighbor_list(f, incoming, page_names, schema_nodes_data, incoming=True)
+                f.write("</div>\n")
+                _write_page_end(f, asset_prefix="../")
+
+            searchable = " ".join([node] + props + [rel for rel, _ in outgoing] + [rel for rel, _ in incoming]).lower()
+            entry = json.dumps([node, f"{LABEL_PAGES_DIRNAME}/{page_names[node]}", searchable])
+            separator = "," if i else ""
+            search_json.write(f"{separator}\n{entry}")
+            search_js.write(f"{separator}\n{entry}")
+        search_json.write("\n]\n")
+        search_js.write("\n];\n")
+
+    # Paginated index
+    total_pages = max(1, -(-len(sorted_nodes) // INDEX_PAGE_SIZE))
+    for page_number in range(1, total_pages + 1):
+        page_nodes = sorted_nodes[(page_number - 1) * INDEX_PAGE_SIZE:page_number * INDEX_PAGE_SIZE]
+        with open(os.path.join(output_dir, _index_page_name(page_number)), 'w', encoding='utf-8') as f:
+            _write_page_start(f, title, with_search=True)
+            f.write(f"<p>{len(sorted_nodes)} labels. Page {page_number} of {total_pages}.</p>\n<ul>\n")
+            for node in page_nodes:
+                f.write(f"    <li><a href=\"{LABEL_PAGES_DIRNAME}/{page_names[node]}\"><code>{html.escape(node)}</code></a>"
+                        f" <span class='node-properties'>{len(outgoing_neighbors.get(node, []))} out, {len(incoming_neighbors.get(node, []))} in</span></li>\n")
+            f.write("</ul>\n<nav>\n")
+            for other_page in range(1, total_pages + 1):
+                if other_page == page_number:
+                    f.write(f"<strong>{other_page}</strong> ")
+                else:
+                    f.write(f"<a href=\"{_index_page_name(other_page)}\">{other_page}</a> ")
+            f.write("\n</nav>\n")
+            _write_page_end(f, with_search=True)
+
+    # Components page (SCCs and isolated labels)
+    with open(os.path.join(output_dir, "components.html"), 'w', encoding='utf-8') as f:
+        _write_page_start(f, "Schema Components")
+        if graph_index is None:
+            f.write("<p class='no-results'>No graph index available.</p>\n")
+        else:
+            f.write("<h2>Strongly Connected Components</h2>\n")
+            components = graph_index.strongly_connected_components(min_size=2)
+            if components:
+                f.write("<ul>\n")
+                for component in components:
+                    members = ", ".join(f"<a href=\"{LABEL_PAGES_DIRNAME}/{page_names[label]}\"><code>{html.escape(label)}</code></a>" for label in component)
+                    f.write(f"    <li><strong>{len(component)} labels:</strong> {members}</li>\n")
+                f.write("</ul>\n")
+            else:
+                f.write("<p class='no-results'>None</p>\n")
+            f.write("<h2>Isolated Labels</h2>\n")
+            isolated = graph_index.isolated_labels()
+            if isolated:
+                f.write("<ul>\n")
+                for label in isolated:
+                    f.write(f"    <li><a href=\"{LABEL_PAGES_DIRNAME}/{page_names[label]}\"><code>{html.escape(label)}</code></a></li>\n")
+                f.write("</ul>\n")
+            else:
+                f.write("<p class='no-results'>None</p>\n")
+        _write_page_end(f)
+
+    logger.info(f"Wrote {len(sorted_nodes)} label pages and {total_pages} index page(s) to {output_dir}")
+    return os.path.join(output_dir, _index_page_name(1))
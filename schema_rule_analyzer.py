@@ -0,0 +1,219 @@
+import os
+import re
+import sys
+import json
+import difflib
+import logging
+import argparse
+from collections import Counter
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_SCHEMA_FILENAME = "neo4j_onto_outputv7.4.8_without_desc.json" # Raw ontology export (nodes + relationships by type)
+OUTPUT_FILENAME = "schema_analysis.json"
+ID_SUFFIXES = ("ID", "Id", "Key", "Code", "Number") # Same order of preference as the SchemaAnalyzer agent instructions
+FUZZY_ID_MATCH_RATIO = 0.85 # Accepts misspelt own IDs such as 'fulfilmentEventID' for FulfillmentEvent
+FUZZY_MAX_LENGTH_DIFFERENCE = 3 # ...but not longer foreign keys such as 'calendarDateYearId' for CalendarDate
+
+# Logging Setup
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# --- Helper Functions ---
+
+def camel_case_label(label):
+    """'CampaignPerformance' -> 'campaignPerformance', 'Sentiment Score' -> 'sentimentScore'."""
+    words = [w for w in re.split(r"[^A-Za-z0-9]+", label) if w]
+    if not words:
+        return ""
+    joined = words[0] + "".join(w[:1].upper() + w[1:] for w in words[1:])
+    return joined[:1].lower() + joined[1:]
+
+def is_id_like(name):
+    return name.endswith(ID_SUFFIXES) or name.lower() == "id"
+
+def normalize_properties(props_structure):
+    """Returns properties as a list of {"name", "type"[, "constraints"]} from the dict or list input formats."""
+    properties = []
+    if isinstance(props_structure, dict):
+        items = props_structure.items()
+    elif isinstance(props_structure, list):
+        items = ((p.get("name"), p) for p in props_structure if isinstance(p, dict))
+    else:
+        return properties
+    for name, details in items:
+        if not name:
+            continue
+        details = details if isinstance(details, dict) else {}
+        prop = {"name": name, "type": details.get("type") or "String"}
+        if details.get("constraints"):
+            prop["constraints"] = details["constraints"]
+        properties.append(prop)
+    return properties
+
+def choose_id_property(label, property_names):
+    """
+    Applies the SchemaAnalyzer id_property rules. Returns (id_property, rule) where rule is one of
+    'own' (camelCase(label) + an ID suffix, exact or case-insensitive), 'id', 'fuzzy' (a misspelt own
+    ID such as 'orderFulfilmentID'), 'single' (the only ID-like property), 'created' (no ID-like
+    property; camelCase(label) + "ID" is added) or 'ambiguous' (several ID-like properties, none the
+    label's own; the created name is returned as the default).
+    """
+    own = camel_case_label(label)
+    names = set(property_names)
+    by_lower = {name.lower(): name for name in property_names}
+
+    def own_with(suffixes):
+        for suffix in suffixes:
+            if own + suffix in names:
+                return own + suffix
+            if (own + suffix).lower() in by_lower:
+                return by_lower[(own + suffix).lower()]
+        return None
+
+    # A property named like the label itself (label 'ReceivingCorrectionCode') is not its identifier
+    candidates = [name for name in property_names if is_id_like(name) and name != own]
+    target = (own + "ID").lower()
+    scored = [(difflib.SequenceMatcher(None, target, name.lower()).ratio(), name) for name in candidates
+              if name.lower().endswith("id") and abs(len(name) - len(target)) <= FUZZY_MAX_LENGTH_DIFFERENCE]
+
+    # Own ID/Id first, then a misspelt own ID, then own Key/Code/Number ('logisticsPartnetID' beats 'logisticsPartnerCode')
+    id_property = own_with(ID_SUFFIXES[:2])
+    if id_property:
+        return id_property, "own"
+    if "id" in by_lower:
+        return by_lower["id"], "id"
+    if scored and max(scored)[0] >= FUZZY_ID_MATCH_RATIO:
+        return max(scored)[1], "fuzzy"
+    id_property = own_with(ID_SUFFIXES[2:])
+    if id_property:
+        return id_property, "own"
+    if len(candidates) == 1:
+        return candidates[0], "single"
+    return own + "ID", "ambiguous" if candidates else "created"
+
+def flatten_relationships(raw_relationships):
+    """
+    Flattens the relationship formats of the ontology exports into [{"type", "source", "target", "properties"}]:
+    {type: [{start_node_label, end_node_label}]}, {type: {start_node_labels: [...], end_node_labels: [...]}}
+    or an already flat list.
+    """
+    flat = []
+    if isinstance(raw_relationships, list):
+        for rel in raw_relationships:
+            if isinstance(rel, dict):
+                flat.append({"type": rel.get("type"), "source": rel.get("source"), "target": rel.get("target"),
+                             "properties": normalize_properties(rel.get("properties", []))})
+        return flat
+    if not isinstance(raw_relationships, dict):
+        return flat
+    for rel_type, rel_data in raw_relationships.items():
+        if isinstance(rel_data, list):
+            for rel_instance in rel_data:
+                if isinstance(rel_instance, dict):
+                    flat.append({"type": rel_type, "source": rel_instance.get("start_node_label"), "target": rel_instance.get("end_node_label"),
+                                 "properties": normalize_properties(rel_instance.get("properties", []))})
+        elif isinstance(rel_data, dict):
+            starts = rel_data.get("start_node_labels") or [None]
+            ends = rel_data.get("end_node_labels") or [None]
+            flat.append({"type": rel_type, "source": starts[0], "target": ends[0],
+                         "properties": normalize_properties(rel_data.get("properties", []))})
+    return flat
+
+# --- Analyzer ---
+
+def analyze_schema(raw_schema):
+    """
+    Rule-based equivalent of the SchemaAnalyzer agent in one pass over the input schema.
+    Returns (analysis, ambiguous_labels, stats): analysis has the schema_analysis.json structure,
+    ambiguous_labels lists the labels whose id_property the rules could only default (candidates for
+    an optional LLM fallback) and stats counts the id_property rule used per label.
+    """
+    nodes = {}
+    ambiguous_labels = []
+    stats = Counter()
+    for label, details in (raw_schema.get("nodes") or {}).items():
+        properties = normalize_properties(details.get("properties", {}) if isinstance(details, dict) else {})
+        id_property, rule = choose_id_property(label, [p["name"] for p in properties])
+        if id_property not in {p["name"] for p in properties}:
+            properties.append({"name": id_property, "type": "String"})
+        if rule == "ambiguous":
+            ambiguous_labels.append(label)
+        stats[rule] += 1
+        nodes[label] = {"properties": properties, "id_property": id_property}
+
+    relationships = []
+    seen = set()
+    for rel in flatten_relationships(raw_schema.get("relationships")):
+        key = (rel["type"], rel["source"], rel["target"])
+        if None in key or key in seen:
+            stats["skipped_relationships"] += 1
+            continue
+        seen.add(key)
+        relationships.append(rel)
+    stats["relationships"] = len(relationships)
+    return {"nodes": nodes, "relationships": relationships}, ambiguous_labels, stats
+
+def compare_analyses(analysis, reference):
+    """Lists differences in id_property, property names and relationships against a reference analysis."""
+    differences = []
+    ref_nodes = reference.get("nodes", {})
+    for label, details in analysis["nodes"].items():
+        ref = ref_nodes.get(label)
+        if not isinstance(ref, dict):
+            differences.append(f"{label}: not in reference")
+            continue
+        if details["id_property"] != ref.get("id_property"):
+            differences.append(f"{label}: id_property {details['id_property']!r} (reference {ref.get('id_property')!r})")
+        names = {p["name"] for p in details["properties"]}
+        ref_names = {p.get("name") for p in normalize_properties(ref.get("properties", []))}
+        if names != ref_names:
+            differences.append(f"{label}: properties differ (only here: {sorted(names - ref_names)}, only in reference: {sorted(ref_names - names)})")
+    for label in sorted(set(ref_nodes) - set(analysis["nodes"])):
+        differences.append(f"{label}: only in reference")
+    rel_keys = {(r["type"], r["source"], r["target"]) for r in analysis["relationships"]}
+    ref_keys = {(r.get("type"), r.get("source"), r.get("target")) for r in reference.get("relationships", []) if isinstance(r, dict)}
+    if rel_keys != ref_keys:
+        differences.append(f"relationships differ ({len(rel_keys - ref_keys)} only here, {len(ref_keys - rel_keys)} only in reference)")
+    return differences
+
+def _load_json(path, description):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.error(f"{description} not found: {path}")
+    except json.JSONDecodeError as e:
+        logger.error(f"Error decoding JSON from {description}: {path} - {e}")
+    return None
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rule-based schema analysis (id_property selection and relationship flattening).")
+    parser.add_argument("--input", default=os.path.join(SCRIPT_DIR, INPUT_SCHEMA_FILENAME), help="Raw schema JSON")
+    parser.add_argument("--output", default=os.path.join(SCRIPT_DIR, OUTPUT_FILENAME), help="Where to write the analysis")
+    parser.add_argument("--verify", metavar="ANALYSIS_JSON", help="Compare against an existing analysis (e.g. the agent's) instead of writing")
+    args = parser.parse_args()
+
+    raw_schema = _load_json(args.input, "Input schema")
+    if not isinstance(raw_schema, dict):
+        sys.exit(1)
+    schema_analysis, ambiguous, rule_stats = analyze_schema(raw_schema)
+    logger.info(f"Analyzed {len(schema_analysis['nodes'])} labels and {rule_stats['relationships']} relationships. "
+                f"id_property rules: {dict((k, v) for k, v in rule_stats.items() if k not in ('relationships', 'skipped_relationships'))}.")
+    if ambiguous:
+        logger.info(f"Labels with several candidate ID properties (defaulted to a created ID): {', '.join(ambiguous)}")
+
+    if args.verify:
+        reference_analysis = _load_json(args.verify, "Reference analysis")
+        if reference_analysis is None:
+            sys.exit(1)
+        diffs = compare_analyses(schema_analysis, reference_analysis)
+        for diff in diffs:
+            print(diff)
+        print(f"{len(diffs)} difference(s) against {args.verify}")
+        sys.exit(0)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(schema_analysis, f, indent=2)
+    logger.info(f"Schema analysis written to {args.output}")
@@ -0,0 +1,350 @@
+# Required Packages:
+# Standard library only. Optional: numpy (vectorized column generation), pyarrow (Parquet output)
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import logging
+import argparse
+import datetime
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import numpy as np
+except ImportError:
+    np = None # Falls back to the pure-Python column generators
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FACT_TABLES_FILENAME = "File1_fact_table_details.csv"
+FACT_COLUMNS_FILENAME = "File2_fact_column_details.csv"
+DIM_TABLES_FILENAME = "File1_dim_table_details.csv"
+DIM_COLUMNS_FILENAME = "File2_dim_column_details.csv"
+OUTPUT_DIRNAME = "star_schema_data"
+MANIFEST_FILENAME = "_star_schema.json" # Tables, column types and FK -> surrogate key mapping
+
+DEFAULT_DIM_ROWS = 1000
+DATE_DIM_TABLE = "date_dim" # Rows are consecutive days from DATE_DIM_START
+DATE_DIM_START = datetime.date(2022, 1, 1)
+DATE_DIM_ROWS = 3 * 366
+DEFAULT_FACT_ROWS = 1_000_000
+CHUNK_ROWS = 100_000 # Rows generated (and held in memory) at a time per worker
+ROWS_PER_SHARD = 2_000_000 # Fact tables larger than this are split into several shard files
+STRING_VOCABULARY_SIZE = 50 # Distinct values per generated string column
+SURROGATE_KEY_SUFFIX = "_sk"
+RANDOM_SEED = 42
+
+# Column type inference from the naming conventions used in the FACT/DIM metadata
+DATE_TOKENS = {"dt"}
+TIMESTAMP_TOKENS = {"ts"}
+FLAG_TOKENS = {"flg", "ind", "flag"}
+DECIMAL_TOKENS = {"amt", "disc", "adj", "rtl", "cost"}
+INTEGER_TOKENS = {"nbr", "id", "cnt", "unit", "qty", "year", "period", "week", "day", "month", "quarter",
+                  "season", "hh", "traffic", "txn", "doors", "key"}
+
+# Logging Setup
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# --- Metadata ---
+
+def infer_column_type(column_name):
+    """Infers a column type (date, timestamp, flag, decimal, integer, string) from its name tokens."""
+    tokens = column_name.lower().split("_")
+    if tokens[-1] in DATE_TOKENS:
+        return "date"
+    if tokens[-1] in TIMESTAMP_TOKENS:
+        return "timestamp"
+    if tokens[-1] in FLAG_TOKENS:
+        return "flag"
+    if DECIMAL_TOKENS.intersection(tokens):
+        return "decimal"
+    if INTEGER_TOKENS.intersection(tokens):
+        return "integer"
+    return "string"
+
+def load_table_metadata(tables_path, columns_path, kind):
+    """
+    Reads a File1 (tables) / File2 (columns) metadata pair.
+    Returns {table: {"kind", "description", "columns": [column names in metadata order]}}.
+    """
+    tables = {}
+    with open(tables_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            table = row.get("Shortened table name", "").strip()
+            if table:
+                tables[table] = {"kind": kind, "description": row.get("Table description", "").strip(), "columns": []}
+    with open(columns_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            table = row.get("Shortened table name", "").strip()
+            column = row.get("Column Name", "").strip()
+            if not (table and column):
+                continue
+            if table not in tables:
+                logger.warning(f"Column '{column}' references table '{table}' missing from {os.path.basename(tables_path)}. Adding it.")
+                tables[table] = {"kind": kind, "description": "", "columns": []}
+            if column not in tables[table]["columns"]:
+                tables[table]["columns"].append(column)
+    return tables
+
+def build_star_schema(fact_tables, dim_tables, dim_rows=DEFAULT_DIM_ROWS, fact_rows=DEFAULT_FACT_ROWS):
+    """
+    Builds the generation model. Each dimension's first column is its natural key and it gets an
+    integer surrogate key '<dim>_sk'. A fact column equal to a dimension's natural key, or ending
+    in '_<natural key>' for *_dim_id keys (role-playing, e.g. stt_loc_dim_id), becomes a foreign key: the fact gets
+    '<column>_sk' plus the natural key value of the referenced dimension row.
+    """
+    schema = {"dimensions": {}, "facts": {}}
+    dim_keys = {}
+    for table, meta in dim_tables.items():
+        if not meta["columns"]:
+            logger.warning(f"Dimension '{table}' has no columns. Skipping.")
+            continue
+        natural_key = meta["columns"][0]
+        rows = DATE_DIM_ROWS if table == DATE_DIM_TABLE else dim_rows
+        schema["dimensions"][table] = {
+            "rows": rows,
+            "surrogate_key": f"{table}{SURROGATE_KEY_SUFFIX}",
+            "natural_key": natural_key,
+            "columns": {c: infer_column_type(c) for c in meta["columns"]},
+        }
+        # First dimension claiming a natural key wins (divn_nbr appears in several dims)
+        dim_keys.setdefault(natural_key, table)
+
+    for table, meta in fact_tables.items():
+        foreign_keys = {}
+        for column in meta["columns"]:
+            for natural_key, dim_table in dim_keys.items():
+                # Role-playing references only for explicit dimension IDs (stt_loc_dim_id, sls_prod_dim_id)
+                if column == natural_key or (natural_key.endswith("_dim_id") and column.endswith("_" + natural_key)):
+                    foreign_keys[column] = dim_table
+                    break
+        schema["facts"][table] = {
+            "rows": fact_rows,
+            "columns": {c: infer_column_type(c) for c in meta["columns"]},
+            "foreign_keys": foreign_keys,
+        }
+    return schema
+
+# --- Column Generation ---
+
+def natural_key_values(dim_spec, surrogate_keys):
+    """Maps surrogate keys to the dimension's natural key values (a pure function of the key, so any worker can resolve FKs)."""
+    key_type = dim_spec["columns"][dim_spec["natural_key"]]
+    if np is not None and isinstance(surrogate_keys, np.ndarray):
+        if key_type == "date":
+            return (np.datetime64(DATE_DIM_START.isoformat()) + (surrogate_keys - 1)).astype(str)
+        if key_type in ("integer", "decimal"):
+            return surrogate_keys
+        return np.char.add(f"{dim_spec['natural_key'].upper()}_", np.char.zfill(surrogate_keys.astype(str), 6))
+    if key_type == "date":
+        return [(DATE_DIM_START + datetime.timedelta(days=int(sk) - 1)).isoformat() for sk in surrogate_keys]
+    if key_type in ("integer", "decimal"):
+        return [int(sk) for sk in surrogate_keys]
+    return [f"{dim_spec['natural_key'].upper()}_{int(sk):06d}" for sk in surrogate_keys]
+
+def _random_column(column, column_type, n_rows, rng):
+    """Generates one column chunk: a numpy array when numpy is available, otherwise a list built with the stdlib random module."""
+    date_span = DATE_DIM_ROWS
+    if np is not None:
+        if column_type == "integer":
+            return rng.integers(1, 100_000, n_rows)
+        if column_type == "decimal":
+            return np.round(rng.uniform(0, 10_000, n_rows), 2)
+        if column_type == "flag":
+            return np.array(["Y", "N"])[rng.integers(0, 2, n_rows)]
+        if column_type == "date":
+            days = np.datetime64(DATE_DIM_START.isoformat()) + rng.integers(0, date_span, n_rows)
+            return days.astype(str)
+        if column_type == "timestamp":
+            seconds = np.datetime64(DATE_DIM_START.isoformat() + "T00:00:00") + rng.integers(0, date_span * 86_400, n_rows)
+            return seconds.astype(str)
+        vocabulary = np.array([f"{column.upper()}_{i:03d}" for i in range(STRING_VOCABULARY_SIZE)])
+        return vocabulary[rng.integers(0, STRING_VOCABULARY_SIZE, n_rows)]
+
+    if column_type == "integer":
+        return [rng.randint(1, 99_999) for _ in range(n_rows)]
+    if column_type == "decimal":
+        return [round(rng.uniform(0, 10_000), 2) for _ in range(n_rows)]
+    if column_type == "flag":
+        return [rng.choice("YN") for _ in range(n_rows)]
+    if column_type == "date":
+        return [(DATE_DIM_START + datetime.timedelta(days=rng.randrange(date_span))).isoformat() for _ in range(n_rows)]
+    if column_type == "timestamp":
+        start = datetime.datetime.combine(DATE_DIM_START, datetime.time())
+        return [(start + datetime.timedelta(seconds=rng.randrange(date_span * 86_400))).isoformat() for _ in range(n_rows)]
+    vocabulary = [f"{column.upper()}_{i:03d}" for i in range(STRING_VOCABULARY_SIZE)]
+    return [vocabulary[rng.randrange(STRING_VOCABULARY_SIZE)] for _ in range(n_rows)]
+
+def _random_keys(upper, n_rows, rng):
+    """Uniform surrogate keys in [1, upper]."""
+    if np is not None:
+        return rng.integers(1, upper + 1, n_rows)
+    return [rng.randint(1, upper) for _ in range(n_rows)]
+
+def _make_rng(seed):
+    return np.random.default_rng(seed) if np is not None else random.Random(seed)
+
+def generate_dimension_chunk(dim_spec, start_row, n_rows, rng):
+    """Returns (header, columns) for dimension rows [start_row, start_row + n_rows)."""
+    if np is not None:
+        surrogate_keys = np.arange(start_row + 1, start_row + n_rows + 1)
+    else:
+        surrogate_keys = list(range(start_row + 1, start_row + n_rows + 1))
+    header = [dim_spec["surrogate_key"]]
+    columns = [surrogate_keys]
+    for column, column_type in dim_spec["columns"].items():
+        header.append(column)
+        if column == dim_spec["natural_key"]:
+            columns.append(natural_key_values(dim_spec, surrogate_keys))
+        else:
+            columns.append(_random_column(column, column_type, n_rows, rng))
+    return header, columns
+
+def generate_fact_chunk(fact_spec, dimensions, n_rows, rng):
+    """Returns (header, columns) for n_rows fact rows; FK columns carry the surrogate key and matching natural key."""
+    header, columns = [], []
+    for column, column_type in fact_spec["columns"].items():
+        dim_table = fact_spec["foreign_keys"].get(column)
+        if dim_table:
+            dim_spec = dimensions[dim_table]
+            keys = _random_keys(dim_spec["rows"], n_rows, rng)
+            header.extend([column + SURROGATE_KEY_SUFFIX, column])
+            columns.extend([keys, natural_key_values(dim_spec, keys)])
+        else:
+            header.append(column)
+            columns.append(_random_column(column, column_type, n_rows, rng))
+    return header, columns
+
+# --- Sinks ---
+
+class ShardWriter:
+    """Appends column chunks to one CSV or Parquet shard file."""
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self._file = None
+        self._csv = None
+        self._parquet = None
+
+    def write(self, header, columns):
+        if self.output_format == "parquet":
+            table = pa.table(dict(zip(header, columns)))
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table) # One row group per chunk
+            return
+        if self._csv is None:
+            self._file = open(self.path, 'w', encoding='utf-8', newline='')
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(header)
+        self._csv.writerows(zip(*columns))
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+
+def _shard_path(output_dir, table, shard, output_format):
+    table_dir = os.path.join(output_dir, table)
+    os.makedirs(table_dir, exist_ok=True)
+    return os.path.join(table_dir, f"part-{shard:05d}.{output_format}")
+
+def _table_seed(table, shard):
+    """Stable per-table, per-shard seed (independent of PYTHONHASHSEED)."""
+    return RANDOM_SEED + zlib.crc32(f"{table}:{shard}".encode("utf-8"))
+
+# --- Workers ---
+
+def generate_shard(task):
+    """Worker entry point: generates one shard of a dimension or fact table in CHUNK_ROWS chunks."""
+    kind, table, shard, start_row, n_rows, star_schema, output_dir, output_format = task
+    rng = _make_rng(_table_seed(table, shard))
+    writer = ShardWriter(_shard_path(output_dir, table, shard, output_format), output_format)
+    try:
+        written = 0
+        while written < n_rows:
+            chunk_rows = min(CHUNK_ROWS, n_rows - written)
+            if kind == "dimension":
+                header, columns = generate_dimension_chunk(star_schema["dimensions"][table], start_row + written, chunk_rows, rng)
+            else:
+                header, columns = generate_fact_chunk(star_schema["facts"][table], star_schema["dimensions"], chunk_rows, rng)
+            writer.write(header, columns)
+            written += chunk_rows
+    finally:
+        writer.close()
+    return table, shard, n_rows
+
+def plan_shards(star_schema, output_dir, output_format):
+    """Splits every table into shard tasks of at most ROWS_PER_SHARD rows."""
+    tasks = []
+    for kind, tables in (("dimension", star_schema["dimensions"]), ("fact", star_schema["facts"])):
+        for table, spec in tables.items():
+            total_rows = spec["rows"]
+            for shard, start_row in enumerate(range(0, max(total_rows, 1), ROWS_PER_SHARD)):
+                n_rows = min(ROWS_PER_SHARD, total_rows - start_row)
+                if n_rows > 0:
+                    tasks.append((kind, table, shard, start_row, n_rows, star_schema, output_dir, output_format))
+    return tasks
+
+def generate_star_schema(star_schema, output_dir, output_format="csv", workers=None):
+    """Generates every table with one process per shard. Returns the total number of rows written."""
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump({"format": output_format, "surrogate_key_suffix": SURROGATE_KEY_SUFFIX, **star_schema}, f, indent=2)
+
+    tasks = plan_shards(star_schema, output_dir, output_format)
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Generating {len(tasks)} shard(s) across {workers} worker process(es) "
+                f"({'numpy' if np is not None else 'pure Python'} columns, {output_format} output)...")
+    total_rows = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(generate_shard, task) for task in tasks]
+        for future in as_completed(futures):
+            table, shard, n_rows = future.result()
+            total_rows += n_rows
+            logger.info(f"  Wrote {table} shard {shard} ({n_rows} rows)")
+    return total_rows
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate star-schema data from the FACT/DIM metadata files.")
+    parser.add_argument("--output-dir", default=os.path.join(SCRIPT_DIR, OUTPUT_DIRNAME))
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--fact-rows", type=int, default=DEFAULT_FACT_ROWS, help="Rows per fact table")
+    parser.add_argument("--dim-rows", type=int, default=DEFAULT_DIM_ROWS, help=f"Rows per dimension table ({DATE_DIM_TABLE} always covers {DATE_DIM_ROWS} days)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and pq is None:
+        print("Error: Parquet output requires pyarrow (pip install pyarrow). Exiting.")
+        sys.exit(1)
+
+    try:
+        fact_metadata = load_table_metadata(os.path.join(SCRIPT_DIR, FACT_TABLES_FILENAME), os.path.join(SCRIPT_DIR, FACT_COLUMNS_FILENAME), "fact")
+        dim_metadata = load_table_metadata(os.path.join(SCRIPT_DIR, DIM_TABLES_FILENAME), os.path.join(SCRIPT_DIR, DIM_COLUMNS_FILENAME), "dimension")
+    except (OSError, csv.Error) as e:
+        logger.error(f"Could not read FACT/DIM metadata: {e}")
+        sys.exit(1)
+
+    star = build_star_schema(fact_metadata, dim_metadata, dim_rows=args.dim_rows, fact_rows=args.fact_rows)
+    for fact_table, fact_spec in star["facts"].items():
+        logger.info(f"Fact '{fact_table}': {len(fact_spec['columns'])} columns, FKs -> {fact_spec['foreign_keys'] or 'none'}")
+
+    start_time = time.time()
+    rows_written = generate_star_schema(star, args.output_dir, args.format, args.workers)
+    elapsed = time.time() - start_time
+    logger.info(f"Wrote {rows_written} rows to {args.output_dir} in {elapsed:.2f}s ({rows_written / max(elapsed, 1e-9):.0f} rows/s).")
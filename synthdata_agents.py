@@ -0,0 +1,484 @@
+# Agents of the synthetic data workflow and helpers for their outputs; shared by the Streamlit app and synthdata_workflow.py.
+import os
+import json
+import logging
+import re
+from typing import Any, Optional
+from textwrap import dedent
+from agno.agent import Agent
+
+# --- Configuration ---
+# Define the output directory for intermediate agent outputs
+AGENT_OUTPUT_DIR = os.getcwd() # Set to the current working directory
+
+# Define standard filenames for intermediate files
+SCHEMA_ANALYSIS_FILENAME = "schema_analysis.json"
+GENERATION_PLAN_FILENAME = "generation_plan.json"
+VALUE_LISTS_FILENAME = "value_lists.json"
+CARDINALITY_RULES_FILENAME = "cardinality_rules.json" # Optional file
+GENERATION_RULES_FILENAME = "generation_rules.json" # New file for non-string property rules
+PYTHON_CODE_PLAN_FILENAME = "python_code_plan.md"
+FAILED_CODE_OUTPUT_FILENAME = "failed_code_generator_output.txt"
+RAW_SCHEMA_AGENT_OUTPUT_FILENAME = "schema_analysis_agent_output.json" # Raw output if agent runs
+RAW_VALUE_LIST_STREAMED_FILENAME = "value_lists_raw_streamed.json" # Raw streamed output
+RAW_CODE_GEN_STREAMED_FILENAME = "code_gen_raw_streamed.txt" # Raw streamed code output
+
+logger = logging.getLogger(__name__)
+
+# --- Helper Functions: safe_json_loads, extract_python_code ---
+def safe_json_loads(text: str) -> Optional[Any]:
+    """Safely loads JSON, attempting to clean common LLM output issues."""
+    if not isinstance(text, str):
+        logger.error(f"safe_json_loads expected a string, but got {type(text)}")
+        return None
+    text = text.strip().strip('`')
+    if text.lower().startswith("json"):
+        text = text[4:].strip()
+    start_brace = text.find('{')
+    start_bracket = text.find('[') # Look for the start of an array
+    end_brace = text.rfind('}')
+    end_bracket = text.rfind(']') # Look for the end of an array
+
+    # Find the earliest potential start and latest potential end of a JSON structure
+    start = -1
+    if start_brace != -1 and start_bracket != -1: start = min(start_brace, start_bracket)
+    elif start_brace != -1: start = start_brace
+    elif start_bracket != -1: start = start_bracket
+
+    end = -1
+    if end_brace != -1 and end_bracket != -1: end = max(end_brace, end_bracket)
+    elif end_brace != -1: end = end_brace
+    elif end_bracket != -1: end = end_bracket
+
+    json_text = text # Default to the whole text if markers aren't found or are mismatched
+
+    if start != -1 and end != -1 and start < end: json_text = text[start : end + 1]
+    # Added a check to see if the extracted text *looks* like JSON before using it
+    # This helps avoid cases where random braces/brackets are found.
+    # A more sophisticated check could involve counting braces/brackets.
+    elif start != -1 and end != -1 and start < end and (json_text.strip().startswith('{') or json_text.strip().startswith('[')):
+         json_text = text[start : end + 1]
+    else:
+        logger.warning(f"Could not reliably find JSON boundaries in text: {text[:100]}... Trying full cleaned text.")
+        json_text = text
+    try:
+        return json.loads(json_text)
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to decode JSON: {e}\nOriginal text snippet: {json_text[:500]}...")
+        return None
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during JSON parsing: {e}", exc_info=True)
+        return None
+
+def extract_python_code(markdown_string: str) -> Optional[str]:
+    """Extracts Python code from the first markdown code block."""
+    if not isinstance(markdown_string, str):
+        logger.error(f"extract_python_code expected a string, but got {type(markdown_string)}")
+        return None
+    # Handle potential variations in markdown code block start
+    match = re.search(r"```(?:python)?\n(.*?)\n```", markdown_string, re.DOTALL | re.IGNORECASE)
+    if match:
+        return match.group(1).strip()
+    else:
+        logger.warning("Could not find ```python ... ``` block. Assuming entire response is code.")
+        # More robust check if it looks like Python
+        cleaned_string = markdown_string.strip().strip('`')
+        if ("import " in cleaned_string or "def " in cleaned_string or "class " in cleaned_string or
+            "print(" in cleaned_string or "=" in cleaned_string): # Added more heuristics
+             logger.info("Assuming entire response is Python code based on content.")
+             return cleaned_string
+        else:
+             logger.error("Response does not appear to contain Python code.")
+             return None
+
+# --- Agents ---
+# 1. Schema Analyzer
+schema_analyzer = Agent(
+    name="SchemaAnalyzer",
+    model=None, # Placeholder
+    instructions=dedent(f"""\
+    You are an expert Neo4j schema analyzer with RETAIL domain expertise. Analyze the provided Neo4j JSON schema. Identify:
+    1. All node labels.
+    2. For each node label:
+        a. Its properties (name, type, constraints like UNIQUE if provided in input).
+        b. Determine the best unique identifier property ('id_property').
+            - First, look for existing properties that are commonly used as IDs (e.g., ending with 'ID', 'Id', 'Key', 'Code', 'Number', or named 'id').
+            - If NO suitable existing property is found, you MUST create a new 'id_property' name. Construct this name by taking the node label, converting its first letter to lowercase (camelCase), and appending "ID" (e.g., for node label "CampaignPerformance", the id_property will be "campaignPerformanceID"). This newly created ID property should be considered of type "String".
+    3. All relationship types.
+    4. For each relationship type: its type name, source node label, target node label, and properties (name, type).
+    5. CRITICAL: If the input JSON's "nodes" dictionary is empty, your output JSON's "nodes" dictionary MUST also be empty. Do NOT infer or include node details if no nodes were provided in the input batch.
+    
+    Output the analysis as a single, structured JSON object.
+    CRITICAL: You MUST return ONLY the raw, valid JSON string.
+    - Ensure all elements in JSON lists and all key-value pairs in JSON objects are correctly separated by commas.
+    - Do NOT use trailing commas.
+    - Do NOT include ```json``` markers or any explanations, introductory text, or conversational remarks.
+
+    The JSON output MUST strictly follow this format:
+    ```json
+    {{
+      "nodes": {{
+        "NodeLabel1": {{
+          "properties": [
+            {{ "name": "property1Name", "type": "String", "constraints": ["UNIQUE"] }},
+            {{ "name": "property2Name", "type": "Integer" }},
+            {{ "name": "createdIdProperty", "type": "String" }}
+          ],
+          "id_property": "property1Name" 
+        }},
+        "NodeLabel2": {{
+          "properties": [
+            {{ "name": "anotherProp", "type": "Float" }},
+            {{ "name": "nodeLabel2ID", "type": "String" }} 
+          ],
+          "id_property": "nodeLabel2ID" 
+        }}
+      }},
+      "relationships": [
+        {{
+          "type": "REL_TYPE",
+          "source": "NodeLabel1",
+          "target": "NodeLabel2",
+          "properties": [
+            {{ "name": "rel_prop1", "type": "Date" }}
+          ]
+        }}
+      ]
+    }}
+    ```
+    For the "id_property" field, provide ONLY the string name of the property, e.g., "customerID", NOT "id_property": "The ID is customerID".
+    """),
+    markdown=False,
+)
+
+# 2. Data Planner
+data_planner = Agent(
+    name="DataPlanner",
+    model=None, # Placeholder
+    instructions="""
+    Based on the provided Neo4j schema analysis and specific counts for 'Store' and 'Customer' nodes, propose the number of instances to generate for ALL node labels.
+
+    Input will be a JSON object string containing:
+    - 'schema_analysis': The analysis result with node properties and relationships.
+    - 'num_stores': An integer representing the desired number of 'Store' nodes.
+    - 'num_customers': An integer representing the desired number of 'Customer' nodes.
+
+    Your task:
+    1.  **Use Provided Counts:** Set the counts for 'Store' and 'Customer' labels directly from the `num_stores` and `num_customers` input values. If 'Store' or 'Customer' labels do not exist in the schema, ignore the corresponding input count.
+    2.  **Infer Other Counts:** For all *other* node labels present in the `schema_analysis`, propose reasonable integer counts based on:
+        *   **Exclusion Rule:** If a node label starts with "Derived_", you MUST NOT generate a count for it. Exclude it from the output JSON.
+        *   **Relationships:** Analyze the relationships defined in `schema_analysis`. For example:
+            *   `(Customer)-[:PLACED_ORDER]->(Order)` suggests generating more `Order` nodes than `Customer` nodes (e.g., 3-10x `num_customers`).
+            *   `(Order)-[:CONTAINS]->(Product)` suggests `Product` count might be influenced by `Order` count, but Products likely exist independently too. Consider a reasonable base number of Products (e.g., 50-500) plus potentially more based on order volume.
+            *   `(Store)-[:HAS_INVENTORY]->(Product)` suggests inventory links, but doesn't strictly dictate counts. Inventory nodes might be `num_stores * num_products * stocking_factor`.
+            *   `(Product)-[:PART_OF_CATEGORY]->(Category)` implies fewer `Category` nodes than `Product` nodes. Hierarchy levels (Department, Category, SubCategory) should generally decrease in count as you go up.
+            *   `(Supplier)-[:SUPPLIES]->(Product)` suggests fewer `Supplier` nodes than `Product` nodes.
+        *   **Retail Domain Knowledge:** Apply common sense retail ratios. There are usually many products, many customers placing multiple orders, fewer stores than customers, fewer suppliers than products, etc.
+        *   **Base Entities:** Identify core entities (like Product, Supplier, maybe Brand, Category) and assign reasonable base counts (e.g., 20-100) if they aren't directly derivable from Customer/Store counts.
+        *   **Event Nodes:** Event nodes (like `OrderPlacedEvent`, `PaymentProcessedEvent`) often correspond 1:1 or N:1 with core entities (like `Order`). Generate counts accordingly.
+    3.  **Ensure Completeness (for non-excluded nodes):** Provide a count for EVERY node label identified in the `schema_analysis` *that does not start with "Derived_"*. If a count cannot be reasonably inferred for such a node, assign a small default (e.g., 5 or 10).
+    4.  **Integer Counts:** Ensure all final counts are non-negative integers.
+
+    Output the final plan as a JSON object where keys are node labels (including 'Store' and 'Customer') and values are the proposed integer counts.
+    CRITICAL: You MUST return ONLY the raw, valid JSON object string. Do not include ```json ``` markers, explanations, or any other text.
+    """,
+    markdown=False, # Expecting raw JSON
+)
+
+# 3. Value List Generator
+value_list_generator = Agent(
+    name="ValueListGenerator",
+    model=None, # Placeholder
+    instructions=dedent("""\
+        You are an expert data generator specializing in RETAIL data and generating **perfectly formatted JSON output**.
+        Your task is to generate realistic sample values for STRING properties based on a Neo4j schema analysis and potentially additional context.
+
+        Input: JSON object string {
+            "schema_analysis": { /* ... */ },
+            "additional_instructions": "/* ... */",
+            "property_grouping_definitions": { /* Optional. Content of the property_grouping_definitions.json file.
+                For each Node Label (e.g., "Product"):
+                - You can define a "_value_groups_config_" key. Its value is a dictionary where:
+                    - Keys are property names that should be grouped together.
+                    - Values are either "_GENERATE_" (to generate a single value for each instance in the group)
+                      or a list of predefined strings (one will be chosen for each instance in the group).
+                - You can also define individual properties directly under the Node Label key (e.g., "Product": { "material": ["Cotton", "Wool"] }).
+                  Their values MUST be a list of predefined strings. For these, the entire pre-defined list should be assigned as value. These properties will NOT be part of "_value_groups_config_".
+                - Any STRING property in the schema (excluding the ID property) that is NOT listed in "_value_groups_config_"
+                  AND NOT defined as an individual property with a predefined list, will have a list of 20-30 sample values
+                  GENERATED by default.
+
+                Example:
+                "Product": {
+                  "_value_groups_config_": { "productName": "_GENERATE_", "brandName": ["BrandX", "BrandY"] }, // Inside "_value_groups_config_". Generate a single value for "productName" and choose one from the list for "brandName".
+                  "material": ["Cotton", "Polyester"] // Predefined list for an individual property. All the values in the list will be chosen. Not in _value_groups_config_.
+                },
+                "Customer": { // No _value_groups_config_, just individual property definitions
+                  "occupation": ["Engineer", "Doctor"] // Predefined list. All values in the list will be chosen.
+                }
+            */
+            }
+        }
+        When generating values, adhere to the following specific constraints if applicable:
+        - For 'Store.storeName', the generated value should have a maximum of three words.
+        - For 'Store.storeLocation', the generated value should have a maximum of two words.
+        - For 'Supplier.supplierName', the generated value should have a maximum of three words.
+        - For 'Supplier.supplierLocation', the generated value should have a maximum of two words.
+        - For 'Supplier.supplierRegion', the generated value should have a maximum of two words.
+        - For 'Category.categoryName', the generated value should have a maximum of three words.
+        Generate all values in English only. Do not use any other language.                       
+                        
+        Your Task is to generate a single JSON object:
+        1.  **Context is Key:** Use `additional_instructions` (e.g., "apparel retailer") to tailor all generated values.
+        2.  **Iterate Schema Properties:** For each `node_label` in `schema_analysis['nodes']`:
+            a.  Initialize `output_for_this_label = {}`.
+            b.  Let `grouping_defs_for_label = property_grouping_definitions.get(node_label, {})`.
+            c.  `properties_handled_in_value_groups = set()`.
+
+            d.  **Process Value Groups (Explicit or Inferred):**
+                i.  **Check for Explicit `_value_groups_config_`:**
+                    If `"_value_groups_config_"` is a key in `grouping_defs_for_label` and isinstance(grouping_defs_for_label["_value_groups_config_"], dict) and grouping_defs_for_label["_value_groups_config_"]:
+                        // This is the existing logic for explicitly defined groups
+                        status_message = f"Processing explicit _value_groups_config_ for {node_label}..."
+                        Let `value_group_config = grouping_defs_for_label["_value_groups_config_"]`.
+                        Create a list of **20-30 dictionaries**. Each dictionary represents one consistent set of values for all properties in `value_group_config`.
+                            For each `prop_name_in_group`, `definition` in `value_group_config.items()`:
+                                In each of the 20-30 dictionaries:
+                                    If `definition` is `"_GENERATE_"`: Generate a single realistic string value for `prop_name_in_group`. Ensure contextual relevance with other values in the *same dictionary set*. Adhere to word count constraints if specified.
+                                    If `definition` is a list of strings: Select one value from this predefined list for `prop_name_in_group`. When selecting, ensure it is contextually relevant to the other properties in the same dictionary set.
+                                    Store this single value in the current dictionary under the key `prop_name_in_group`.
+                                Add `prop_name_in_group` to `properties_handled_in_value_groups`.
+                        Store this list of dictionaries as `output_for_this_label["_value_groups_"]`.
+                ii. **Else (No Explicit Group Configured), Try to Infer ONE Semantic Group:**
+                    Else (if `"_value_groups_config_"` was NOT found in `grouping_defs_for_label` or was empty):
+                        status_message = f"No explicit _value_groups_config_ for {node_label}. Attempting to infer one semantic group..."
+                        Analyze the STRING properties of the current `node_label` (from `schema_analysis['nodes'][node_label]['properties']`, excluding its `id_property` and any properties already in `properties_handled_in_value_groups`).
+                        Attempt to identify **ONE primary semantic group** of 2-3 properties that are very commonly defined together and benefit from consistent co-generation (e.g., `productName` and `brandName`; or `firstName` and `lastName`; or `addressLine1`, `city`, `postalCode`). Prioritize obvious, common retail patterns.
+                        If such a strong candidate group is identified (let's call the list of property names `inferred_group_properties`):
+                            *   Create a list of **10-15 dictionaries** (fewer than for explicit groups, reflecting the inferential nature).
+                                *   For each `prop_name_in_inferred_group` in `inferred_group_properties`:
+                                    *   In each of the 10-15 dictionaries: Generate a single realistic string value for `prop_name_in_inferred_group`. Ensure contextual relevance with other values in the *same dictionary set*. Adhere to word count constraints if specified.
+                                    *   Store this single value in the current dictionary under the key `prop_name_in_inferred_group`.
+                                *   Add `prop_name_in_inferred_group` to `properties_handled_in_value_groups`.
+                            *   Store this list of dictionaries as `output_for_this_label["_value_groups_"]`.
+                            *   status_message = f"Inferred one semantic group for {node_label} with properties: {', '.join(inferred_group_properties)}."
+                        Else:
+                            status_message = f"Could not confidently infer a primary semantic group for {node_label}."
+
+            e.  **Process Other String Properties (from Schema):**
+                // This part of the logic remains largely the same.
+                // It will correctly skip properties that were handled either by an explicit or an inferred group.
+                i.  Iterate through all STRING properties (`schema_prop_name`, `schema_prop_type`) for the current `node_label` from `schema_analysis['nodes'][node_label]['properties']`.
+                    *   Let `value_group_config = grouping_defs_for_label["_value_groups_config_"]`.
+                ii. **Exclude ID Property:** If `schema_prop_name` is the `id_property` for `node_label`, skip it.
+                iii. **Exclude Properties Already in `_value_groups_`:** If `schema_prop_name` is in `properties_handled_in_value_groups`, skip it.
+
+                iv. **Determine Source of Values for Remaining Properties:**
+                    *   **Case 1: Individual Predefined List from `property_grouping_definitions` (assigning the entire list):**
+                        If `schema_prop_name` is a key in `grouping_defs_for_label` (and not `_value_groups_config_`) AND `grouping_defs_for_label[schema_prop_name]` is a list of strings:
+                            *   Use the **entire predefined list** `grouping_defs_for_label[schema_prop_name]` as the value.
+                            *   Store this list: `output_for_this_label[schema_prop_name] = grouping_defs_for_label[schema_prop_name]`.
+                    *   **Case 2: Default Generation (List of 20-30 values):**
+                        Else (if `schema_prop_name` was not in `_value_groups_` and not individually predefined):
+                            *   Generate a list of **20-30 diverse and realistic sample values** for `schema_prop_name`, considering the node label and domain context. Adhere to word count constraints if specified.
+                            *   Store it in `output_for_this_label[schema_prop_name]`.
+            f. If `output_for_this_label` is not empty, add it to `output_json[node_label] = output_for_this_label`.
+
+        4.  Structure the output as a single JSON object where:
+            *   Top-level keys are the node labels.
+            *   Each node label key maps to another JSON object.
+            *   This inner object will contain:
+                *   Optionally, a `"_value_groups_"` key with its list of dictionaries, if `_value_groups_config_` was defined for that node label in `property_grouping_definitions`.
+                *   For string properties individually predefined via `property_grouping_definitions` (Case 1 above), their names as keys, and the **entire predefined list** as their value.
+                *   For string properties generated by default (Case 2 above), their names as keys, and their lists of 20-30 sample strings as values.
+
+        Example Output Format (reflecting `property_grouping_definitions` and default generation):
+        ```json
+        {
+          "Product": {
+            "_value_groups_": [  // Generated if "Product" has "_value_groups_config_" in property_grouping_definitions
+              {
+                "productName": "Stylish Hoodie", // Value from "_GENERATE_" or picked from list in _value_groups_config_
+                "brandName": "UrbanWear Co."     // Value from "_GENERATE_" or picked from list in _value_groups_config_
+              },
+              {
+                "productName": "Vintage Jeans",
+                "brandName": "Retro Threads"
+              }
+              // ... (typically 20-30 such dictionaries if _value_groups_config_ exists)
+            ],
+            "material": ["Cotton", "Polyester"], // Example: All values in the list chosen if "Product.material" was ["Cotton", "Polyester"] in property_grouping_definitions
+            "productStatus": ["New", "Used", "Refurbished"], // Example: All values in the list chosen if "Product.productStatus" was ["New", "Used", "Refurbished"] in property_grouping_definitions
+            "color": ["Red", "Blue", "Green", "Black", "White", "... (up to 30 values)"], // Default generation: list of 20-30 values
+            "description": ["High-quality fabric...", "Comfortable fit...", "... (up to 30 values)"] // Default generation
+          },
+          "Customer": { // Example: If Customer has no "_value_groups_config_"
+            "occupation":  ["Engineer", "Doctor"], // Example: All values in the list chosen if "Customer.occupation" was ["Engineer", "Doctor"] in property_grouping_definitions
+            "loyaltyTier": ["Gold", "Silver", "Bronze", "... (up to 30 values)"], // Default generation
+            "preferredContactMethod": ["Email", "Phone"] // Example: All values in the list chosen if "Customer.preferredContactMethod" was ["Email", "Phone"] in property_grouping_definitions
+          },
+          "Store": { // Example: If Store only has properties in "_value_groups_config_"
+             "_value_groups_": [
+               {
+                 "storeName": "Downtown Flagship Store", // Max 3 words
+                 "storeLocation": "Main Street"      // Max 2 words
+               }
+               // ... (typically 20-30 such dictionaries)
+             ]
+          },
+          // ... other labels ...
+        }
+        ```
+
+        CRITICAL: Return ONLY the raw, valid JSON object string. Do not include ```json ``` markers, explanations, or any other text. If a node has no non-ID string properties, omit it from the output JSON.
+        """),
+    markdown=False, # Expecting raw JSON
+)
+
+# 4. Generation Rule Generator 
+generation_rule_generator = Agent(
+    name="GenerationRuleGenerator",
+    model=None, # Placeholder
+    instructions=dedent(f"""\
+        You are an expert data modeler and data generation specialist for RETAIL systems.
+        Your task is to define generation rules for non-string, non-ID properties based on a Neo4j schema analysis.
+
+        Input: JSON object string {{ "schema_analysis": {{...}}, "additional_instructions": "..." }}
+        The `schema_analysis` contains 'nodes' (with 'properties' and 'id_property') and 'relationships'.
+
+        Your Task:
+        1.  **Analyze Schema:** Iterate through each node label in `schema_analysis['nodes']`.
+        2.  For each node, iterate through its `properties`.
+        3.  **Filter Properties:**
+            *   **Exclude** the property designated as the `id_property` for that node label.
+            *   **Exclude** properties with `type` == "String" (these are handled by value lists).
+            *   **Exclude** properties with `type` == "Boolean" (these are typically random true/false).
+        4.  **Define Ranges/Rules:** For the remaining properties (Integer, Float, Date, DateTime), define reasonable default generation ranges or rules.
+            *   **Consider Property Name:** If the property name gives a strong hint (e.g., 'age', 'price', 'quantity', 'orderDate', 'birthDate'), suggest a specific, realistic range.
+            *   **Consider Domain Context:** Use `additional_instructions` (e.g., "apparel retailer") to tailor ranges. For example, prices for apparel might differ from electronics.
+            *   **Default Ranges:** Provide sensible default ranges for each data type if no specific property name hint is strong enough.
+        5.  **Structure the Output:**
+            Output a single JSON object with a top-level key `type_ranges`.
+            Under `type_ranges`, create keys for "integer", "float", "date", "datetime".
+            Each type key maps to another JSON object:
+                *   A "default" key with a list representing the default range (e.g., `[min, max]` for numbers, `["YYYY-MM-DD_start", "YYYY-MM-DD_end"]` for dates).
+                *   Additional keys for specific qualified property names (e.g., `NodeLabel.propertyName` or `RelationshipType.propertyName`, preserving original casing from schema) that require a non-default range, with their specific range list.
+                    *   For dates/datetimes, ranges can be absolute ISO dates/datetimes or relative (e.g., ["-2Y", "NOW"] for last 2 years up to now). Use "NOW" for current date and "NOW_DATETIME" for current datetime.
+                *   When creating keys for specific property rules, construct the qualified name by combining the node label (exact case) and simple property name (exact case) like node_label.simple_property_name"`.
+                *   When creating keys for specific property rules, the key should be a string formed by concatenating the current node label (preserving its exact case), a period character (.), and the current simple property name (preserving its exact case). For example, if the current node label is "Customer" and the property name is "age", the key should be the string "Customer.age".
+
+        Example Output Format for `type_ranges` (ensure "property_dependencies" and "derived_properties" are also top-level keys, possibly empty):
+        ```json
+        {{
+          "type_ranges": {{
+            "integer": {{ "default": [0, 1000], "Customer.age": [18, 99], "Product.year": [2022, "current_year"] }},
+            "float": {{ "default": [0.0, 1000.0], "Product.price": [0.99, 1999.99] }},
+            "date": {{ "default": ["2020-01-01", "NOW"], "Customer.birthDate": ["-70Y", "-18Y"] }},
+            "datetime": {{ "default": ["2020-01-01T00:00:00", "NOW_DATETIME"] }}
+          }},
+          "property_dependencies": {{ "_global_": {{ "value_constraints": [], "mutually_exclusive": [], "associative": [] }} }},
+          "derived_properties": {{}}
+        }}
+        ```
+        CRITICAL: Return ONLY the raw, valid JSON object string. Do not include ```json ``` markers, explanations, or any other text.
+        """),
+    markdown=False, # Expecting raw JSON
+)
+
+# 5. Python Code Planner
+PYTHON_CODE_PLANNER_BASE_INSTRUCTIONS = dedent(f"""\
+    You are an expert Python developer planning a Neo4j data generation script for RETAIL scenarios.
+    The generation itself is done by the `datagen_runtime` package (already installed); the script only
+    configures it and, where the additional instructions require it, adds small hook functions.
+
+    Input: JSON object string {{
+        "schema_analysis_filename": "{SCHEMA_ANALYSIS_FILENAME}",
+        "generation_plan_filename": "{GENERATION_PLAN_FILENAME}",
+        "value_lists_filename": "{VALUE_LISTS_FILENAME}",
+        "cardinality_rules_filename": "{CARDINALITY_RULES_FILENAME}", /* Optional */
+        "generation_rules_filename": "{GENERATION_RULES_FILENAME}",
+        "enforce_date_consistency": true/false,
+        "additional_instructions": "..."
+    }}
+
+    What the runtime already does (do NOT plan to re-implement any of it):
+    *   Loads all the JSON files (the cardinality rules are optional) and validates the schema's `id_property` definitions.
+    *   Generates sequential IDs (`Label_0001` for String IDs, the counter for Integer IDs), String values from the value lists,
+        and Integer/Float/Boolean/Date/DateTime values from `generation_rules['type_ranges']` (specific `Label.property` rule first, then `default`).
+    *   Generates relationships from the cardinality rules (per source: `min`..`max` random targets) or, without a rule,
+        with the hybrid default (`min(source_count, target_count)` unique pairs).
+    *   Writes `output.cypher` (constraints/indexes first, then `:param` + `UNWIND ... MERGE` blocks), or CSV files / Bolt with `--sink`.
+
+    Hooks the script can override by subclassing `datagen_runtime.DatagenHooks`:
+    *   `property_generators = {{"Label.property": fn(props, rng) -> value}}` for properties derived from others in the same row.
+    *   `node_id(self, label, id_property_name, id_property_type, counter)` for custom ID formats.
+    *   `node_properties(self, label, props)` / `relationship_properties(self, rel_type, props, source_id, target_id)`
+        to post-process a full row (e.g. to order dates consistently when `enforce_date_consistency` is true).
+
+    Your Task:
+    Outline a short plan for the script:
+    1.  The configuration constants: `INPUT_FILENAMES` (dict from the input message), `ENFORCE_DATE_CONSISTENCY`, `OUTPUT_CYPHER_FILENAME`.
+    2.  For each additional instruction that the runtime does not cover, the hook that implements it, the properties it reads
+        and writes (as `Label.property`), and the exact logic. Plan no hooks when nothing requires them.
+    3.  The main block: `run_script(__file__, INPUT_FILENAMES, ENFORCE_DATE_CONSISTENCY, Hooks(), OUTPUT_CYPHER_FILENAME)`.
+
+    Output: A concise, step-by-step plan in **Markdown format**.
+    """)
+python_code_planner = Agent(
+    name="PythonCodePlanner",
+    model=None, # Placeholder
+    instructions=PYTHON_CODE_PLANNER_BASE_INSTRUCTIONS, # Use the variable
+    markdown=True, # Expecting Markdown output
+)
+
+# 6. Python Code Generator
+PYTHON_CODE_GENERATOR_BASE_INSTRUCTIONS = dedent(f"""\
+        You are an expert Python programmer specializing in Neo4j data generation for RETAIL scenarios using configuration files.
+        You will receive:
+        1.  Input Filenames (JSON string): {{ "schema_analysis_filename": "{SCHEMA_ANALYSIS_FILENAME}", ... }}
+        2.  Date Consistency Flag (Boolean).
+        3.  A Code Plan (Markdown string) listing the configuration and any hooks.
+
+        Your Task:
+        Write the Python script (`generate_neo4j_data.py`) described by the Code Plan. The generation is done by the
+        installed `datagen_runtime` package, so the script is configuration plus hooks only:
+
+        ```python
+        from datagen_runtime import run_script, DatagenHooks
+
+        INPUT_FILENAMES = {{...}} # Exactly the input filenames received
+        ENFORCE_DATE_CONSISTENCY = True # The date consistency flag received
+        OUTPUT_CYPHER_FILENAME = "generated_data.cypher"
+
+        class Hooks(DatagenHooks):
+            ... # Only the hooks the Code Plan calls for
+
+        if __name__ == "__main__":
+            run_script(__file__, INPUT_FILENAMES, ENFORCE_DATE_CONSISTENCY, Hooks(), OUTPUT_CYPHER_FILENAME)
+        ```
+
+        **CRITICAL REQUIREMENTS:**
+        1.  **Do not re-implement the runtime:** no file loading, value generation, relationship sampling or Cypher writing in the script.
+        2.  **Hooks (only when planned):** subclass `DatagenHooks` and override
+            *   `property_generators = {{"Label.property": fn(props, rng) -> value}}` (props: the row's values so far; rng: the run's random generator),
+            *   `node_id(self, label, id_property_name, id_property_type, counter)`,
+            *   `node_properties(self, label, props)` and `relationship_properties(self, rel_type, props, source_id, target_id)`, which return the row's property map.
+            Hooks run once per row: keep them small and free of I/O.
+        3.  **Dependencies:** standard library only inside hooks.
+
+        **Output Format:**
+        Return ONLY the complete Python script enclosed in a single markdown code block (```python ... ```).
+        """)
+python_code_generator = Agent(
+    name="PythonCodeGenerator",
+    model=None, # Placeholder
+    instructions=PYTHON_CODE_GENERATOR_BASE_INSTRUCTIONS, # Use the variable
+    markdown=False, # Expecting raw code block
+)
+
+ALL_AGENTS = [schema_analyzer, data_planner, value_list_generator, generation_rule_generator, python_code_planner, python_code_generator]
+
+def assign_model(model):
+    """Points every agent at the same model wrapper (e.g. agno's Gemini)."""
+    for agent in ALL_AGENTS:
+        agent.model = model
@@ -0,0 +1,784 @@
+# Headless engine of the synthetic data agent workflow (schema analysis -> plan -> value lists -> rules -> code).
+# The Streamlit app is a UI over the same steps; run this file directly for CLI/batch use.
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+
+import dotenv
+from agno.models.google import Gemini
+from agno.exceptions import ModelProviderError
+
+from agent_batch_executor import run_agent_batches, DEFAULT_MAX_IN_FLIGHT, DEFAULT_REQUESTS_PER_MINUTE
+from llm_response_cache import open_response_cache, describe_agent
+from llm_replay_backend import backend_from_env
+from datagen_script_validator import ValidationBudget, validate_script, feedback_for_agent, write_report
+from schema_rule_analyzer import analyze_schema as analyze_schema_with_rules, flatten_relationships
+from json_stream_parser import IncrementalJSONParser
+from value_list_scheduler import generate_value_lists, label_fingerprint
+from token_budget_batcher import (pack_label_batches, pack_relationship_batches, relationships_for_labels, index_relationships,
+                                  has_value_list_properties, estimate_tokens, schema_output_tokens, DEFAULT_INPUT_TOKEN_BUDGET, DEFAULT_OUTPUT_TOKEN_BUDGET)
+from synthdata_agents import (
+    AGENT_OUTPUT_DIR, SCHEMA_ANALYSIS_FILENAME, GENERATION_PLAN_FILENAME, VALUE_LISTS_FILENAME, CARDINALITY_RULES_FILENAME,
+    GENERATION_RULES_FILENAME, PYTHON_CODE_PLAN_FILENAME, FAILED_CODE_OUTPUT_FILENAME, RAW_SCHEMA_AGENT_OUTPUT_FILENAME,
+    RAW_VALUE_LIST_STREAMED_FILENAME, RAW_CODE_GEN_STREAMED_FILENAME, PYTHON_CODE_PLANNER_BASE_INSTRUCTIONS,
+    PYTHON_CODE_GENERATOR_BASE_INSTRUCTIONS, schema_analyzer, data_planner, value_list_generator, generation_rule_generator,
+    python_code_planner, python_code_generator, assign_model, safe_json_loads, extract_python_code,
+)
+
+# --- Configuration ---
+DEFAULT_MODEL_NAME = "models/gemini-1.5-pro-latest"
+CHECKPOINT_FILENAME = "workflow_checkpoints.json" # Input hash per completed step, next to the artifacts
+RAW_GENERATION_RULES_FILENAME = "generation_rules_agent_output.json"
+DEFAULT_OUTPUT_PY_FILENAME = "generated_datagen_script.py"
+DEFAULT_OUTPUT_CYPHER_FILENAME = "generated_data.cypher"
+DEFAULT_CODE_ATTEMPTS = 2 # Code generator calls when the generated script fails validation (first call included)
+REVIEW_STEPS = ("schema_analysis", "generation_plan", "value_lists", "generation_rules", "cardinality_rules") # Before the value-list review
+CODE_STEPS = ("code_plan", "code")
+WORKFLOW_STEPS = REVIEW_STEPS + CODE_STEPS
+
+logger = logging.getLogger(__name__)
+
+# --- Helper Functions ---
+
+class WorkflowError(Exception):
+    """A step could not produce its artifact. `details` holds the offending agent output, if any."""
+
+    def __init__(self, step, message, details=None):
+        super().__init__(message)
+        self.step = step
+        self.details = details
+
+def hash_inputs(inputs):
+    payload = json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def token_usage(agent, message, output, response=None):
+    """
+    (input_tokens, output_tokens, estimated) of one agent call: the provider's counts when the
+    response carries agno metrics, otherwise estimate_tokens() of instructions + message and output.
+    """
+    metrics = getattr(response, "metrics", None)
+    if isinstance(metrics, dict) and metrics.get("input_tokens"):
+        def total(value): return sum(value) if isinstance(value, list) else (value or 0)
+        return total(metrics.get("input_tokens")), total(metrics.get("output_tokens")), False
+    return estimate_tokens(str(getattr(agent, "instructions", "") or "")) + estimate_tokens(message), estimate_tokens(output or ""), True
+
+def parse_json_object(text, description):
+    """Parses optional user-supplied JSON; returns ({}, warning) when it is not a JSON object."""
+    if not text or not text.strip():
+        return {}, None
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return {}, f"Invalid JSON format in {description}. Ignoring."
+    if not isinstance(parsed, dict):
+        return {}, f"{description} input is not a valid JSON object. Ignoring."
+    return parsed, None
+
+def configure_model(model_name, api_key):
+    """Creates the agno Gemini wrapper for model_name and assigns it to every agent."""
+    model_id = model_name if model_name.startswith("models/") else f"models/{model_name}"
+    model = Gemini(id=model_id, api_key=api_key)
+    assign_model(model)
+    logger.info(f"Using Agno Gemini wrapper for model ID: {model_id}")
+    return model
+
+def _is_json(text):
+    return safe_json_loads(text) is not None
+
+class StepResult:
+    """Timing and token usage of one workflow step; status is 'running', 'ran' or 'skipped' (checkpoint reused)."""
+
+    def __init__(self, name, artifact_path=None):
+        self.name = name
+        self.artifact_path = artifact_path
+        self.status = "running"
+        self.elapsed = 0.0
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.estimated = False # True when any call's tokens had to be estimated
+        self.ttfts = [] # Time to first chunk per call
+        self.parse_seconds = 0.0 # Time spent parsing agent output (JSON parsing, code extraction)
+        self.complete = True # False keeps the step from being checkpointed (e.g. value lists with failed labels)
+        self.detail = ""
+
+    def add_usage(self, usage):
+        input_tokens, output_tokens, estimated = usage
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.estimated = self.estimated or estimated
+
+    def add_timing(self, ttft, parse_seconds=0.0):
+        if ttft is not None:
+            self.ttfts.append(ttft)
+        self.parse_seconds += parse_seconds
+
+    @property
+    def mean_ttft(self):
+        return sum(self.ttfts) / len(self.ttfts) if self.ttfts else None
+
+class WorkflowSettings:
+    """Inputs of one workflow run: what the Streamlit sidebar or the CLI arguments provide."""
+
+    def __init__(self, schema_text, run_schema_analysis=True, use_schema_rules=True, schema_rules_llm_fallback=True,
+                 num_stores=50, num_customers=1000, model_name=DEFAULT_MODEL_NAME, additional_instructions="",
+                 enforce_date_consistency=True, cardinality_rules_text="", property_grouping_text="",
+                 generation_plan_text=None, value_lists_text=None, resume_value_lists=False,
+                 output_py_filename=DEFAULT_OUTPUT_PY_FILENAME, output_cypher_filename=DEFAULT_OUTPUT_CYPHER_FILENAME,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 input_token_budget=DEFAULT_INPUT_TOKEN_BUDGET, output_token_budget=DEFAULT_OUTPUT_TOKEN_BUDGET, force_steps=(),
+                 validate_script=True, validation_budget=None, code_attempts=DEFAULT_CODE_ATTEMPTS):
+        self.schema_text = schema_text
+        self.run_schema_analysis = run_schema_analysis
+        self.use_schema_rules = use_schema_rules
+        self.schema_rules_llm_fallback = schema_rules_llm_fallback
+        self.num_stores = num_stores
+        self.num_customers = num_customers
+        self.model_name = model_name
+        self.additional_instructions = additional_instructions or ""
+        self.enforce_date_consistency = enforce_date_consistency
+        self.cardinality_rules_text = cardinality_rules_text or ""
+        self.property_grouping_text = property_grouping_text or ""
+        self.generation_plan_text = generation_plan_text # Uploaded plan; None generates it
+        self.value_lists_text = value_lists_text # Uploaded value lists; None generates them
+        self.resume_value_lists = resume_value_lists
+        self.output_py_filename = output_py_filename
+        self.output_cypher_filename = output_cypher_filename
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.input_token_budget = input_token_budget
+        self.output_token_budget = output_token_budget
+        self.force_steps = set(force_steps or ()) # Steps re-run even when their checkpoint matches ('all' for every step)
+        self.validate_script = validate_script # Sample-run the generated script before accepting it
+        self.validation_budget = validation_budget or ValidationBudget()
+        self.code_attempts = code_attempts
+
+# --- Workflow Engine ---
+
+class SynthDataWorkflow:
+    """
+    Runs the workflow steps in order. Every step writes its artifact to output_dir and records
+    the hash of its inputs (settings plus upstream artifacts) in workflow_checkpoints.json; a step
+    whose inputs are unchanged and whose artifact still exists is skipped and its artifact reused.
+
+    on_event(step, kind, payload) reports progress: 'started'/'skipped'/'finished' (StepResult),
+    'status' and 'warning' (message), 'batches' ((title, batch descriptions), before each set of
+    concurrent batches), 'batch' ((kind, index, payload) as reported by run_agent_batches),
+    'stream' (chunks received so far) and 'parse_error' (message). Failures raise WorkflowError.
+
+    A `backend` with a wrap(agent) method (see llm_replay_backend.py) replaces the model calls, e.g.
+    to replay recorded responses offline.
+    """
+
+    def __init__(self, settings, output_dir=AGENT_OUTPUT_DIR, response_cache=None, on_event=None, backend=None):
+        self.settings = settings
+        self.output_dir = output_dir
+        self.response_cache = response_cache
+        self.backend = backend # e.g. llm_replay_backend.ReplayBackend; None calls the agents' own models
+        self.on_event = on_event
+        self.results = []
+        self.artifacts = {}
+        self.failed_value_list_labels = {}
+        os.makedirs(output_dir, exist_ok=True)
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILENAME)
+        self.checkpoints = self._load_checkpoints()
+        self.property_groupings, warning = parse_json_object(settings.property_grouping_text, "Property Grouping Definitions")
+        if warning:
+            self._emit("value_lists", "warning", warning)
+        self.steps = {
+            "schema_analysis": self.run_schema_analysis,
+            "generation_plan": self.run_generation_plan,
+            "value_lists": self.run_value_lists,
+            "generation_rules": self.run_generation_rules,
+            "cardinality_rules": self.run_cardinality_rules,
+            "code_plan": self.run_code_plan,
+            "code": self.run_code_generation,
+        }
+
+    def run(self, steps=WORKFLOW_STEPS):
+        """Runs the given steps in order and returns their StepResults."""
+        for name in steps:
+            self.steps[name]()
+        return self.results
+
+    # --- Plumbing ---
+
+    def _emit(self, step, kind, payload=None):
+        if self.on_event:
+            self.on_event(step, kind, payload)
+
+    def _path(self, filename):
+        return os.path.join(self.output_dir, filename)
+
+    def _load_checkpoints(self):
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoints = json.load(f)
+            return checkpoints if isinstance(checkpoints, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable workflow checkpoints {self.checkpoint_path}: {e}")
+            return {}
+
+    def _save_checkpoints(self):
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.checkpoints, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _write_text(self, filename, text):
+        try:
+            with open(self._path(filename), "w", encoding="utf-8") as f:
+                f.write(text or "")
+        except OSError as e:
+            logger.warning(f"Could not save {filename}: {e}")
+
+    def _agent(self, agent, validate=None):
+        # Replayed/synthetic outputs are never cached: they would be served back as recordings and skip the simulated timing
+        if self.backend:
+            return self.backend.wrap(agent)
+        return self.response_cache.wrap(agent, validate=validate) if self.response_cache else agent
+
+    def _parse(self, result, parse, text):
+        """Calls parse(text) (safe_json_loads, extract_python_code) and adds its duration to the step's parse time."""
+        started = time.perf_counter()
+        try:
+            return parse(text)
+        finally:
+            result.parse_seconds += time.perf_counter() - started
+
+    def _llm_inputs(self, agent):
+        """Checkpoint inputs shared by LLM steps: model and the agent's instructions."""
+        return {"model": self.settings.model_name, "agent": describe_agent(agent)[2]}
+
+    def artifact(self, name):
+        """The artifact of an upstream step: from this run, else from its file in output_dir."""
+        if name in self.artifacts:
+            return self.artifacts[name]
+        filename = {"schema_analysis": SCHEMA_ANALYSIS_FILENAME, "generation_plan": GENERATION_PLAN_FILENAME,
+                    "value_lists": VALUE_LISTS_FILENAME, "generation_rules": GENERATION_RULES_FILENAME,
+                    "code_plan": PYTHON_CODE_PLAN_FILENAME}[name]
+        try:
+            with open(self._path(filename), "r", encoding="utf-8") as f:
+                value = f.read() if name == "code_plan" else json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise WorkflowError(name, f"Missing or invalid '{filename}' in {self.output_dir}; run the '{name}' step first. ({e})")
+        self.artifacts[name] = value
+        return value
+
+    def _run_step(self, name, filename, inputs, produce):
+        """Skips the step when its checkpoint matches `inputs`; otherwise calls produce(result) and saves its artifact."""
+        path = self._path(filename)
+        result = StepResult(name, path)
+        input_hash = hash_inputs(inputs)
+        checkpoint = self.checkpoints.get(name)
+        forced = name in self.settings.force_steps or "all" in self.settings.force_steps
+        if not forced and checkpoint and checkpoint.get("input_hash") == input_hash and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f) if filename.endswith(".json") else f.read()
+                result.status = "skipped"
+                result.detail = f"inputs unchanged since {checkpoint.get('completed_at', 'last run')}"
+                self.artifacts[name] = value
+                self.results.append(result)
+                logger.info(f"Step '{name}': {result.detail}; reusing {filename}.")
+                self._emit(name, "skipped", result)
+                return value
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Step '{name}': checkpointed artifact unreadable ({e}); re-running.")
+
+        self._emit(name, "started", result)
+        started = time.monotonic()
+        value = produce(result)
+        result.elapsed = time.monotonic() - started
+        result.status = "ran"
+        with open(path, "w", encoding="utf-8") as f:
+            if filename.endswith(".json"):
+                json.dump(value, f, indent=2)
+            else:
+                f.write(value)
+        if result.complete:
+            self.checkpoints[name] = {"input_hash": input_hash, "artifact": filename, "completed_at": datetime.now().isoformat(timespec="seconds")}
+        else:
+            self.checkpoints.pop(name, None) # Partial artifact: run again next time
+        self._save_checkpoints()
+        self.artifacts[name] = value
+        self.results.append(result)
+        logger.info(f"Step '{name}' finished in {result.elapsed:.1f}s ({result.calls} call(s), "
+                    f"{result.input_tokens} input / {result.output_tokens} output tokens{' (estimated)' if result.estimated else ''}).")
+        self._emit(name, "finished", result)
+        return value
+
+    def _batch_events(self, step, result, agent, messages):
+        """on_event for run_agent_batches: forwards batch events and counts tokens of finished batches."""
+        def on_event(kind, index, payload):
+            if kind == "finished":
+                result.add_usage(token_usage(agent, messages[index], payload.content))
+                result.add_timing(payload.ttft, payload.parse_seconds)
+            self._emit(step, "batch", (kind, index, payload))
+        return on_event
+
+    def _stream(self, step, result, agent, message, validate, parser=None):
+        """Streams one agent call, reporting chunks (and parse errors with a parser); returns the full text."""
+        chunks = []
+        ttft = None
+        started = time.monotonic()
+        try:
+            for chunk in self._agent(agent, validate=validate).run(message=message, stream=True):
+                if chunk and getattr(chunk, "content", None):
+                    if ttft is None:
+                        ttft = time.monotonic() - started
+                    chunks.append(chunk.content)
+                    if parser:
+                        known_errors = len(parser.errors)
+                        self._parse(result, parser.feed, chunk.content)
+                        for error in parser.errors[known_errors:]:
+                            self._emit(step, "parse_error", error)
+                    self._emit(step, "stream", chunks)
+        except Exception as e:
+            logger.error(f"Error during {agent.name} streaming: {e}", exc_info=True)
+            raise WorkflowError(step, f"{agent.name} streaming error: {e}", "".join(chunks) or "No content received before error") from e
+        text = "".join(chunks)
+        result.add_usage(token_usage(agent, message, text))
+        result.add_timing(ttft)
+        return text
+
+    def _call(self, result, agent, message, validate=None):
+        """One non-streamed agent call; returns its text."""
+        started = time.monotonic()
+        response = self._agent(agent, validate=validate).run(message=message, stream=False)
+        result.add_usage(token_usage(agent, message, response.content, response))
+        result.add_timing(time.monotonic() - started)
+        return response.content
+
+    # --- Steps ---
+
+    def run_schema_analysis(self):
+        s = self.settings
+        inputs = {"schema": s.schema_text, "run_schema_analysis": s.run_schema_analysis, "use_schema_rules": s.use_schema_rules,
+                  "llm_fallback": s.schema_rules_llm_fallback, "budgets": [s.input_token_budget, s.output_token_budget],
+                  **self._llm_inputs(schema_analyzer)}
+        return self._run_step("schema_analysis", SCHEMA_ANALYSIS_FILENAME, inputs, self._produce_schema_analysis)
+
+    def _produce_schema_analysis(self, result):
+        s = self.settings
+        step = "schema_analysis"
+        if not s.run_schema_analysis:
+            analysis = safe_json_loads(s.schema_text)
+            if not isinstance(analysis, dict):
+                raise WorkflowError(step, "Invalid JSON in the schema file.", s.schema_text)
+            if "nodes" not in analysis or "relationships" not in analysis:
+                raise WorkflowError(step, "The schema analysis is missing the required 'nodes' or 'relationships' top-level keys.")
+            missing_id_prop = [lbl for lbl, data in analysis.get("nodes", {}).items() if not isinstance(data, dict) or not data.get("id_property")]
+            if missing_id_prop:
+                raise WorkflowError(step, f"Missing 'id_property' for nodes: {', '.join(missing_id_prop)}. The schema analysis must define it for every node when the analysis step is skipped.")
+            result.detail = "parsed directly"
+            return analysis
+
+        try:
+            raw_schema = json.loads(s.schema_text)
+        except json.JSONDecodeError as e:
+            raise WorkflowError(step, f"Invalid JSON in the schema file: {e}", s.schema_text) from e
+        input_nodes = raw_schema.get("nodes", {})
+        input_relationships = flatten_relationships(raw_schema.get("relationships", {}))
+
+        rule_based_analysis = None
+        if s.use_schema_rules:
+            rule_based_analysis, ambiguous_labels, _ = analyze_schema_with_rules({"nodes": input_nodes, "relationships": input_relationships})
+            self._emit(step, "status", f"Rules resolved {len(rule_based_analysis['nodes']) - len(ambiguous_labels)}/{len(rule_based_analysis['nodes'])} labels "
+                                       f"and {len(rule_based_analysis['relationships'])} relationships.")
+            # Only the ambiguous labels (if enabled) go to the agent; relationships are fully handled by the rules
+            input_nodes = {label: input_nodes[label] for label in ambiguous_labels} if s.schema_rules_llm_fallback else {}
+            input_relationships = []
+
+        analysis = self._analyze_schema_batches(result, input_nodes, input_relationships)
+        if rule_based_analysis is None:
+            return analysis
+        # Agent answers for ambiguous labels replace the rules' created-ID defaults
+        rule_based_analysis["nodes"].update({label: details for label, details in analysis["nodes"].items() if label in rule_based_analysis["nodes"]})
+        result.detail = "rule-based"
+        return rule_based_analysis
+
+    def _analyze_schema_batches(self, result, input_nodes, input_relationships):
+        s = self.settings
+        step = "schema_analysis"
+        # Node batches carry no relationships; relationship batches carry no nodes
+        node_batches = pack_label_batches(input_nodes, list(input_nodes), None, s.input_token_budget, s.output_token_budget, output_tokens=schema_output_tokens) if input_nodes else []
+        relationship_batches = pack_relationship_batches(input_relationships, s.input_token_budget, s.output_token_budget) if input_relationships else []
+        messages, descriptions = [], []
+        for labels in node_batches:
+            messages.append(json.dumps({"nodes": {label: input_nodes[label] for label in labels}, "relationships": []}))
+            descriptions.append(f"{len(labels)} nodes")
+        for relationships in relationship_batches:
+            messages.append(json.dumps({"nodes": {}, "relationships": relationships}))
+            descriptions.append(f"{len(relationships)} relationships")
+        if not messages:
+            return {"nodes": {}, "relationships": []}
+
+        logger.info(f"SchemaAnalyzer: Running {len(messages)} batch(es) ({len(node_batches)} node, {len(relationship_batches)} relationship) concurrently.")
+        self._emit(step, "batches", ("Schema Analyzer", descriptions))
+        batch_results = run_agent_batches(
+            self._agent(schema_analyzer, validate=_is_json), messages,
+            max_in_flight=s.max_in_flight, requests_per_minute=s.requests_per_minute,
+            on_event=self._batch_events(step, result, schema_analyzer, messages),
+        )
+        self._write_text(RAW_SCHEMA_AGENT_OUTPUT_FILENAME, json.dumps([r.content for r in batch_results], indent=2))
+
+        # Merge in batch order so the result does not depend on completion order
+        merged_nodes = {}
+        merged_relationships = {} # (type, source, target) -> relationship
+        for batch_result in batch_results:
+            i = batch_result.index
+            if batch_result.error is not None:
+                kind = "ModelProviderError" if isinstance(batch_result.error, ModelProviderError) else "Run Error"
+                raise WorkflowError(step, f"Schema Analyzer Batch {i+1} {kind}: {batch_result.error}", batch_result.content or "No content before error")
+            batch_analysis = self._parse(result, safe_json_loads, batch_result.content)
+            if batch_analysis is None:
+                self._write_text(f"failed_schema_batch_{i+1}_raw_output.json", batch_result.content or "{}")
+                raise WorkflowError(step, f"Schema Analyzer Batch {i+1}: invalid JSON output.", batch_result.content or "No content received from agent for this batch")
+            merged_nodes.update(batch_analysis.get("nodes", {}))
+            for rel in batch_analysis.get("relationships", []):
+                rel_key = (rel.get("type"), rel.get("source"), rel.get("target"))
+                if all(k is not None for k in rel_key) and rel_key not in merged_relationships:
+                    merged_relationships[rel_key] = rel
+        return {"nodes": merged_nodes, "relationships": list(merged_relationships.values())}
+
+    def run_generation_plan(self):
+        s = self.settings
+        inputs = {"schema_analysis": self.artifact("schema_analysis"), "num_stores": s.num_stores, "num_customers": s.num_customers,
+                  "upload": s.generation_plan_text, **self._llm_inputs(data_planner)}
+        return self._run_step("generation_plan", GENERATION_PLAN_FILENAME, inputs, self._produce_generation_plan)
+
+    def _produce_generation_plan(self, result):
+        s = self.settings
+        step = "generation_plan"
+        if s.generation_plan_text is not None:
+            plan = safe_json_loads(s.generation_plan_text)
+            if not isinstance(plan, dict):
+                raise WorkflowError(step, "Uploaded generation plan does not contain valid JSON or is not a dictionary.", s.generation_plan_text)
+            result.detail = "from upload"
+            return plan
+        message = json.dumps({"schema_analysis": self.artifact("schema_analysis"), "num_stores": s.num_stores, "num_customers": s.num_customers})
+        content = self._call(result, data_planner, message, validate=_is_json)
+        plan = self._parse(result, safe_json_loads, content)
+        if not isinstance(plan, dict):
+            raise WorkflowError(step, "Data Planner Agent returned invalid JSON.", content or "No content")
+        self._emit(step, "status", f"Data Planning Complete (Total Nodes: {sum(v for v in plan.values() if isinstance(v, (int, float)))}).")
+        return plan
+
+    def run_value_lists(self):
+        s = self.settings
+        inputs = {"schema_analysis": self.artifact("schema_analysis"), "additional_instructions": s.additional_instructions,
+                  "property_groupings": self.property_groupings, "budgets": [s.input_token_budget, s.output_token_budget],
+                  "upload": s.value_lists_text, **self._llm_inputs(value_list_generator)}
+        return self._run_step("value_lists", VALUE_LISTS_FILENAME, inputs, self._produce_value_lists)
+
+    def _produce_value_lists(self, result):
+        s = self.settings
+        step = "value_lists"
+        self.failed_value_list_labels = {}
+        if s.value_lists_text is not None:
+            value_lists = safe_json_loads(s.value_lists_text)
+            if not isinstance(value_lists, dict):
+                raise WorkflowError(step, "Uploaded value list file does not contain valid JSON or is not a dictionary.", s.value_lists_text)
+            result.detail = "from upload"
+            return value_lists
+
+        schema_analysis = self.artifact("schema_analysis")
+        nodes = schema_analysis.get("nodes", {})
+        relationships = schema_analysis.get("relationships", [])
+        rels_by_label = index_relationships(relationships)
+        labels = list(nodes)
+        raw_outputs = [] # Raw output of every call, including retries
+        round_messages = []
+
+        def build_message(batch_labels):
+            """Agent input for a batch: its schema nodes plus the relationships touching them, for context."""
+            message_dict = {
+                "schema_analysis": {
+                    "nodes": {label: nodes[label] for label in batch_labels},
+                    "relationships": relationships_for_labels(batch_labels, relationships, rels_by_label),
+                },
+                "additional_instructions": s.additional_instructions,
+            }
+            if self.property_groupings: message_dict["property_grouping_definitions"] = self.property_groupings
+            round_messages.append(json.dumps(message_dict))
+            return round_messages[-1]
+
+        context = [s.additional_instructions, self.property_groupings, s.model_name]
+        # A label's fingerprint covers its node and the relationships sent along with it
+        fingerprints = {label: label_fingerprint([nodes[label], relationships_for_labels([label], relationships, rels_by_label)], context) for label in labels}
+        forward = self._batch_events(step, result, value_list_generator, round_messages)
+
+        def on_round(round_number, batches):
+            round_messages.clear()
+            self._emit(step, "batches", (f"Value List Generator (round {round_number})", [f"{len(b)} labels" for b in batches]))
+
+        def on_event(kind, index, payload):
+            if kind == "finished": raw_outputs.append(payload.content)
+            forward(kind, index, payload)
+
+        logger.info(f"Running ValueListGenerator for {len(labels)} labels in token-budgeted batches (resume={s.resume_value_lists}).")
+        value_lists, failed = generate_value_lists(
+            self._agent(value_list_generator, validate=_is_json), labels, build_message, self._path(VALUE_LISTS_FILENAME), fingerprints,
+            resume=s.resume_value_lists, max_in_flight=s.max_in_flight, requests_per_minute=s.requests_per_minute,
+            backoff_errors=(ModelProviderError,), fallback_parse=lambda text: self._parse(result, safe_json_loads, text),
+            on_event=on_event, on_round=on_round,
+            plan_batches=lambda pending: pack_label_batches(nodes, pending, relationships, s.input_token_budget, s.output_token_budget),
+            needs_values=lambda label: has_value_list_properties(nodes[label]),
+        )
+        self._write_text(RAW_VALUE_LIST_STREAMED_FILENAME, "".join(f"\n\n--- Batch {i+1} Raw Output ---\n{content}" for i, content in enumerate(raw_outputs)).strip())
+        self.failed_value_list_labels = failed
+        if failed:
+            result.complete = False
+            result.detail = f"{len(failed)} label(s) failed"
+            self._emit(step, "warning", f"Value List generation gave up on {len(failed)} label(s) after retries: {', '.join(sorted(failed))}. "
+                                        f"'{VALUE_LISTS_FILENAME}' holds every completed label; run again with resume to finish only the missing ones.")
+        elif not value_lists:
+            self._emit(step, "warning", "No value lists were generated. This could be due to errors in all batches or no string properties needing value lists.")
+        return value_lists
+
+    def run_generation_rules(self):
+        s = self.settings
+        inputs = {"schema_analysis": self.artifact("schema_analysis"), "additional_instructions": s.additional_instructions,
+                  **self._llm_inputs(generation_rule_generator)}
+        return self._run_step("generation_rules", GENERATION_RULES_FILENAME, inputs, self._produce_generation_rules)
+
+    def _produce_generation_rules(self, result):
+        step = "generation_rules"
+        message = json.dumps({"schema_analysis": self.artifact("schema_analysis"), "additional_instructions": self.settings.additional_instructions})
+        parser = IncrementalJSONParser()
+        text = self._stream(step, result, generation_rule_generator, message, _is_json, parser)
+        logger.info(f"GenerationRuleGenerator streaming finished ({len(parser.entries)} entries parsed incrementally).")
+        self._write_text(RAW_GENERATION_RULES_FILENAME, text or "{}")
+        rules = parser.result() if parser.ok else self._parse(result, safe_json_loads, text)
+        if rules is None:
+            raise WorkflowError(step, "GenerationRuleGenerator failed to return valid JSON after streaming.", text or "No content received")
+        return rules
+
+    def run_cardinality_rules(self):
+        """Saves the optional cardinality rules (or removes a stale file); cheap, so never checkpointed."""
+        result = StepResult("cardinality_rules", self._path(CARDINALITY_RULES_FILENAME))
+        rules, warning = parse_json_object(self.settings.cardinality_rules_text, "Cardinality Rules")
+        if warning:
+            self._emit(result.name, "warning", warning)
+        if rules:
+            with open(result.artifact_path, "w", encoding="utf-8") as f:
+                json.dump(rules, f, indent=2)
+            logger.info(f"Cardinality rules saved to {result.artifact_path}")
+            result.detail = f"{len(rules)} rule(s)"
+        elif os.path.exists(result.artifact_path):
+            os.remove(result.artifact_path)
+            logger.info("Removed existing cardinality rules file as none were provided.")
+        result.status = "ran"
+        self.artifacts[result.name] = rules
+        self.results.append(result)
+        self._emit(result.name, "finished", result)
+        return rules
+
+    def _code_plan_message(self):
+        s = self.settings
+        return json.dumps({
+            "schema_analysis_filename": SCHEMA_ANALYSIS_FILENAME,
+            "generation_plan_filename": GENERATION_PLAN_FILENAME,
+            "value_lists_filename": VALUE_LISTS_FILENAME,
+            "cardinality_rules_filename": CARDINALITY_RULES_FILENAME,
+            "generation_rules_filename": GENERATION_RULES_FILENAME,
+            "enforce_date_consistency": s.enforce_date_consistency,
+            "additional_instructions": s.additional_instructions,
+        })
+
+    def run_code_plan(self):
+        python_code_planner.instructions = PYTHON_CODE_PLANNER_BASE_INSTRUCTIONS.replace("output.cypher", self.settings.output_cypher_filename)
+        inputs = {"message": self._code_plan_message(), **self._llm_inputs(python_code_planner)}
+        return self._run_step("code_plan", PYTHON_CODE_PLAN_FILENAME, inputs, self._produce_code_plan)
+
+    def _produce_code_plan(self, result):
+        message = self._code_plan_message()
+        content = self._call(result, python_code_planner, message)
+        if not content:
+            raise WorkflowError("code_plan", "Python Code Planner returned no plan.")
+        return content
+
+    def _code_message(self, code_plan):
+        return f"""
+                Input Filenames:
+                ```json
+                {json.dumps({
+                    "schema_analysis_filename": SCHEMA_ANALYSIS_FILENAME,
+                    "generation_plan_filename": GENERATION_PLAN_FILENAME,
+                    "value_lists_filename": VALUE_LISTS_FILENAME,
+                    "cardinality_rules_filename": CARDINALITY_RULES_FILENAME,
+                    "generation_rules_filename": GENERATION_RULES_FILENAME
+                })}
+                ```
+                Date Consistency Flag:
+                ```json
+                {json.dumps(self.settings.enforce_date_consistency)}
+                ```
+                Code Plan:
+                ```markdown
+                {code_plan}
+                ```
+                """
+
+    def run_code_generation(self):
+        python_code_generator.instructions = PYTHON_CODE_GENERATOR_BASE_INSTRUCTIONS.replace("generated_data.cypher", self.settings.output_cypher_filename)
+        s = self.settings
+        inputs = {"message": self._code_message(self.artifact("code_plan")), **self._llm_inputs(python_code_generator),
+                  "validation": vars(s.validation_budget) if s.validate_script else None}
+        return self._run_step("code", s.output_py_filename, inputs, self._produce_code)
+
+    def _produce_code(self, result):
+        """Generates the script; with validation on, a rejected script is sent back to the agent with the measurements."""
+        s = self.settings
+        message = self._code_message(self.artifact("code_plan"))
+        attempts = max(1, s.code_attempts) if s.validate_script else 1
+        for attempt in range(1, attempts + 1):
+            text = self._stream("code", result, python_code_generator, message, lambda output: extract_python_code(output) is not None)
+            logger.info("PythonCodeGenerator streaming finished.")
+            self._write_text(RAW_CODE_GEN_STREAMED_FILENAME, text)
+            script = self._parse(result, extract_python_code, text)
+            if script is None:
+                self._write_text(FAILED_CODE_OUTPUT_FILENAME, text)
+                raise WorkflowError("code", "Code Generator failed to return valid Python code after streaming.", text or "No content received")
+            if not s.validate_script:
+                return script
+            report = self._validate_script(script)
+            if report.ok:
+                result.detail = f"validated: {report.nodes_per_second or 0:,.0f} nodes/s, peak RSS {report.peak_rss_mb or 0:.0f} MB"
+                return script
+            self._write_text(FAILED_CODE_OUTPUT_FILENAME, script)
+            self._emit("code", "warning", f"Attempt {attempt}/{attempts}: {report.summary()}")
+            message = self._code_message(self.artifact("code_plan")) + "\n" + feedback_for_agent(report, s.validation_budget.scale)
+        raise WorkflowError("code", f"Generated script rejected after {attempts} attempt(s): {'; '.join(report.violations)}", report.stderr_tail or None)
+
+    def _validate_script(self, script):
+        """Runs the script on a scaled-down plan in a sandbox (see datagen_script_validator) and saves the report."""
+        self._emit("code", "status", f"Validating the generated script at {self.settings.validation_budget.scale:.0%} of the plan...")
+        with tempfile.TemporaryDirectory(prefix="datagen_candidate_") as candidate_dir:
+            candidate_path = os.path.join(candidate_dir, self.settings.output_py_filename)
+            with open(candidate_path, "w", encoding="utf-8") as f:
+                f.write(script)
+            report = validate_script(candidate_path, self.output_dir, self.settings.validation_budget)
+        write_report(report, self.output_dir)
+        self._emit("code", "status", report.summary())
+        return report
+
+    # --- Reporting ---
+
+    def format_report(self):
+        """Per-step timing (wall, mean time to first chunk, parsing) and token usage as table lines; '~' marks estimated token counts."""
+        lines = [f"{'Step':<18} {'Status':<8} {'Time':>8} {'TTFT':>7} {'Parse':>7} {'Calls':>6} {'In tokens':>11} {'Out tokens':>11}  Detail"]
+        for r in self.results:
+            mark = "~" if r.estimated else ""
+            ttft = f"{r.mean_ttft:.2f}s" if r.mean_ttft is not None else "-"
+            lines.append(f"{r.name:<18} {r.status:<8} {r.elapsed:>7.1f}s {ttft:>7} {r.parse_seconds:>6.2f}s {r.calls:>6} "
+                         f"{mark + str(r.input_tokens):>11} {mark + str(r.output_tokens):>11}  {r.detail}")
+        lines.append(f"{'Total':<18} {'':<8} {sum(r.elapsed for r in self.results):>7.1f}s {'':>7} {sum(r.parse_seconds for r in self.results):>6.2f}s "
+                     f"{sum(r.calls for r in self.results):>6} {sum(r.input_tokens for r in self.results):>11} {sum(r.output_tokens for r in self.results):>11}")
+        return lines
+
+def _read_optional(path):
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def _log_event(step, kind, payload):
+    if kind in ("status", "warning", "parse_error"):
+        (logger.warning if kind != "status" else logger.info)(f"[{step}] {payload}")
+    elif kind == "batches":
+        logger.info(f"[{step}] {payload[0]}: {len(payload[1])} batch(es)")
+    elif kind == "batch" and payload[0] == "finished":
+        batch = payload[2]
+        logger.info(f"[{step}] batch {batch.index + 1} {'done' if batch.ok else 'failed'} in {batch.elapsed:.1f}s")
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    dotenv.load_dotenv(override=True)
+
+    parser = argparse.ArgumentParser(description="Runs the synthetic data agent workflow without the Streamlit UI.")
+    parser.add_argument("--schema", required=True, help="Raw schema JSON (or a pre-analyzed schema with --analyzed-schema)")
+    parser.add_argument("--analyzed-schema", action="store_true", help="The schema already has the schema_analysis.json structure (skip the analyzer)")
+    parser.add_argument("--no-schema-rules", action="store_true", help="Analyze the schema with LLM batches instead of the rule-based analyzer")
+    parser.add_argument("--no-llm-fallback", action="store_true", help="Do not ask the agent about labels the rules find ambiguous")
+    parser.add_argument("--stores", type=int, default=50, help="Target stores")
+    parser.add_argument("--customers", type=int, default=1000, help="Target customers")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="Gemini model name")
+    parser.add_argument("--instructions", default="", help="Additional instructions (context) for the agents")
+    parser.add_argument("--no-date-consistency", action="store_true", help="Do not ask for logical date ordering")
+    parser.add_argument("--cardinality-rules", help="Cardinality rules JSON file")
+    parser.add_argument("--property-groupings", help="Property grouping definitions JSON file")
+    parser.add_argument("--generation-plan", help="Use this generation plan JSON instead of the Data Planner")
+    parser.add_argument("--value-lists", help="Use these value lists JSON instead of the Value List Generator")
+    parser.add_argument("--resume-value-lists", action="store_true", help="Only generate value lists for missing or changed labels")
+    parser.add_argument("--output-py", default=DEFAULT_OUTPUT_PY_FILENAME, help="Generated Python script name")
+    parser.add_argument("--output-cypher", default=DEFAULT_OUTPUT_CYPHER_FILENAME, help="Cypher file name used in the script")
+    parser.add_argument("--output-dir", default=AGENT_OUTPUT_DIR, help="Directory for artifacts and checkpoints")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Concurrent batch calls")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_REQUESTS_PER_MINUTE, help="Requests per minute (0 = no limit)")
+    parser.add_argument("--input-token-budget", type=int, default=DEFAULT_INPUT_TOKEN_BUDGET, help="Estimated input tokens per batch call")
+    parser.add_argument("--output-token-budget", type=int, default=DEFAULT_OUTPUT_TOKEN_BUDGET, help="Expected output tokens per batch call")
+    parser.add_argument("--force", action="append", default=[], choices=WORKFLOW_STEPS + ("all",), help="Re-run a step even if its inputs are unchanged (repeatable)")
+    parser.add_argument("--stop-after", choices=WORKFLOW_STEPS, help="Stop after this step (e.g. value_lists, to review them before generating code)")
+    parser.add_argument("--bypass-cache", action="store_true", help="Always call the model instead of reusing cached responses")
+    parser.add_argument("--no-validate-script", action="store_true", help="Accept the generated script without a sample run")
+    parser.add_argument("--validation-timeout", type=float, default=ValidationBudget().timeout_seconds, help="Sample run time limit (seconds)")
+    parser.add_argument("--min-nodes-per-second", type=float, default=ValidationBudget().min_nodes_per_second, help="Sample run throughput budget (0 = none)")
+    parser.add_argument("--max-peak-rss-mb", type=float, default=ValidationBudget().max_peak_rss_mb, help="Sample run peak RSS budget (0 = none)")
+    parser.add_argument("--code-attempts", type=int, default=DEFAULT_CODE_ATTEMPTS, help="Code generator calls when the script fails validation")
+    args = parser.parse_args()
+
+    replay_backend = backend_from_env() # SYNTHDATA_LLM_BACKEND=replay runs offline
+    google_api_key = os.getenv("GOOGLE_API_KEY")
+    if not google_api_key and not replay_backend:
+        logger.error("Google API key not found. Set the GOOGLE_API_KEY environment variable (or .env).")
+        sys.exit(1)
+    try:
+        settings = WorkflowSettings(
+            _read_optional(args.schema), run_schema_analysis=not args.analyzed_schema, use_schema_rules=not args.no_schema_rules,
+            schema_rules_llm_fallback=not args.no_llm_fallback, num_stores=args.stores, num_customers=args.customers,
+            model_name=args.model, additional_instructions=args.instructions, enforce_date_consistency=not args.no_date_consistency,
+            cardinality_rules_text=_read_optional(args.cardinality_rules), property_grouping_text=_read_optional(args.property_groupings),
+            generation_plan_text=_read_optional(args.generation_plan), value_lists_text=_read_optional(args.value_lists),
+            resume_value_lists=args.resume_value_lists, output_py_filename=args.output_py, output_cypher_filename=args.output_cypher,
+            max_in_flight=args.max_in_flight, requests_per_minute=args.rpm, input_token_budget=args.input_token_budget,
+            output_token_budget=args.output_token_budget, force_steps=args.force, validate_script=not args.no_validate_script,
+            validation_budget=ValidationBudget(timeout_seconds=args.validation_timeout, min_nodes_per_second=args.min_nodes_per_second,
+                                               max_peak_rss_mb=args.max_peak_rss_mb),
+            code_attempts=args.code_attempts,
+        )
+    except OSError as e:
+        logger.error(f"Could not read an input file: {e}")
+        sys.exit(1)
+
+    if not replay_backend:
+        configure_model(args.model, google_api_key)
+    response_cache = open_response_cache(args.output_dir, bypass=args.bypass_cache)
+    workflow = SynthDataWorkflow(settings, output_dir=args.output_dir, response_cache=response_cache, on_event=_log_event, backend=replay_backend)
+    steps = WORKFLOW_STEPS[:WORKFLOW_STEPS.index(args.stop_after) + 1] if args.stop_after else WORKFLOW_STEPS
+    exit_code = 0
+    try:
+        workflow.run(steps)
+    except WorkflowError as e:
+        logger.error(f"Step '{e.step}' failed: {e}")
+        if e.details:
+            print(str(e.details)[:2000])
+        exit_code = 1
+    print("\n".join(workflow.format_report()))
+    for line in response_cache.format_stats():
+        print(f"LLM cache - {line}")
+    if workflow.failed_value_list_labels:
+        exit_code = exit_code or 2
+    sys.exit(exit_code)
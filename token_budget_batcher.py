@@ -0,0 +1,111 @@
+import json
+import math
+import logging
+from collections import defaultdict
+
+# --- Configuration ---
+CHARS_PER_TOKEN = 4 # Rough tokenizer-independent estimate for JSON-heavy prompts
+DEFAULT_INPUT_TOKEN_BUDGET = 8000 # Target input tokens per call (schema nodes + relevant relationships)
+DEFAULT_OUTPUT_TOKEN_BUDGET = 6000 # Stay well below the model's max output tokens so JSON is not truncated
+VALUE_LIST_TOKENS_PER_STRING_PROPERTY = 150 # ~20 generated values per String property
+SCHEMA_TOKENS_PER_PROPERTY = 15 # Analyzer output per property: {"name": ..., "type": ...}
+SCHEMA_TOKENS_PER_RELATIONSHIP = 30 # Analyzer output per relationship definition
+
+logger = logging.getLogger(__name__)
+
+# --- Estimation ---
+
+def estimate_tokens(obj):
+    """Estimated prompt tokens of obj once serialized the way it is sent (compact JSON for dicts/lists)."""
+    text = obj if isinstance(obj, str) else json.dumps(obj, separators=(",", ":"))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _properties(node_details):
+    props = node_details.get("properties", []) if isinstance(node_details, dict) else []
+    if isinstance(props, dict):
+        return [{"name": name, **(details if isinstance(details, dict) else {})} for name, details in props.items()]
+    return [p for p in props if isinstance(p, dict)]
+
+def value_list_output_tokens(node_details):
+    """Expected ValueListGenerator output for a label: value lists are only generated for String properties."""
+    return sum(VALUE_LIST_TOKENS_PER_STRING_PROPERTY for p in _properties(node_details) if str(p.get("type", "String")).lower() == "string")
+
+def has_value_list_properties(node_details):
+    """True if the ValueListGenerator has anything to fill for the label: a String property other than its id_property."""
+    id_property = node_details.get("id_property") if isinstance(node_details, dict) else None
+    return any(str(p.get("type", "String")).lower() == "string" and p.get("name") != id_property for p in _properties(node_details))
+
+def schema_output_tokens(node_details):
+    return SCHEMA_TOKENS_PER_PROPERTY * (len(_properties(node_details)) + 1)
+
+def index_relationships(relationships):
+    """label -> indices of the relationships that have the label as source or target."""
+    by_label = defaultdict(set)
+    for i, rel in enumerate(relationships or []):
+        if isinstance(rel, dict):
+            by_label[rel.get("source")].add(i)
+            by_label[rel.get("target")].add(i)
+    return by_label
+
+def relationships_for_labels(labels, relationships, by_label=None):
+    """The relationships touching any of `labels`, in schema order."""
+    by_label = by_label if by_label is not None else index_relationships(relationships)
+    indices = set()
+    for label in labels:
+        indices |= by_label.get(label, set())
+    return [relationships[i] for i in sorted(indices)]
+
+# --- Packing ---
+
+def pack_label_batches(nodes, labels, relationships=None, input_token_budget=DEFAULT_INPUT_TOKEN_BUDGET,
+                       output_token_budget=DEFAULT_OUTPUT_TOKEN_BUDGET, output_tokens=value_list_output_tokens):
+    """
+    Greedily packs `labels` (in order) into batches whose estimated input (node definitions plus the
+    relationships touching the batch) and output stay within the budgets. A label that exceeds a
+    budget on its own gets a batch of its own. Pass relationships=None for inputs without relationships.
+    """
+    by_label = index_relationships(relationships) if relationships else {}
+    rel_tokens = [estimate_tokens(rel) for rel in relationships or []]
+    batches = []
+    current, current_rels = [], set()
+    current_in = current_out = 0
+    for label in labels:
+        node = nodes.get(label, {})
+        node_in = estimate_tokens({label: node})
+        new_rels = by_label.get(label, set()) - current_rels
+        label_in = node_in + sum(rel_tokens[i] for i in new_rels)
+        label_out = output_tokens(node)
+        if current and (current_in + label_in > input_token_budget or current_out + label_out > output_token_budget):
+            batches.append(current)
+            current, current_rels = [], set()
+            current_in = current_out = 0
+            new_rels = by_label.get(label, set())
+            label_in = node_in + sum(rel_tokens[i] for i in new_rels)
+        current.append(label)
+        current_rels |= new_rels
+        current_in += label_in
+        current_out += label_out
+    if current:
+        batches.append(current)
+    logger.info(f"Packed {len(labels)} labels into {len(batches)} batch(es) "
+                f"(budgets: {input_token_budget} input / {output_token_budget} output tokens).")
+    return batches
+
+def pack_relationship_batches(relationships, input_token_budget=DEFAULT_INPUT_TOKEN_BUDGET,
+                              output_token_budget=DEFAULT_OUTPUT_TOKEN_BUDGET):
+    """Splits a relationship list into consecutive batches within the input/output token budgets."""
+    batches = []
+    current = []
+    current_in = current_out = 0
+    for rel in relationships:
+        rel_in = estimate_tokens(rel)
+        if current and (current_in + rel_in > input_token_budget or current_out + SCHEMA_TOKENS_PER_RELATIONSHIP > output_token_budget):
+            batches.append(current)
+            current = []
+            current_in = current_out = 0
+        current.append(rel)
+        current_in += rel_in
+        current_out += SCHEMA_TOKENS_PER_RELATIONSHIP
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+
+from agent_batch_executor import run_agent_batches, DEFAULT_MAX_IN_FLIGHT, DEFAULT_REQUESTS_PER_MINUTE
+from json_stream_parser import IncrementalJSONParser
+
+# --- Configuration ---
+DEFAULT_BATCH_SIZE = 25 # Labels per ValueListGenerator call on the first round
+MAX_LABEL_ATTEMPTS = 4 # A label is given up after this many failed calls
+BACKOFF_BASE_SECONDS = 5.0 # Wait after a round with provider errors: base * 2**(n-1), plus jitter
+BACKOFF_MAX_SECONDS = 120.0
+PROGRESS_FILENAME_SUFFIX = ".progress.json" # value_lists.json -> value_lists.progress.json
+
+logger = logging.getLogger(__name__)
+
+# --- Persistence ---
+
+def label_fingerprint(node_details, context):
+    """Hash of everything the value lists of one label depend on (its schema node and the shared instructions)."""
+    payload = json.dumps([node_details, context], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def progress_path_for(output_path):
+    return os.path.splitext(output_path)[0] + PROGRESS_FILENAME_SUFFIX
+
+def _write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def load_progress(output_path, fingerprints):
+    """
+    Returns (value_lists, completed_labels) from a previous (possibly interrupted) run. Only labels
+    whose fingerprint still matches are treated as completed; their value lists are kept.
+    """
+    try:
+        with open(output_path, "r", encoding="utf-8") as f:
+            value_lists = json.load(f)
+        with open(progress_path_for(output_path), "r", encoding="utf-8") as f:
+            progress = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.info(f"No resumable value-list progress at {output_path}: {e}")
+        return {}, set()
+    completed = {label for label, fp in progress.get("completed", {}).items() if fingerprints.get(label) == fp}
+    kept = {label: values for label, values in value_lists.items() if label in completed} if isinstance(value_lists, dict) else {}
+    logger.info(f"Resuming value lists: {len(completed)} of {len(fingerprints)} labels already completed.")
+    return kept, completed
+
+# --- Scheduler ---
+
+def _split(labels):
+    middle = (len(labels) + 1) // 2
+    return [labels[:middle], labels[middle:]]
+
+def generate_value_lists(agent, labels, build_message, output_path, fingerprints, resume=False,
+                         batch_size=DEFAULT_BATCH_SIZE, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                         requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, backoff_errors=(),
+                         fallback_parse=None, on_event=None, on_round=None, plan_batches=None, needs_values=None):
+    """
+    Runs the ValueListGenerator over `labels` in rounds until every label completed or ran out of attempts.
+
+    - build_message(batch_labels) returns the agent input for a batch. plan_batches(labels), if given,
+      groups the labels of the first round (e.g. by token budget) instead of fixed batch_size chunks.
+    - The labels of a batch whose entries parsed are kept, whether the whole stream parsed or it broke
+      off. needs_values(label) tells whether a label has string properties to fill; labels for which it
+      returns False are finished even when the agent omits them (default: every label must be returned).
+      The rest counts as a failed attempt and is re-queued, split in half for JSON/size failures.
+    - Batches that failed with one of `backoff_errors` (e.g. ModelProviderError) are re-queued whole
+      after an exponential backoff.
+    - After every batch, completed labels are written to output_path and their fingerprints to the
+      progress file next to it, so resume=True only runs labels that are missing or changed.
+
+    on_round(round_number, batches) is called before each round with the batch label lists; on_event is
+    passed through to run_agent_batches. Returns (value_lists, failed_labels) where failed_labels maps
+    each abandoned label to its last error.
+    """
+    value_lists, completed = load_progress(output_path, fingerprints) if resume else ({}, set())
+    progress = {"completed": {label: fingerprints[label] for label in completed}}
+    attempts = {label: 0 for label in labels}
+    last_error = {}
+    pending = [label for label in labels if label not in completed]
+    if plan_batches:
+        batches = plan_batches(pending) if pending else []
+    else:
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    provider_failure_rounds = 0
+    round_number = 0
+
+    def persist():
+        _write_json_atomic(output_path, value_lists)
+        _write_json_atomic(progress_path_for(output_path), progress)
+
+    def finish(batch_labels, parsed):
+        value_lists.update(parsed)
+        for label in batch_labels:
+            progress["completed"][label] = fingerprints.get(label)
+        persist()
+
+    while batches:
+        round_number += 1
+        if on_round:
+            on_round(round_number, batches)
+        logger.info(f"Value lists round {round_number}: {len(batches)} batch(es), {sum(len(b) for b in batches)} label(s).")
+        results = run_agent_batches(
+            agent, [build_message(batch) for batch in batches],
+            max_in_flight=max_in_flight, requests_per_minute=requests_per_minute,
+            on_event=on_event, parser_factory=IncrementalJSONParser,
+        )
+
+        next_batches = []
+        provider_failure = False
+        for batch_labels, result in zip(batches, results):
+            parser = result.parser
+            parsed = None
+            if result.ok and parser and parser.ok:
+                parsed = parser.result()
+            elif result.ok and fallback_parse:
+                parsed = fallback_parse(result.content)
+            if isinstance(parsed, dict):
+                error = "label missing from the agent output"
+            else:
+                # Keep whatever labels streamed in intact before the failure
+                parsed = dict(parser.entries if parser else [])
+                error = result.error or (parser.errors[-1] if parser and parser.errors else "incomplete or invalid JSON")
+            parsed_entries = {key: value for key, value in parsed.items() if key in batch_labels}
+            done = [label for label in batch_labels if label in parsed_entries or (needs_values and not needs_values(label))]
+            if done:
+                finish(done, parsed_entries)
+            remaining = [label for label in batch_labels if label not in done]
+            if not remaining:
+                continue
+            for label in remaining:
+                attempts[label] += 1
+                last_error[label] = str(error)
+            remaining = [label for label in remaining if attempts[label] < MAX_LABEL_ATTEMPTS]
+            if not remaining:
+                continue
+            if backoff_errors and isinstance(result.error, backoff_errors):
+                provider_failure = True
+                next_batches.append(remaining)
+            elif len(remaining) > 1:
+                next_batches.extend(_split(remaining)) # Smaller outputs are less likely to be truncated or malformed
+            else:
+                next_batches.append(remaining)
+            logger.warning(f"Value list batch of {len(batch_labels)} label(s) failed ({error}); re-queued {len(remaining)} label(s).")
+
+        if provider_failure and next_batches:
+            provider_failure_rounds += 1
+            delay = min(BACKOFF_BASE_SECONDS * 2 ** (provider_failure_rounds - 1), BACKOFF_MAX_SECONDS)
+            delay *= random.uniform(0.8, 1.2)
+            logger.info(f"Provider error(s) in round {round_number}; backing off {delay:.1f}s before retrying.")
+            time.sleep(delay)
+        batches = next_batches
+
+    failed = {label: last_error.get(label, "") for label in labels if label not in progress["completed"]}
+    if failed:
+        logger.error(f"Value lists could not be generated for {len(failed)} label(s): {', '.join(sorted(failed))}")
+    persist()
+    return value_lists, failed
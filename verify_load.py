@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import datetime
+
+try:
+    from neo4j import GraphDatabase
+except ImportError:
+    GraphDatabase = None # Only needed to connect; LoadVerifier accepts any session
+
+from load_cypher import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE, SCRIPT_DIR, CYPHER_FILE_PATH # Also sets up logging
+from datagen_runtime import (DatagenConfigError, Diagnostics, load_config, node_id_properties, generate_sequential_id, resolve_rule,
+                             parse_date_string, quote_identifier)
+from datagen_runtime.generator import cardinality_bounds
+from datagen_runtime.sinks import cypher_manifest_path
+
+# --- Configuration ---
+MANIFEST_PATH = cypher_manifest_path(CYPHER_FILE_PATH) # Written by the Cypher sink next to the script (CSV runs: <dir>/manifest.json)
+VERIFY_REPORT_PATH = os.path.join(SCRIPT_DIR, "verify_report.json")
+COUNT_BATCH_SIZE = 100 # Count-store lookups combined (UNION ALL) into one query
+SAMPLE_SIZE = 50 # Random IDs checked per label and per relationship block
+DATE_SLACK = datetime.timedelta(days=1) # Tolerance on date rule bounds on top of the time since generation
+MAX_EXAMPLES = 5 # Offending IDs / values kept per failed check
+
+# Verifies a loaded graph against generation_plan.json and the generator's manifest without scanning
+# it. Counts come from Neo4j's count store: MATCH (x:Label) RETURN count(x) and relationship counts
+# by type (optionally with the source label) are answered in constant time, and each stays its own
+# UNION ALL branch so a few queries cover all labels. Referential integrity, cardinality and dates are
+# checked on random samples of the generator's sequential IDs, looked up through the ID constraints.
+
+def count_store_counts(session, patterns, batch_size=COUNT_BATCH_SIZE):
+    """count(x) for each MATCH pattern (variable x), batch_size patterns per query."""
+    counts = []
+    for start in range(0, len(patterns), batch_size):
+        batch = patterns[start:start + batch_size]
+        query = "\nUNION ALL\n".join(f"MATCH {pattern} RETURN {i} AS i, count(x) AS count" for i, pattern in enumerate(batch))
+        by_index = {record["i"]: record["count"] for record in session.run(query)}
+        counts.extend(by_index.get(i, 0) for i in range(len(batch)))
+    return counts
+
+def to_datetime(value):
+    """Stored date/datetime (ISO string, or a driver temporal) as a naive datetime; None when it does not parse."""
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if isinstance(value, str):
+        try:
+            value = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time.min)
+    return None
+
+class LoadVerifier:
+    """
+    Compares the graph in session against the plan and the manifest, then samples it. Failures are
+    collected per (check, name) with up to MAX_EXAMPLES examples; report() is the JSON summary.
+    """
+
+    def __init__(self, session, config, manifest=None, sample_size=SAMPLE_SIZE, seed=None):
+        self.session = session
+        self.config = config
+        self.manifest = manifest or {"nodes": {}, "relationships": []}
+        self.sample_size = sample_size
+        self.rng = random.Random(seed)
+        self.schema_nodes = config.schema_data.get("nodes", {})
+        self.id_props = node_id_properties(self.schema_nodes)
+        self.failures = {} # (check, name) -> {"check", "name", "expected", "actual", "count", "examples"}
+        self.timings = {}
+        self.checked = {"count_lookups": 0, "sampled_nodes": 0, "sampled_relationship_sources": 0}
+        generated_at = (self.manifest.get("summary") or {}).get("generated_at")
+        since_generation = datetime.datetime.now() - datetime.datetime.fromisoformat(generated_at) if generated_at else datetime.timedelta(0)
+        self.date_slack = max(since_generation, datetime.timedelta(0)) + DATE_SLACK # Relative bounds ('NOW-1Y') moved on since then
+        self.rel_properties = {}
+        for rel_definition in config.schema_data.get("relationships", []):
+            if isinstance(rel_definition, dict):
+                source_label, target_label = [v[0] if isinstance(v, list) and v else v for v in (rel_definition.get("source"), rel_definition.get("target"))]
+                self.rel_properties.setdefault((source_label, rel_definition.get("type"), target_label), rel_definition.get("properties", []))
+
+    def fail(self, check, name, example=None, expected=None, actual=None):
+        entry = self.failures.setdefault((check, name), {"check": check, "name": name, "expected": expected, "actual": actual, "count": 0, "examples": []})
+        entry["count"] += 1
+        if example is not None and len(entry["examples"]) < MAX_EXAMPLES:
+            entry["examples"].append(example)
+
+    # --- Counts ---
+
+    def expected_node_counts(self):
+        """label -> (planned, manifest rows); either is None when that source does not know the label."""
+        labels = {label: (count, None) for label, count in self.config.plan_data.items() if label in self.schema_nodes and count}
+        for label, entry in self.manifest["nodes"].items():
+            labels[label] = (labels.get(label, (None, None))[0], entry["rows"])
+        return labels
+
+    def verify_counts(self):
+        started = time.perf_counter()
+        node_expected = self.expected_node_counts()
+        rel_expected, source_rel_expected = {}, {}
+        for group in self.manifest["relationships"]:
+            rel_expected[group["type"]] = rel_expected.get(group["type"], 0) + group["rows"]
+            key = (group["source"], group["type"])
+            source_rel_expected[key] = source_rel_expected.get(key, 0) + group["rows"]
+
+        patterns = ["(x)", "()-[x]->()"]
+        patterns += [f"(x:{quote_identifier(label)})" for label in node_expected]
+        patterns += [f"()-[x:{quote_identifier(rel_type)}]->()" for rel_type in rel_expected]
+        patterns += [f"(:{quote_identifier(source_label)})-[x:{quote_identifier(rel_type)}]->()" for source_label, rel_type in source_rel_expected]
+        counts = iter(count_store_counts(self.session, patterns))
+        self.checked["count_lookups"] = len(patterns)
+
+        total_nodes, total_relationships = next(counts), next(counts)
+        for label, (planned, generated) in node_expected.items():
+            actual = next(counts)
+            if generated is not None and actual != generated:
+                self.fail("node_count", label, expected=generated, actual=actual)
+            if planned is not None and actual != planned:
+                self.fail("node_count_vs_plan", label, expected=planned, actual=actual)
+        for rel_type, expected in rel_expected.items():
+            actual = next(counts)
+            if actual != expected:
+                self.fail("relationship_count", rel_type, expected=expected, actual=actual)
+        for (source_label, rel_type), expected in source_rel_expected.items():
+            actual = next(counts)
+            if actual != expected:
+                self.fail("relationship_count_by_source", f"({source_label})-[:{rel_type}]->()", expected=expected, actual=actual)
+        expected_nodes = sum(generated if generated is not None else planned for planned, generated in node_expected.values())
+        if total_nodes != expected_nodes:
+            self.fail("total_nodes", "*", expected=expected_nodes, actual=total_nodes) # Leftovers of earlier loads, or labels missing
+        if self.manifest["relationships"] and total_relationships != sum(rel_expected.values()):
+            self.fail("total_relationships", "*", expected=sum(rel_expected.values()), actual=total_relationships)
+        self.timings["counts_seconds"] = time.perf_counter() - started
+        logging.info(f"Checked {len(patterns)} count-store lookups in {self.timings['counts_seconds']:.2f}s "
+                     f"({total_nodes} nodes, {total_relationships} relationships in the database).")
+
+    # --- Samples ---
+
+    def sample_ids(self, label, count):
+        """Random IDs the generator gave the label (sequential counters 1..count)."""
+        id_prop = self.id_props[label]
+        counters = self.rng.sample(range(1, count + 1), min(self.sample_size, count))
+        return [generate_sequential_id(label, id_prop["name"], id_prop["type"], n, Diagnostics()) for n in counters]
+
+    def check_dates(self, owner, properties, props, item_id):
+        """Date/DateTime values of a sampled node or relationship must parse and lie within their rule's range."""
+        now = datetime.datetime.now()
+        for prop in properties:
+            if not isinstance(prop, dict) or prop.get("type") not in ("Date", "DateTime") or props.get(prop.get("name")) is None:
+                continue
+            qualified_prop_name, value = f"{owner}.{prop['name']}", props[prop["name"]]
+            parsed = to_datetime(value)
+            if parsed is None:
+                self.fail("unparsable_date", qualified_prop_name, {"id": item_id, "value": str(value)})
+                continue
+            spec = resolve_rule(qualified_prop_name, prop["type"], self.config.generation_rules_data, Diagnostics())
+            if spec[0] in ("today", "now"):
+                low = high = now
+            elif spec[0] in ("date", "datetime"):
+                issues = Diagnostics() # Unparsable bounds fell back to 'now' at generation; nothing to check against
+                low, high = (to_datetime(parse_date_string(bound, spec[0] == "datetime", issues, qualified_prop_name)) for bound in spec[1:3])
+                if len(issues):
+                    continue
+                low, high = min(low, high), max(low, high)
+            else:
+                continue
+            if not low - self.date_slack <= parsed <= high + DATE_SLACK:
+                self.fail("date_out_of_range", qualified_prop_name, {"id": item_id, "value": str(value)},
+                          expected=f"{low.isoformat()} .. {high.isoformat()}")
+
+    def verify_node_samples(self):
+        for label, (planned, generated) in self.expected_node_counts().items():
+            count = generated if generated is not None else planned
+            if not count:
+                continue
+            id_prop_name = self.id_props[label]["name"]
+            query = (f"UNWIND $ids AS id OPTIONAL MATCH (x:{quote_identifier(label)} {{{quote_identifier(id_prop_name)}: id}}) "
+                     f"RETURN id, count(x) AS found, head(collect(properties(x))) AS props")
+            for record in self.session.run(query, ids=self.sample_ids(label, count)):
+                self.checked["sampled_nodes"] += 1
+                if record["found"] == 0:
+                    self.fail("missing_node", label, record["id"])
+                elif record["found"] > 1:
+                    self.fail("duplicate_id", label, record["id"], expected=1, actual=record["found"])
+                else:
+                    properties = [p for p in self.schema_nodes[label].get("properties", []) if isinstance(p, dict) and p.get("name") != id_prop_name]
+                    self.check_dates(label, properties, record["props"], record["id"])
+
+    def verify_relationship_samples(self):
+        node_counts = {label: generated if generated is not None else planned for label, (planned, generated) in self.expected_node_counts().items()}
+        for group in self.manifest["relationships"]:
+            source_label, rel_type, target_label = group["source"], group["type"], group["target"]
+            sources, targets = node_counts.get(source_label), node_counts.get(target_label)
+            if not sources or not targets:
+                continue
+            name = f"({source_label})-[:{rel_type}]->({target_label})"
+            bounds = cardinality_bounds(self.config.cardinality_rules_data, source_label, rel_type, target_label, targets)
+            if bounds is None:
+                bounds = (1, 1) if sources <= targets else (0, 1) # Hybrid default: unique pairs over the smaller side
+            query = (f"UNWIND $ids AS id MATCH (s:{quote_identifier(source_label)} {{{quote_identifier(group['source_id_property'])}: id}}) "
+                     f"OPTIONAL MATCH (s)-[x:{quote_identifier(rel_type)}]->(t:{quote_identifier(target_label)}) "
+                     f"RETURN id, count(x) AS degree, count(t.{quote_identifier(group['target_id_property'])}) AS keyed, head(collect(properties(x))) AS props")
+            for record in self.session.run(query, ids=self.sample_ids(source_label, sources)):
+                self.checked["sampled_relationship_sources"] += 1
+                if not bounds[0] <= record["degree"] <= bounds[1]:
+                    self.fail("degree_out_of_range", name, {"id": record["id"], "degree": record["degree"]}, expected=f"{bounds[0]}..{bounds[1]}")
+                if record["keyed"] < record["degree"]:
+                    self.fail("target_without_id", name, record["id"])
+                if record["props"]:
+                    self.check_dates(rel_type, self.rel_properties.get((source_label, rel_type, target_label), []), record["props"], record["id"])
+
+    def verify_samples(self):
+        started = time.perf_counter()
+        self.verify_node_samples()
+        self.verify_relationship_samples()
+        self.timings["samples_seconds"] = time.perf_counter() - started
+        logging.info(f"Checked {self.checked['sampled_nodes']} sampled nodes and {self.checked['sampled_relationship_sources']} "
+                     f"sampled relationship sources in {self.timings['samples_seconds']:.2f}s.")
+
+    # --- Report ---
+
+    def report(self, **extra):
+        return {"checked_at": datetime.datetime.now().isoformat(), **extra, **self.timings, "checked": self.checked,
+                "passed": not self.failures, "failures": list(self.failures.values())}
+
+    def log_summary(self):
+        if not self.failures:
+            logging.info("Verification passed: counts match the plan and manifest, samples are consistent.")
+            return
+        logging.warning(f"Verification found {len(self.failures)} failed checks:")
+        for entry in self.failures.values():
+            expected = "" if entry["expected"] is None else f" expected {entry['expected']}"
+            actual = "" if entry["actual"] is None else f", got {entry['actual']}"
+            examples = f" ({entry['count']} sampled; e.g. {entry['examples'][:2]})" if entry["examples"] else ""
+            logging.warning(f"  {entry['check']} {entry['name']}:{expected}{actual}{examples}")
+
+def load_manifest(path):
+    if not path or not os.path.exists(path):
+        logging.warning(f"No manifest at {path}; nodes are checked against the plan only, relationships are not checked.")
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify a loaded graph against the generation plan and manifest (count store and samples, no full scans).")
+    parser.add_argument("--config-dir", default=SCRIPT_DIR, help="Directory with the JSON artifacts the data was generated from")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifest of the generated data (Cypher script's .manifest.json or CSV manifest.json)")
+    parser.add_argument("--sample-size", type=int, default=SAMPLE_SIZE, help="Random IDs checked per label and per relationship block (0 = counts only)")
+    parser.add_argument("--seed", type=int, help="Random seed for the samples")
+    parser.add_argument("--report", default=VERIFY_REPORT_PATH, help="Where the verification report (JSON) goes")
+    args = parser.parse_args()
+
+    if GraphDatabase is None:
+        logging.error("Verifying a Neo4j load requires the neo4j driver (pip install neo4j).")
+        raise SystemExit(1)
+    try:
+        config = load_config(args.config_dir)
+    except DatagenConfigError as e:
+        logging.error(f"Could not load the generation artifacts: {e}")
+        raise SystemExit(1)
+
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    try:
+        driver.verify_connectivity()
+        with driver.session(database=NEO4J_DATABASE) as session:
+            verifier = LoadVerifier(session, config, load_manifest(args.manifest), args.sample_size, args.seed)
+            verifier.verify_counts()
+            if args.sample_size > 0:
+                verifier.verify_samples()
+    finally:
+        driver.close()
+    verifier.log_summary()
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(verifier.report(database=NEO4J_DATABASE, manifest=args.manifest), f, indent=2, default=str)
+    logging.info(f"Verification report written to {args.report}")
+    raise SystemExit(0 if not verifier.failures else 1)